@@ -1,13 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import get_current_user, require_role
 from app.core.redis_client import redis_client
+from app.core.pagination import PageParams, page_params, paginate
+from app.core.export import export_response
+from app.models import UserProfile, Booking, AuditLog, Vendor
+from app.services.fleet import fleet
+from app.services import location_history, profile_search
+from app.services.accounts import parse_uuid
+from app.services.vendor_index import vendor_index
 from typing import List, Optional
 from datetime import datetime, date
 
 router = APIRouter()
 
+EXPORT_FORMAT = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+
+
+def _users_query(role: Optional[str], status: Optional[str], search: Optional[str]):
+    query = select(
+        UserProfile.id, UserProfile.name, UserProfile.mobile, UserProfile.email,
+        UserProfile.role, UserProfile.status, UserProfile.created_at
+    )
+    if role:
+        query = query.where(UserProfile.role == role)
+    if status:
+        query = query.where(UserProfile.status == status)
+    if search:
+        query = query.where(profile_search.user_match(search)[0])
+    return query
+
+
+def _bookings_query(status: Optional[str], booking_date: Optional[date]):
+    query = select(
+        Booking.id, Booking.booking_number, Booking.customer_id, Booking.vendor_id,
+        Booking.booking_date, Booking.booking_time, Booking.final_amount.label("total_amount"),
+        Booking.status, Booking.payment_status, Booking.created_at
+    )
+    if status:
+        query = query.where(Booking.status == status)
+    if booking_date:
+        query = query.where(Booking.booking_date == booking_date)
+    return query
+
+
+def _audit_logs_query(user_id: Optional[str], action: Optional[str]):
+    query = select(
+        AuditLog.id, AuditLog.user_id, AuditLog.action, AuditLog.resource_type,
+        AuditLog.resource_id, AuditLog.ip_address, AuditLog.created_at
+    )
+    if user_id:
+        query = query.where(AuditLog.user_id == user_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    return query
+
+
 @router.get("/dashboard")
 async def get_dashboard(
     current_user: dict = Depends(require_role(["admin"])),
@@ -38,39 +88,37 @@ async def get_users(
     role: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["admin"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all users with filters"""
-    users = [
-        {
-            "id": "user_1",
-            "name": "John Doe",
-            "mobile": "+919876543210",
-            "email": "john@example.com",
-            "role": "customer",
-            "status": "active",
-            "created_at": "2024-05-15",
-            "total_bookings": 25
-        },
-        {
-            "id": "user_2",
-            "name": "Priya Sharma",
-            "mobile": "+919876543211",
-            "email": "priya@example.com",
-            "role": "therapist",
-            "status": "active",
-            "created_at": "2024-03-10",
-            "vendor": "Serenity Spa"
-        }
-    ]
-
-    if role:
-        users = [u for u in users if u["role"] == role]
-    if status:
-        users = [u for u in users if u["status"] == status]
-
-    return {"users": users, "total": len(users)}
+    """
+    Get all users with filters, newest first
+    - With `search`, the best matches by name, mobile or email instead
+    """
+    if search:
+        users = await profile_search.search_users(db, search, role=role, status=status, limit=page.limit)
+        return {"users": users, "next_cursor": None, "limit": page.limit}
+
+    query = _users_query(role, status, None)
+    result = await paginate(db, query, [(UserProfile.created_at, True), (UserProfile.id, True)], page)
+    return {"users": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
+
+@router.get("/search")
+async def search_profiles(
+    q: str = Query(..., min_length=2, max_length=100),
+    scope: str = Query("all", pattern="^(all|users|vendors)$"),
+    limit: int = Query(profile_search.DEFAULT_LIMIT, ge=1, le=100),
+    current_user: dict = Depends(require_role(["admin", "employee"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Fuzzy lookup of users and vendors by name, mobile, email or business name, best matches first"""
+    results = {}
+    if scope in ("all", "users"):
+        results["users"] = await profile_search.search_users(db, q, limit=limit)
+    if scope in ("all", "vendors"):
+        results["vendors"] = await profile_search.search_vendors(db, q, limit=limit)
+    return results
 
 @router.get("/users/{user_id}")
 async def get_user_detail(
@@ -185,27 +233,68 @@ async def reject_vendor(
         "reason": rejection_data.get("reason")
     }
 
+@router.post("/vendors/reindex")
+async def reindex_vendors(
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Rebuild the nearby-vendor index from the vendors table"""
+    indexed = await vendor_index.reindex()
+
+    return {"message": "Vendor index rebuilt", "indexed": indexed}
+
 @router.get("/bookings")
 async def get_all_bookings(
     status: Optional[str] = Query(None),
     date: Optional[date] = Query(None),
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["admin"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all bookings across platform"""
-    bookings = [
-        {
-            "id": "booking_1",
-            "customer_name": "John Doe",
-            "vendor_name": "Serenity Spa",
-            "booking_date": "2025-01-15",
-            "total_amount": 2000,
-            "status": "completed",
-            "payment_status": "paid"
-        }
-    ]
-
-    return {"bookings": bookings, "total": len(bookings)}
+    """Get all bookings across platform, newest first"""
+    query = _bookings_query(status, date)
+    result = await paginate(db, query, [(Booking.created_at, True), (Booking.id, True)], page)
+    return {"bookings": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
+
+@router.get("/dispatch/therapists")
+async def get_nearest_therapists(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10, gt=0, le=50),
+    skill: Optional[str] = Query(None),
+    count: int = Query(5, ge=1, le=50),
+    current_user: dict = Depends(require_role(["admin", "employee"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Nearest available therapists for a doorstep booking, nearest first"""
+    therapists = await fleet.nearest_available(
+        latitude, longitude, radius, count=count, skill=skill
+    )
+
+    return {"therapists": therapists, "total": len(therapists)}
+
+@router.get("/therapists/{therapist_id}/trail")
+async def get_therapist_trail(
+    therapist_id: str,
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    max_points: int = Query(2000, ge=2, le=10000),
+    current_user: dict = Depends(require_role(["admin"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recorded therapist route for a time range of up to 7 days"""
+    if not start < end <= start + location_history.MAX_TRAIL_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"end must be after start and at most {location_history.MAX_TRAIL_RANGE.days} days later"
+        )
+    therapist_uuid = parse_uuid(therapist_id)
+    if therapist_uuid is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Therapist not found")
+    trail = await location_history.get_trail(
+        db, therapist_id=therapist_uuid, start=start, end=end, max_points=max_points
+    )
+
+    return {"therapist_id": therapist_id, "trail": trail}
 
 @router.get("/revenue")
 async def get_revenue_analytics(
@@ -344,24 +433,100 @@ async def create_role(
     """Create new role"""
     return {"message": "Role created successfully"}
 
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """This worker's in-process cache tier: limits, usage and hit/miss counts per key prefix"""
+    stats = redis_client.local_stats()
+    for prefix in stats.values():
+        lookups = prefix["hits"] + prefix["misses"]
+        prefix["hit_rate"] = round(prefix["hits"] / lookups, 3) if lookups else None
+    return {"enabled": redis_client.local is not None and redis_client.local.active, "prefixes": stats}
+
 @router.get("/audit-logs")
 async def get_audit_logs(
     user_id: Optional[str] = Query(None),
     action: Optional[str] = Query(None),
+    page: PageParams = Depends(page_params(default=100, maximum=500)),
     current_user: dict = Depends(require_role(["admin"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get audit logs"""
-    logs = [
-        {
-            "id": "log_1",
-            "user_id": "admin_1",
-            "user_name": "Admin User",
-            "action": "approve_vendor",
-            "details": "Approved vendor: Serenity Spa",
-            "timestamp": "2025-01-15 10:30:00",
-            "ip_address": "192.168.1.1"
-        }
-    ]
+    """Get audit logs, newest first"""
+    query = _audit_logs_query(user_id, action)
+    result = await paginate(db, query, [(AuditLog.created_at, True), (AuditLog.id, True)], page)
+    return {"logs": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
+
+@router.get("/export/users")
+async def export_users(
+    request: Request,
+    role: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    fmt: str = EXPORT_FORMAT,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Stream every matching user as NDJSON or CSV"""
+    query = _users_query(role, status, search).order_by(UserProfile.created_at, UserProfile.id)
+    return export_response(request, query, "users", fmt)
 
-    return {"logs": logs}
+@router.get("/export/bookings")
+async def export_bookings(
+    request: Request,
+    status: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    fmt: str = EXPORT_FORMAT,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Stream every matching booking as NDJSON or CSV"""
+    query = _bookings_query(status, None)
+    if start_date:
+        query = query.where(Booking.booking_date >= start_date)
+    if end_date:
+        query = query.where(Booking.booking_date <= end_date)
+    query = query.order_by(Booking.booking_date, Booking.booking_time, Booking.id)
+    return export_response(request, query, "bookings", fmt)
+
+@router.get("/export/vendor-revenue")
+async def export_vendor_revenue(
+    request: Request,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    fmt: str = EXPORT_FORMAT,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Stream completed-booking revenue and commission per vendor as NDJSON or CSV"""
+    revenue = func.sum(Booking.final_amount)
+    query = select(
+        Vendor.id.label("vendor_id"),
+        Vendor.business_name.label("vendor_name"),
+        func.count(Booking.id).label("bookings"),
+        revenue.label("revenue"),
+        func.round(revenue * Vendor.commission_rate / 100, 2).label("commission")
+    ).join(Booking, Booking.vendor_id == Vendor.id).where(Booking.status == "completed")
+    if start_date:
+        query = query.where(Booking.booking_date >= start_date)
+    if end_date:
+        query = query.where(Booking.booking_date <= end_date)
+    query = query.group_by(Vendor.id, Vendor.business_name, Vendor.commission_rate).order_by(Vendor.id)
+    return export_response(request, query, "vendor-revenue", fmt)
+
+@router.get("/export/audit-logs")
+async def export_audit_logs(
+    request: Request,
+    user_id: Optional[str] = Query(None),
+    action: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    fmt: str = EXPORT_FORMAT,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Stream matching audit log entries as NDJSON or CSV"""
+    query = _audit_logs_query(user_id, action)
+    if start:
+        query = query.where(AuditLog.created_at >= start)
+    if end:
+        query = query.where(AuditLog.created_at < end)
+    query = query.order_by(AuditLog.created_at, AuditLog.id)
+    return export_response(request, query, "audit-logs", fmt)
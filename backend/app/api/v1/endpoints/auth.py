@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import create_access_token, create_refresh_token, get_password_hash, verify_password
 from app.core.redis_client import redis_client
+from app.core.ids import new_id
 from app.schemas.auth import OTPRequest, OTPVerify, UserRegister, UserLogin, Token, TokenRefresh
 import random
 from datetime import timedelta
@@ -76,7 +77,7 @@ async def register(request: UserRegister, db: AsyncSession = Depends(get_db)):
     - Hashes password if provided
     - Returns JWT tokens
     """
-    user_id = f"user_{random.randint(100000, 999999)}"
+    user_id = new_id("user")
 
     user_data = {
         "id": user_id,
@@ -1,22 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
-from app.core.security import get_current_user, require_role
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.security import get_current_user, require_role, get_websocket_user
 from app.core.redis_client import redis_client
-from app.schemas.booking import BookingCreate, BookingUpdate, BookingResponse
+from app.core.etag import cached_response, cache_response, computed_response, PUBLIC
+from app.core.cache import TTL_DEFAULT, TTL_LONG
+from app.core.ids import new_id
+from app.core import geohash
+from app.models import Booking
+from app.services.vendor_index import vendor_index
+from app.services import accounts, location_history
+from app.services.booking_feed import booking_feed
+from app.services.availability import availability
+from app.services.reservations import reservations
+from app.services.booking_writer import booking_writer
+from app.services.booking_events import booking_events
+from app.services.pricing import pricing_engine, PricingError
+from app.services.coupons import coupon_redemptions, CouponLimitReached
+from app.services.checkout import checkout, HoldExpired
+from app.services.autocomplete import autocomplete, MAX_SUGGESTIONS
+from app.schemas.booking import BookingCreate, BookingUpdate, BookingResponse, PriceQuoteRequest
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
+import asyncio
+import json
 
 router = APIRouter()
 
+
+async def _owns_booking(db: AsyncSession, booking_id: str, user_id: str) -> bool:
+    """
+    Whether a booking belongs to the caller: the reservation record while
+    it lives (it is written before the booking row exists), the bookings
+    table after that
+    """
+    record = await reservations.get(booking_id)
+    if record and record.get("customer_id"):
+        return record["customer_id"] == user_id
+    owner = (await db.execute(
+        select(Booking.customer_id).where(Booking.booking_number == booking_id)
+    )).scalar()
+    return owner is not None and owner == await accounts.user_id(db, user_id)
+
+
+async def _require_own_booking(db: AsyncSession, booking_id: str, current_user: dict) -> None:
+    if not await _owns_booking(db, booking_id, current_user["user_id"]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+
 @router.get("/profile")
 async def get_profile(
+    request: Request,
     current_user: dict = Depends(require_role(["customer"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get customer profile"""
     cache_key = f"profile:customer:{current_user['user_id']}"
-    cached_profile = await redis_client.get(cache_key)
+    cached_profile = await cached_response(request, cache_key)
 
     if cached_profile:
         return cached_profile
@@ -31,8 +72,7 @@ async def get_profile(
         "loyalty_points": 500
     }
 
-    await redis_client.set(cache_key, profile, expire=300)
-    return profile
+    return await cache_response(request, cache_key, profile, expire=300)
 
 @router.put("/profile")
 async def update_profile(
@@ -48,105 +88,169 @@ async def update_profile(
 
 @router.get("/vendors", response_model=List[dict])
 async def get_vendors(
-    latitude: Optional[float] = Query(None),
-    longitude: Optional[float] = Query(None),
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
     service_type: Optional[str] = Query(None),
-    radius: Optional[int] = Query(5),
+    radius: Optional[int] = Query(5, ge=1, le=50),
+    limit: int = Query(50, ge=1, le=100),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of nearby vendors/spas
-    - Filter by location (latitude, longitude, radius)
+    - Filter by location (latitude, longitude, radius in km)
     - Filter by service type
-    - Returns vendor details with ratings and services
+    - Returns vendor details with ratings and services, nearest first
     """
-    cache_key = f"vendors:{latitude}:{longitude}:{service_type}:{radius}"
-    cached_vendors = await redis_client.get(cache_key)
+    if latitude is not None and longitude is not None:
+        _, center_lat, center_lon, padded_radius = geohash.snap(latitude, longitude, radius)
+        cache_key = geohash.location_cache_key("vendors:geo", latitude, longitude, radius, service_type)
+        # the whole padded cell: a cap by distance from the cell center
+        # would drop vendors that are nearest to the caller
+        cell_vendors = await redis_client.get_or_compute(
+            cache_key,
+            lambda: vendor_index.nearby(
+                center_lat, center_lon, padded_radius, service_type=service_type, limit=None
+            ),
+            expire=TTL_DEFAULT,
+            tags=["vendors"]
+        )
+
+        return geohash.rerank(cell_vendors, latitude, longitude, radius, limit)
+
+    async def load_vendors():
+        return [
+            {
+                "id": "vendor_1",
+                "name": "Serenity Spa",
+                "rating": 4.8,
+                "total_reviews": 156,
+                "distance": 2.3,
+                "address": "Koramangala, Bangalore",
+                "services": ["Swedish Massage", "Deep Tissue", "Aromatherapy"],
+                "price_range": "₹1000-₹3000",
+                "images": ["/api/placeholder/400/300"]
+            },
+            {
+                "id": "vendor_2",
+                "name": "Bliss Wellness",
+                "rating": 4.6,
+                "total_reviews": 98,
+                "distance": 3.1,
+                "address": "Indiranagar, Bangalore",
+                "services": ["Thai Massage", "Hot Stone", "Reflexology"],
+                "price_range": "₹1500-₹4000",
+                "images": ["/api/placeholder/400/300"]
+            }
+        ]
 
-    if cached_vendors:
-        return cached_vendors
+    return await redis_client.get_or_compute(
+        f"vendors:all:{service_type}", load_vendors, expire=TTL_DEFAULT, tags=["vendors"]
+    )
 
-    vendors = [
-        {
-            "id": "vendor_1",
-            "name": "Serenity Spa",
-            "rating": 4.8,
-            "total_reviews": 156,
-            "distance": 2.3,
-            "address": "Koramangala, Bangalore",
-            "services": ["Swedish Massage", "Deep Tissue", "Aromatherapy"],
-            "price_range": "₹1000-₹3000",
-            "images": ["/api/placeholder/400/300"]
-        },
-        {
-            "id": "vendor_2",
-            "name": "Bliss Wellness",
-            "rating": 4.6,
-            "total_reviews": 98,
-            "distance": 3.1,
-            "address": "Indiranagar, Bangalore",
-            "services": ["Thai Massage", "Hot Stone", "Reflexology"],
-            "price_range": "₹1500-₹4000",
-            "images": ["/api/placeholder/400/300"]
-        }
-    ]
-
-    await redis_client.set(cache_key, vendors, expire=300)
-    return vendors
+@router.get("/autocomplete")
+async def get_autocomplete(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS)
+):
+    """
+    Search box suggestions as the customer types
+    - Services (also found by their tags and category), categories and vendors
+    - Ranked by how often customers search for them; every query is logged for that
+    """
+    suggestions = autocomplete.suggest(q, limit)
+    await autocomplete.log_query(q, len(suggestions), request.client.host if request.client else "")
+    return {"query": q, "suggestions": suggestions}
 
 @router.get("/vendors/{vendor_id}")
 async def get_vendor_detail(
     vendor_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Get detailed vendor information"""
-    cache_key = f"vendor:detail:{vendor_id}"
-    cached_vendor = await redis_client.get(cache_key)
-
-    if cached_vendor:
-        return cached_vendor
-
-    vendor = {
-        "id": vendor_id,
-        "name": "Serenity Spa",
-        "rating": 4.8,
-        "total_reviews": 156,
-        "address": "123 Main St, Koramangala, Bangalore",
-        "phone": "+919876543210",
-        "services": [
-            {
-                "id": "service_1",
-                "name": "Swedish Massage",
-                "duration": 60,
-                "price": 2000,
-                "description": "Relaxing full body massage"
-            },
-            {
-                "id": "service_2",
-                "name": "Deep Tissue Massage",
-                "duration": 90,
-                "price": 3000,
-                "description": "Intense therapeutic massage"
-            }
-        ],
-        "therapists": [
-            {
-                "id": "therapist_1",
-                "name": "Priya Sharma",
-                "specialization": ["Swedish", "Deep Tissue"],
-                "rating": 4.9,
-                "experience_years": 5
+    async def load_vendor():
+        return {
+            "id": vendor_id,
+            "name": "Serenity Spa",
+            "rating": 4.8,
+            "total_reviews": 156,
+            "address": "123 Main St, Koramangala, Bangalore",
+            "phone": "+919876543210",
+            "services": [
+                {
+                    "id": "service_1",
+                    "name": "Swedish Massage",
+                    "duration": 60,
+                    "price": 2000,
+                    "description": "Relaxing full body massage"
+                },
+                {
+                    "id": "service_2",
+                    "name": "Deep Tissue Massage",
+                    "duration": 90,
+                    "price": 3000,
+                    "description": "Intense therapeutic massage"
+                }
+            ],
+            "therapists": [
+                {
+                    "id": "therapist_1",
+                    "name": "Priya Sharma",
+                    "specialization": ["Swedish", "Deep Tissue"],
+                    "rating": 4.9,
+                    "experience_years": 5
+                }
+            ],
+            "images": ["/api/placeholder/400/300"],
+            "working_hours": {
+                "monday": "9:00 AM - 9:00 PM",
+                "tuesday": "9:00 AM - 9:00 PM"
             }
-        ],
-        "images": ["/api/placeholder/400/300"],
-        "working_hours": {
-            "monday": "9:00 AM - 9:00 PM",
-            "tuesday": "9:00 AM - 9:00 PM"
         }
-    }
 
-    await redis_client.set(cache_key, vendor, expire=600)
-    return vendor
+    return await computed_response(
+        request, f"vendor:detail:{vendor_id}", load_vendor,
+        expire=TTL_LONG, cache_control=PUBLIC, tags=[f"vendor:{vendor_id}"]
+    )
+
+@router.get("/vendors/{vendor_id}/slots")
+async def get_vendor_slots(
+    vendor_id: str,
+    day: date = Query(..., alias="date"),
+    service: Optional[str] = Query(None),
+    duration: int = Query(60, ge=15, le=480),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Free booking slots for a vendor on a date
+    - Only therapists qualified for `service` are considered
+    - Each slot lists the therapists free for the whole duration
+    """
+    slots = await availability.free_slots(
+        db, vendor_id, day, duration, service=service, not_before=datetime.now()
+    )
+
+    return {"vendor_id": vendor_id, "date": day, "duration": duration, "slots": slots}
+
+@router.post("/pricing/quote")
+async def quote_price(
+    request: PriceQuoteRequest,
+    current_user: dict = Depends(require_role(["customer"]))
+):
+    """Price a cart (tiers, promotions, coupon) without booking it"""
+    at = None
+    if request.booking_date and request.booking_time:
+        at = datetime.combine(request.booking_date, request.booking_time)
+    try:
+        return await pricing_engine.quote(
+            request.vendor_id,
+            [item.model_dump() for item in request.services],
+            at=at,
+            coupon_code=request.coupon_code
+        )
+    except PricingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.post("/bookings", response_model=dict)
 async def create_booking(
@@ -157,11 +261,48 @@ async def create_booking(
     """
     Create new booking
     - Validates service availability
-    - Calculates total amount
-    - Creates booking record
+    - Prices the cart server-side (client prices are ignored)
+    - Holds a therapist's slot while payment completes
+    - Queues the booking record for persistence
     """
-    booking_id = f"booking_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    total_amount = sum(item.price * item.quantity for item in booking.services)
+    booking_id = new_id("booking")
+    try:
+        quote = await pricing_engine.quote(
+            booking.vendor_id,
+            [item.model_dump() for item in booking.services],
+            at=datetime.combine(booking.booking_date, booking.booking_time),
+            coupon_code=booking.coupon_code
+        )
+    except PricingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    duration = quote["duration"]
+
+    slots = await availability.free_slots(db, booking.vendor_id, booking.booking_date, duration)
+    wanted = booking.booking_time.strftime("%H:%M")
+    candidates = next((slot["therapist_ids"] for slot in slots if slot["time"] == wanted), [])
+    if booking.therapist_id:
+        # only a therapist of this vendor who is working and free then
+        candidates = [booking.therapist_id] if booking.therapist_id in candidates else []
+
+    reservation = await reservations.hold_any(
+        booking_id, booking.vendor_id, candidates,
+        booking.booking_date, booking.booking_time, duration,
+        customer_id=current_user["user_id"]
+    )
+    if not reservation:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Selected slot is no longer available"
+        )
+
+    if quote["coupon_code"]:
+        try:
+            await coupon_redemptions.redeem(
+                quote["coupon_code"], current_user["user_id"], booking_id, quote["discount_amount"]
+            )
+        except CouponLimitReached as e:
+            await reservations.release(booking_id)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
     booking_data = {
         "id": booking_id,
@@ -169,22 +310,68 @@ async def create_booking(
         "vendor_id": booking.vendor_id,
         "booking_date": str(booking.booking_date),
         "booking_time": str(booking.booking_time),
-        "services": [item.dict() for item in booking.services],
-        "total_amount": total_amount,
+        "services": quote["lines"],
+        "subtotal": quote["subtotal"],
+        "discount_amount": quote["discount_amount"],
+        "promotions": quote["promotions"],
+        "coupon_code": quote["coupon_code"],
+        "total_amount": quote["total_amount"],
+        "commission": quote["commission"],
+        "net_amount": quote["net_amount"],
         "status": "pending",
         "payment_status": "pending",
         "location": booking.location,
         "special_requests": booking.special_requests,
+        "therapist_id": reservation["therapist_id"],
+        "duration": duration,
+        "reservation": reservation,
         "created_at": datetime.now().isoformat()
     }
 
+    if not await booking_writer.enqueue(booking_data):
+        await reservations.release(booking_id)
+        await coupon_redemptions.release(booking_id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Bookings are temporarily unavailable"
+        )
+    await checkout.expect_payment(booking_id, quote["total_amount"])
     await redis_client.set(f"booking:{booking_id}", booking_data, expire=3600)
+    await booking_events.emit(
+        booking_id, "pending", event_type="booking.created",
+        actor_id=current_user["user_id"], actor_role="customer",
+        customer_id=current_user["user_id"], vendor_id=booking.vendor_id
+    )
 
     return {
         "message": "Booking created successfully",
         "booking": booking_data
     }
 
+@router.post("/bookings/{booking_id}/confirm")
+async def confirm_booking(
+    booking_id: str,
+    current_user: dict = Depends(require_role(["customer"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Turn the slot hold into a confirmed booking once payment succeeds
+    - Refused until the payment gateway has reported the booking paid
+    """
+    await _require_own_booking(db, booking_id, current_user)
+    if not await checkout.is_paid(booking_id):
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Payment not received yet")
+
+    try:
+        await checkout.confirm(booking_id, current_user["user_id"], "customer")
+    except HoldExpired:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Slot hold expired, please book again"
+        )
+
+    return {"message": "Booking confirmed", "booking_id": booking_id}
+
 @router.get("/bookings")
 async def get_bookings(
     status: Optional[str] = Query(None),
@@ -233,6 +420,7 @@ async def get_booking_detail(
     db: AsyncSession = Depends(get_db)
 ):
     """Get detailed booking information"""
+    await _require_own_booking(db, booking_id, current_user)
     cache_key = f"booking:{booking_id}"
     cached_booking = await redis_client.get(cache_key)
 
@@ -268,6 +456,80 @@ async def get_booking_detail(
     await redis_client.set(cache_key, booking, expire=300)
     return booking
 
+@router.get("/bookings/{booking_id}/trail")
+async def get_booking_trail(
+    booking_id: str,
+    max_points: int = Query(500, ge=2, le=2000),
+    current_user: dict = Depends(require_role(["customer"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Therapist route recorded for a booking"""
+    await _require_own_booking(db, booking_id, current_user)
+    trail = []
+    booking_uuid = await accounts.booking_id(db, booking_id)
+    if booking_uuid:
+        trail = await location_history.get_trail(db, booking_id=booking_uuid, max_points=max_points)
+
+    return {"booking_id": booking_id, "trail": trail}
+
+@router.get("/bookings/{booking_id}/events")
+async def stream_booking_events(
+    booking_id: str,
+    token: str = Query(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-sent events for a booking in progress
+    - Authenticated by a `token` query parameter: EventSource cannot set headers
+    - Starts with the latest known status/position
+    - Then pushes therapist position and status changes as they happen
+    """
+    current_user = get_websocket_user(token, ["customer"])
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    await _require_own_booking(db, booking_id, current_user)
+
+    async def event_stream():
+        async with booking_feed.listen(booking_id) as queue:
+            for event in (await booking_feed.snapshot(booking_id)).values():
+                yield f"data: {json.dumps(event)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {event}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/bookings/{booking_id}/live")
+async def booking_live(websocket: WebSocket, booking_id: str, token: str = Query(...)):
+    """WebSocket variant of the booking event stream"""
+    user = get_websocket_user(token, ["customer"])
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    async with AsyncSessionLocal() as db:
+        owned = await _owns_booking(db, booking_id, user["user_id"])
+    if not owned:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        async with booking_feed.listen(booking_id) as queue:
+            for event in (await booking_feed.snapshot(booking_id)).values():
+                await websocket.send_json(event)
+            while True:
+                await websocket.send_text(await queue.get())
+    except WebSocketDisconnect:
+        pass
+
 @router.put("/bookings/{booking_id}")
 async def update_booking(
     booking_id: str,
@@ -276,8 +538,18 @@ async def update_booking(
     db: AsyncSession = Depends(get_db)
 ):
     """Update booking details (reschedule, cancel, etc.)"""
-    cache_key = f"booking:{booking_id}"
-    await redis_client.delete(cache_key)
+    await _require_own_booking(db, booking_id, current_user)
+    rescheduled = booking_update.booking_date or booking_update.booking_time
+    new_status = booking_update.status or ("rescheduled" if rescheduled else None)
+    if new_status:
+        await booking_events.emit(
+            booking_id, new_status,
+            actor_id=current_user["user_id"], actor_role="customer",
+            customer_id=current_user["user_id"],
+            **booking_update.model_dump(mode="json", exclude_unset=True, exclude={"status"})
+        )
+    else:
+        await redis_client.delete(f"booking:{booking_id}")
 
     return {
         "message": "Booking updated successfully",
@@ -292,8 +564,18 @@ async def cancel_booking(
     db: AsyncSession = Depends(get_db)
 ):
     """Cancel booking"""
-    cache_key = f"booking:{booking_id}"
-    await redis_client.delete(cache_key)
+    await _require_own_booking(db, booking_id, current_user)
+    previous, record = await reservations.release(booking_id)
+    if previous == "confirmed":
+        await availability.release(booking_id, **reservations.span_of(record))
+    await coupon_redemptions.release(booking_id)
+
+    await booking_events.emit(
+        booking_id, "cancelled",
+        previous_status={"held": "pending", "confirmed": "confirmed"}.get(previous),
+        actor_id=current_user["user_id"], actor_role="customer",
+        customer_id=current_user["user_id"], vendor_id=record["vendor_id"] if record else None
+    )
 
     return {"message": "Booking cancelled successfully"}
 
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, status, Query
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import invalidate
 from app.core.database import get_db
 from app.core.security import get_current_user, require_role
 from app.core.redis_client import redis_client
+from app.core.etag import cached_response, cache_response
+from app.core.ids import new_id
+from app.core.pagination import PageParams, page_params, paginate
+from app.models import Attendance, Leave, Vendor
+from app.services import accounts
+from app.services.vendor_index import vendor_index
 from typing import List, Optional
 from datetime import datetime, date
 
 router = APIRouter()
 
+# requested status -> vendors columns it sets
+VENDOR_STATUS_CHANGES = {
+    "active": {"status": "active"},
+    "approved": {"status": "active", "verification_status": "verified"},
+    "inactive": {"status": "inactive"},
+    "suspended": {"status": "suspended"},
+    "terminated": {"status": "terminated"},
+    "rejected": {"status": "inactive", "verification_status": "rejected"},
+}
+
 @router.get("/profile")
 async def get_profile(
+    request: Request,
     current_user: dict = Depends(require_role(["employee"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get employee profile"""
     cache_key = f"profile:employee:{current_user['user_id']}"
-    cached_profile = await redis_client.get(cache_key)
+    cached_profile = await cached_response(request, cache_key)
 
     if cached_profile:
         return cached_profile
@@ -32,8 +51,7 @@ async def get_profile(
         "status": "active"
     }
 
-    await redis_client.set(cache_key, profile, expire=300)
-    return profile
+    return await cache_response(request, cache_key, profile, expire=300)
 
 @router.get("/vendors")
 async def get_vendors(
@@ -106,6 +124,25 @@ async def update_vendor_status(
     db: AsyncSession = Depends(get_db)
 ):
     """Approve/reject vendor application"""
+    changes = VENDOR_STATUS_CHANGES.get(status_data.get("status"))
+    vendor_uuid = accounts.parse_uuid(vendor_id)
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"status must be one of {', '.join(VENDOR_STATUS_CHANGES)}"
+        )
+    if vendor_uuid is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vendor not found")
+
+    result = await db.execute(update(Vendor).where(Vendor.id == vendor_uuid).values(**changes))
+    if not result.rowcount:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vendor not found")
+    # approvals (and re-approvals after a suspension) list the vendor again
+    await vendor_index.refresh(db, vendor_uuid)
+    # committed first, so a listing recomputed after the invalidation sees the new status
+    await db.commit()
+    await invalidate("vendors", f"vendor:{vendor_uuid}")
+
     return {
         "message": "Vendor status updated",
         "vendor_id": vendor_id,
@@ -116,28 +153,26 @@ async def update_vendor_status(
 async def get_my_attendance(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    page: PageParams = Depends(page_params(default=31, maximum=366)),
     current_user: dict = Depends(require_role(["employee"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get employee's own attendance records"""
-    attendance = [
-        {
-            "date": "2025-01-15",
-            "check_in": "09:00",
-            "check_out": "18:00",
-            "status": "present",
-            "working_hours": 9
-        },
-        {
-            "date": "2025-01-14",
-            "check_in": "09:15",
-            "check_out": "18:00",
-            "status": "present",
-            "working_hours": 8.75
-        }
-    ]
+    """Get employee's own attendance records, latest first"""
+    employee_id = await accounts.employee_id(db, current_user["user_id"])
+    if employee_id is None:
+        return {"attendance": [], "next_cursor": None, "limit": page.limit}
+
+    query = select(
+        Attendance.id, Attendance.date, Attendance.check_in, Attendance.check_out,
+        Attendance.status, Attendance.working_hours
+    ).where(Attendance.employee_id == employee_id)
+    if start_date:
+        query = query.where(Attendance.date >= start_date)
+    if end_date:
+        query = query.where(Attendance.date <= end_date)
 
-    return {"attendance": attendance}
+    result = await paginate(db, query, [(Attendance.date, True), (Attendance.id, True)], page)
+    return {"attendance": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
 
 @router.post("/attendance/checkin")
 async def checkin(
@@ -173,25 +208,28 @@ async def checkout(
 
 @router.get("/leaves")
 async def get_my_leaves(
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["employee"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get employee's leave requests"""
-    leaves = [
-        {
-            "id": "leave_1",
-            "leave_type": "Casual Leave",
-            "start_date": "2025-02-01",
-            "end_date": "2025-02-02",
-            "total_days": 2,
-            "reason": "Personal work",
-            "status": "approved",
-            "applied_date": "2025-01-20"
+    """Get employee's leave requests, most recent first"""
+    employee_id = await accounts.employee_id(db, current_user["user_id"])
+    if employee_id is None:
+        return {
+            "leaves": [], "next_cursor": None, "limit": page.limit,
+            "balance": {"casual": 8, "sick": 12, "earned": 15}
         }
-    ]
 
+    query = select(
+        Leave.id, Leave.leave_type, Leave.start_date, Leave.end_date,
+        Leave.total_days, Leave.reason, Leave.status, Leave.created_at
+    ).where(Leave.employee_id == employee_id)
+
+    result = await paginate(db, query, [(Leave.created_at, True), (Leave.id, True)], page)
     return {
-        "leaves": leaves,
+        "leaves": result["items"],
+        "next_cursor": result["next_cursor"],
+        "limit": result["limit"],
         "balance": {"casual": 8, "sick": 12, "earned": 15}
     }
 
@@ -202,7 +240,7 @@ async def apply_leave(
     db: AsyncSession = Depends(get_db)
 ):
     """Apply for leave"""
-    leave_id = f"leave_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    leave_id = new_id("leave")
 
     return {
         "message": "Leave request submitted",
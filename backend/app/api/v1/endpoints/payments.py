@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Request, Header, HTTPException, status
+from app.services.checkout import checkout, HoldExpired
+from typing import Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/webhook")
+async def payment_webhook(request: Request, x_razorpay_signature: Optional[str] = Header(None)):
+    """
+    Payment gateway callback
+    - Verified by the HMAC signature of the raw body
+    - A captured payment carrying a booking_id note pays for and confirms that booking
+    - Always answers 2xx once verified, so the gateway stops retrying
+    """
+    body = await request.body()
+    if not checkout.verify_signature(body, x_razorpay_signature):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+
+    try:
+        event = json.loads(body)
+        payment = event["payload"]["payment"]["entity"]
+    except (ValueError, KeyError, TypeError):
+        return {"status": "ignored"}
+    booking_id = (payment.get("notes") or {}).get("booking_id")
+    if event.get("event") != "payment.captured" or not booking_id:
+        return {"status": "ignored"}
+
+    if not await checkout.record_payment(booking_id, payment["id"], payment["amount"]):
+        return {"status": "rejected"}
+    try:
+        await checkout.confirm(booking_id, None, "system")
+    except HoldExpired:
+        logger.warning("Payment %s arrived after the hold on %s expired; refund it", payment["id"], booking_id)
+        return {"status": "hold_expired"}
+
+    return {"status": "confirmed"}
@@ -1,21 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy import select, delete, func, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user, require_role, get_websocket_user
 from app.core.redis_client import redis_client
+from app.core.etag import cached_response, cache_response
+from app.core.ids import new_id
+from app.core.pagination import PageParams, page_params, paginate
+from app.models import Therapist, TherapistAssignment, TherapistLeave, TherapistSchedule
+from app.services import accounts
+from app.services.availability import availability
+from app.services.fleet import fleet
+from app.services.booking_events import booking_events
+from app.services.location_ingest import ingest_fixes
+from app.schemas.location import LocationFix, LocationBatch
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, time
 
 router = APIRouter()
 
+# Index is the schema's day_of_week: 0 = Sunday
+WEEKDAYS = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+# Statuses a therapist may move their own assignment to (therapist_assignments CHECK)
+ASSIGNMENT_STATUSES = {"acknowledged", "in_transit", "reached", "in_progress", "completed", "cancelled"}
+
 @router.get("/profile")
 async def get_profile(
+    request: Request,
     current_user: dict = Depends(require_role(["therapist"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get therapist profile"""
     cache_key = f"profile:therapist:{current_user['user_id']}"
-    cached_profile = await redis_client.get(cache_key)
+    cached_profile = await cached_response(request, cache_key)
 
     if cached_profile:
         return cached_profile
@@ -36,8 +54,7 @@ async def get_profile(
         "availability_status": "available"
     }
 
-    await redis_client.set(cache_key, profile, expire=300)
-    return profile
+    return await cache_response(request, cache_key, profile, expire=300)
 
 @router.put("/profile")
 async def update_profile(
@@ -55,57 +72,37 @@ async def update_profile(
 async def get_assignments(
     status: Optional[str] = Query(None),
     date: Optional[date] = Query(None),
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["therapist"])),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get therapist assignments
+    Get therapist assignments, latest first
     - Filter by status (assigned, in_progress, completed, cancelled)
     - Filter by date
     """
-    assignments = [
-        {
-            "id": "assignment_1",
-            "booking_id": "booking_1",
-            "customer_name": "John Doe",
-            "customer_phone": "+919876543210",
-            "service_name": "Swedish Massage",
-            "duration": 60,
-            "assignment_date": "2025-01-15",
-            "assignment_time": "14:00",
-            "location": {
-                "address": "123 Main St, Bangalore",
-                "latitude": 12.9716,
-                "longitude": 77.5946
-            },
-            "status": "assigned",
-            "payment_amount": 2000
-        },
-        {
-            "id": "assignment_2",
-            "booking_id": "booking_2",
-            "customer_name": "Jane Smith",
-            "customer_phone": "+919876543211",
-            "service_name": "Deep Tissue Massage",
-            "duration": 90,
-            "assignment_date": "2025-01-16",
-            "assignment_time": "16:00",
-            "location": {
-                "address": "456 Park Ave, Bangalore",
-                "latitude": 12.9716,
-                "longitude": 77.5946
-            },
-            "status": "in_progress",
-            "payment_amount": 3000
-        }
-    ]
-
+    therapist_id = await accounts.therapist_id(db, current_user["user_id"])
+    if therapist_id is None:
+        return {"assignments": [], "next_cursor": None, "limit": page.limit}
+
+    query = select(
+        TherapistAssignment.id, TherapistAssignment.booking_id, TherapistAssignment.service_id,
+        TherapistAssignment.estimated_duration.label("duration"),
+        TherapistAssignment.assignment_date, TherapistAssignment.assignment_time,
+        TherapistAssignment.location_address, TherapistAssignment.location_latitude,
+        TherapistAssignment.location_longitude, TherapistAssignment.status
+    ).where(TherapistAssignment.therapist_id == therapist_id)
     if status:
-        assignments = [a for a in assignments if a["status"] == status]
+        query = query.where(TherapistAssignment.status == status)
     if date:
-        assignments = [a for a in assignments if a["assignment_date"] == str(date)]
+        query = query.where(TherapistAssignment.assignment_date == date)
 
-    return {"assignments": assignments, "total": len(assignments)}
+    result = await paginate(db, query, [
+        (TherapistAssignment.assignment_date, True),
+        (TherapistAssignment.assignment_time, True),
+        (TherapistAssignment.id, True)
+    ], page)
+    return {"assignments": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
 
 @router.get("/assignments/{assignment_id}")
 async def get_assignment_detail(
@@ -155,6 +152,41 @@ async def update_assignment_status(
     - Complete assignment (in_progress -> completed)
     - Cancel assignment
     """
+    if status_data.get("status") and status_data["status"] not in ASSIGNMENT_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"status must be one of {', '.join(sorted(ASSIGNMENT_STATUSES))}"
+        )
+    if status_data.get("booking_id") and status_data.get("status"):
+        therapist_id = await accounts.therapist_id(db, current_user["user_id"])
+        booking_id = await accounts.booking_id(db, status_data["booking_id"])
+        assignment_uuid = accounts.parse_uuid(assignment_id)
+        assignment = None
+        if therapist_id and booking_id and assignment_uuid:
+            assignment = (await db.execute(
+                select(TherapistAssignment.id, TherapistAssignment.status).where(
+                    TherapistAssignment.id == assignment_uuid,
+                    TherapistAssignment.booking_id == booking_id,
+                    TherapistAssignment.therapist_id == therapist_id
+                )
+            )).first()
+        if assignment is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
+
+        await db.execute(
+            update(TherapistAssignment).where(TherapistAssignment.id == assignment.id)
+            .values(status=status_data["status"], updated_at=func.now())
+        )
+        await db.commit()
+        await booking_events.emit(
+            status_data["booking_id"],
+            status_data["status"],
+            previous_status=assignment.status,
+            actor_id=current_user["user_id"],
+            actor_role="therapist",
+            therapist_id=str(therapist_id)
+        )
+
     return {
         "message": "Assignment status updated",
         "assignment_id": assignment_id,
@@ -187,43 +219,78 @@ async def update_schedule(
     current_user: dict = Depends(require_role(["therapist"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Update therapist schedule"""
+    """
+    Update therapist schedule
+    - Keyed by weekday, in the shape `GET /schedule` returns
+    - Days left out keep their hours
+    """
+    rows = []
+    for day, hours in schedule_data.items():
+        if day not in WEEKDAYS or not isinstance(hours, dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Schedule days must be one of {', '.join(WEEKDAYS)}"
+            )
+        if not hours.get("is_available", True):
+            continue
+        try:
+            rows.append({
+                "day_of_week": WEEKDAYS.index(day),
+                "start_time": time.fromisoformat(hours["start_time"]),
+                "end_time": time.fromisoformat(hours["end_time"]),
+                "break_start": time.fromisoformat(hours["break_start"]) if hours.get("break_start") else None,
+                "break_end": time.fromisoformat(hours["break_end"]) if hours.get("break_end") else None,
+            })
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{day} needs start_time and end_time as ISO times"
+            )
+
+    therapist_id = await accounts.therapist_id(db, current_user["user_id"])
+    if therapist_id:
+        await db.execute(delete(TherapistSchedule).where(
+            TherapistSchedule.therapist_id == therapist_id,
+            TherapistSchedule.day_of_week.in_([WEEKDAYS.index(day) for day in schedule_data])
+        ))
+        if rows:
+            await db.execute(insert(TherapistSchedule), [{"therapist_id": therapist_id, **row} for row in rows])
+        vendor_id = (await db.execute(select(Therapist.vendor_id).where(Therapist.id == therapist_id))).scalar()
+        await db.commit()
+        # every cached future day may fall on a changed weekday
+        await availability.invalidate_range(str(vendor_id), date.today(), date.max)
+
     return {"message": "Schedule updated successfully", "schedule": schedule_data}
 
 @router.get("/leaves")
 async def get_leaves(
     status: Optional[str] = Query(None),
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["therapist"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get leave requests"""
-    leaves = [
-        {
-            "id": "leave_1",
-            "leave_type": "Sick Leave",
-            "start_date": "2025-01-20",
-            "end_date": "2025-01-22",
-            "total_days": 3,
-            "reason": "Flu and fever",
-            "status": "approved",
-            "applied_date": "2025-01-15"
-        },
-        {
-            "id": "leave_2",
-            "leave_type": "Casual Leave",
-            "start_date": "2025-02-05",
-            "end_date": "2025-02-06",
-            "total_days": 2,
-            "reason": "Personal work",
-            "status": "pending",
-            "applied_date": "2025-01-25"
+    """Get leave requests, most recent first"""
+    therapist_id = await accounts.therapist_id(db, current_user["user_id"])
+    if therapist_id is None:
+        return {
+            "leaves": [], "next_cursor": None, "limit": page.limit,
+            "balance": {"casual": 8, "sick": 12, "earned": 15}
         }
-    ]
 
+    query = select(
+        TherapistLeave.id, TherapistLeave.leave_type, TherapistLeave.start_date, TherapistLeave.end_date,
+        TherapistLeave.total_days, TherapistLeave.reason, TherapistLeave.status, TherapistLeave.created_at
+    ).where(TherapistLeave.therapist_id == therapist_id)
     if status:
-        leaves = [l for l in leaves if l["status"] == status]
+        query = query.where(TherapistLeave.status == status)
 
-    return {"leaves": leaves, "balance": {"casual": 8, "sick": 12, "earned": 15}}
+    result = await paginate(db, query, [(TherapistLeave.created_at, True), (TherapistLeave.id, True)], page)
+    return {
+        "leaves": result["items"],
+        "next_cursor": result["next_cursor"],
+        "limit": result["limit"],
+        "balance": {"casual": 8, "sick": 12, "earned": 15}
+    }
 
 @router.post("/leaves")
 async def apply_leave(
@@ -232,7 +299,7 @@ async def apply_leave(
     db: AsyncSession = Depends(get_db)
 ):
     """Apply for leave"""
-    leave_id = f"leave_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    leave_id = new_id("leave")
 
     return {
         "message": "Leave request submitted successfully",
@@ -317,26 +384,68 @@ async def get_performance(
 
 @router.post("/location")
 async def update_location(
-    location_data: dict,
-    current_user: dict = Depends(require_role(["therapist"])),
-    db: AsyncSession = Depends(get_db)
+    fix: LocationFix,
+    current_user: dict = Depends(require_role(["therapist"]))
 ):
     """Update therapist current location"""
-    await redis_client.set(
-        f"location:therapist:{current_user['user_id']}",
-        location_data,
-        expire=300
-    )
+    await ingest_fixes(current_user["user_id"], [fix])
 
     return {"message": "Location updated successfully"}
 
+@router.post("/location/batch")
+async def update_location_batch(
+    batch: LocationBatch,
+    current_user: dict = Depends(require_role(["therapist"]))
+):
+    """
+    Upload buffered GPS fixes in one request
+    - Live position moves to the newest fix
+    - Every fix is appended to location history in bulk
+    """
+    accepted = await ingest_fixes(current_user["user_id"], batch.fixes)
+
+    return {"message": "Locations recorded", "accepted": accepted}
+
+@router.websocket("/location/stream")
+async def stream_location(websocket: WebSocket, token: str = Query(...)):
+    """
+    Persistent location stream, authenticated once per connection
+    - Each message is a fix or {"fixes": [...]}
+    - Replies {"accepted": n} per message
+    """
+    user = get_websocket_user(token, ["therapist"])
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    therapist_id = user["user_id"]
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+                if isinstance(message, dict) and "fixes" in message:
+                    fixes = LocationBatch(**message).fixes
+                else:
+                    fixes = [LocationFix(**message)]
+            except KeyError:
+                await websocket.send_json({"error": "Expected a JSON text message"})
+                continue
+            except (ValueError, TypeError, ValidationError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            accepted = await ingest_fixes(therapist_id, fixes)
+            await websocket.send_json({"accepted": accepted})
+    except WebSocketDisconnect:
+        pass
+
 @router.get("/location")
 async def get_location(
     current_user: dict = Depends(require_role(["therapist"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get therapist current location"""
-    location = await redis_client.get(f"location:therapist:{current_user['user_id']}")
+    location = await fleet.get_position(current_user["user_id"])
 
     if not location:
         return {"message": "No location data available"}
@@ -350,6 +459,15 @@ async def update_availability(
     db: AsyncSession = Depends(get_db)
 ):
     """Update availability status (available, busy, offline)"""
+    try:
+        await fleet.update_status(
+            current_user["user_id"],
+            availability_data.get("status"),
+            skills=availability_data.get("skills")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     cache_key = f"profile:therapist:{current_user['user_id']}"
     await redis_client.delete(cache_key)
 
@@ -1,21 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update, literal
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import get_current_user, require_role
 from app.core.redis_client import redis_client
+from app.core.etag import cached_response, cache_response
+from app.core.cache import cached, invalidate, TTL_DEFAULT, TTL_LONG
+from app.core.ids import new_id
+from app.core.pagination import PageParams, page_params, paginate
+from app.models import Booking, Therapist, TherapistLeave, Vendor
+from app.services import accounts
+from app.services.vendor_index import vendor_index
+from app.services.booking_events import booking_events
+from app.services.availability import availability
+from app.services.assignment import assign, load_problem, persist
+from app.services.pricing import pricing_engine
+from app.schemas.booking import AutoAssignRequest
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, time, timezone
+from uuid import UUID
 
 router = APIRouter()
 
+
+async def current_vendor_id(
+    current_user: dict = Depends(require_role(["vendor"])),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[UUID]:
+    """`vendors.id` of the calling vendor, which vendor cache entries are tagged with"""
+    return await accounts.vendor_id(db, current_user["user_id"])
+
+
 @router.get("/profile")
 async def get_profile(
+    request: Request,
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get vendor/spa profile"""
     cache_key = f"profile:vendor:{current_user['user_id']}"
-    cached_profile = await redis_client.get(cache_key)
+    cached_profile = await cached_response(request, cache_key)
 
     if cached_profile:
         return cached_profile
@@ -34,8 +60,7 @@ async def get_profile(
         "registration_date": "2023-05-15"
     }
 
-    await redis_client.set(cache_key, profile, expire=300)
-    return profile
+    return await cache_response(request, cache_key, profile, expire=300)
 
 @router.put("/profile")
 async def update_profile(
@@ -44,8 +69,20 @@ async def update_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Update vendor profile"""
-    cache_key = f"profile:vendor:{current_user['user_id']}"
-    await redis_client.delete(cache_key)
+    vendor_id = await accounts.vendor_id(db, current_user["user_id"])
+    if vendor_id:
+        latitude, longitude = profile_data.get("latitude"), profile_data.get("longitude")
+        if latitude is not None and longitude is not None:
+            location = literal({"latitude": float(latitude), "longitude": float(longitude)}, JSONB)
+            await db.execute(
+                update(Vendor).where(Vendor.id == vendor_id)
+                .values(business_address=Vendor.business_address.op("||")(location))
+            )
+            await vendor_index.refresh(db, vendor_id)
+        # committed first, so a listing recomputed after the invalidation sees the new location
+        await db.commit()
+        await invalidate(f"vendor:{vendor_id}", "vendors")
+    await redis_client.delete(f"profile:vendor:{current_user['user_id']}")
 
     return {"message": "Profile updated successfully", "data": profile_data}
 
@@ -97,7 +134,7 @@ async def add_therapist(
     db: AsyncSession = Depends(get_db)
 ):
     """Add new therapist to vendor"""
-    therapist_id = f"therapist_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    therapist_id = new_id("therapist")
 
     return {
         "message": "Therapist added successfully",
@@ -127,8 +164,52 @@ async def delete_therapist(
     """Deactivate/remove therapist"""
     return {"message": "Therapist removed successfully"}
 
+@router.put("/therapists/{therapist_id}/leaves/{leave_id}")
+async def decide_leave(
+    therapist_id: str,
+    leave_id: str,
+    decision: dict,
+    current_user: dict = Depends(require_role(["vendor"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Approve or reject a therapist's leave request"""
+    new_status = decision.get("status")
+    if new_status not in ("approved", "rejected"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="status must be approved or rejected")
+
+    vendor_id = await accounts.vendor_id(db, current_user["user_id"])
+    therapist_uuid, leave_uuid = accounts.parse_uuid(therapist_id), accounts.parse_uuid(leave_id)
+    leave = None
+    if vendor_id and therapist_uuid and leave_uuid:
+        leave = (await db.execute(
+            select(TherapistLeave)
+            .join(Therapist, Therapist.id == TherapistLeave.therapist_id)
+            .where(
+                TherapistLeave.id == leave_uuid,
+                TherapistLeave.therapist_id == therapist_uuid,
+                Therapist.vendor_id == vendor_id
+            )
+        )).scalar_one_or_none()
+    if leave is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Leave request not found")
+
+    previous = leave.status
+    leave.status = new_status
+    leave.approved_by = await accounts.user_id(db, current_user["user_id"])
+    leave.approved_at = datetime.now(timezone.utc)
+    leave.rejection_reason = decision.get("reason") if new_status == "rejected" else None
+    await db.commit()
+    # approved leave is cut out of the therapist's free slots; drop the
+    # cached days it covers (or covered) only once the change is visible
+    if "approved" in (previous, new_status):
+        await availability.invalidate_range(str(vendor_id), leave.start_date, leave.end_date)
+
+    return {"message": f"Leave {new_status}", "leave_id": leave_id, "status": new_status}
+
 @router.get("/services")
+@cached("vendor:services", expire=TTL_LONG, tags=["vendor:{vendor_id}"], per_user=True, key_params=["vendor_id"])
 async def get_services(
+    vendor_id: Optional[UUID] = Depends(current_vendor_id),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
@@ -168,11 +249,14 @@ async def get_services(
 @router.post("/services")
 async def add_service(
     service_data: dict,
+    vendor_id: Optional[UUID] = Depends(current_vendor_id),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Add new service to catalog"""
-    service_id = f"service_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    service_id = new_id("service")
+    await pricing_engine.invalidate()
+    await invalidate(f"vendor:{vendor_id}", "vendors")
 
     return {
         "message": "Service added successfully",
@@ -183,62 +267,54 @@ async def add_service(
 async def update_service(
     service_id: str,
     service_data: dict,
+    vendor_id: Optional[UUID] = Depends(current_vendor_id),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Update service details"""
+    await pricing_engine.invalidate()
+    await invalidate(f"vendor:{vendor_id}", "vendors")
     return {"message": "Service updated successfully"}
 
 @router.delete("/services/{service_id}")
 async def delete_service(
     service_id: str,
+    vendor_id: Optional[UUID] = Depends(current_vendor_id),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Remove service from catalog"""
+    await pricing_engine.invalidate()
+    await invalidate(f"vendor:{vendor_id}", "vendors")
     return {"message": "Service removed successfully"}
 
 @router.get("/bookings")
 async def get_bookings(
     status: Optional[str] = Query(None),
     date: Optional[date] = Query(None),
+    page: PageParams = Depends(page_params()),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get bookings for this vendor"""
-    bookings = [
-        {
-            "id": "booking_1",
-            "customer_name": "John Doe",
-            "customer_phone": "+919876543210",
-            "booking_date": "2025-01-15",
-            "booking_time": "14:00",
-            "services": ["Swedish Massage"],
-            "therapist": "Priya Sharma",
-            "total_amount": 2000,
-            "status": "confirmed",
-            "payment_status": "paid"
-        },
-        {
-            "id": "booking_2",
-            "customer_name": "Jane Smith",
-            "customer_phone": "+919876543211",
-            "booking_date": "2025-01-16",
-            "booking_time": "16:00",
-            "services": ["Deep Tissue Massage"],
-            "therapist": "Anjali Kumar",
-            "total_amount": 3000,
-            "status": "pending",
-            "payment_status": "pending"
-        }
-    ]
-
+    """Get bookings for this vendor, latest appointment first"""
+    vendor_id = await accounts.vendor_id(db, current_user["user_id"])
+    if vendor_id is None:
+        return {"bookings": [], "next_cursor": None, "limit": page.limit}
+
+    query = select(
+        Booking.id, Booking.booking_number, Booking.customer_id, Booking.booking_date,
+        Booking.booking_time, Booking.final_amount.label("total_amount"),
+        Booking.status, Booking.payment_status
+    ).where(Booking.vendor_id == vendor_id)
     if status:
-        bookings = [b for b in bookings if b["status"] == status]
+        query = query.where(Booking.status == status)
     if date:
-        bookings = [b for b in bookings if b["booking_date"] == str(date)]
+        query = query.where(Booking.booking_date == date)
 
-    return {"bookings": bookings, "total": len(bookings)}
+    result = await paginate(
+        db, query, [(Booking.booking_date, True), (Booking.booking_time, True), (Booking.id, True)], page
+    )
+    return {"bookings": result["items"], "next_cursor": result["next_cursor"], "limit": result["limit"]}
 
 @router.get("/bookings/{booking_id}")
 async def get_booking_detail(
@@ -282,12 +358,74 @@ async def assign_therapist(
     db: AsyncSession = Depends(get_db)
 ):
     """Assign therapist to booking"""
+    therapist_id = assignment_data.get("therapist_id")
+    if not therapist_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="therapist_id is required")
+
+    if assignment_data.get("booking_date") and assignment_data.get("booking_time"):
+        try:
+            day = date.fromisoformat(assignment_data["booking_date"])
+            start = time.fromisoformat(assignment_data["booking_time"])
+            duration = int(assignment_data.get("duration", 60))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="booking_date, booking_time and duration must be an ISO date, an ISO time and minutes"
+            )
+        vendor_id = await accounts.vendor_id(db, current_user["user_id"])
+        if vendor_id:
+            await availability.occupy(booking_id, str(vendor_id), day, therapist_id, start, duration)
+
+    await booking_events.emit(
+        booking_id, "assigned",
+        actor_id=current_user["user_id"], actor_role="vendor", vendor_id=current_user["user_id"],
+        therapist_id=therapist_id
+    )
+
     return {
         "message": "Therapist assigned successfully",
         "booking_id": booking_id,
-        "therapist_id": assignment_data.get("therapist_id")
+        "therapist_id": therapist_id
     }
 
+@router.post("/bookings/auto-assign")
+async def auto_assign_therapists(
+    request: AutoAssignRequest,
+    current_user: dict = Depends(require_role(["vendor"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Match the day's unassigned bookings to available therapists in one batch
+    - Bookings, therapists and positions are read server-side, scoped to this vendor
+    - Requested bookings that are not this vendor's, or already have a therapist, come back unassigned
+    """
+    vendor_id = await accounts.vendor_id(db, current_user["user_id"])
+    if not vendor_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vendor not found")
+
+    bookings, therapists, feasible = await load_problem(db, vendor_id, request.booking_date, request.booking_ids)
+    plan = await run_in_threadpool(
+        assign, bookings, therapists,
+        weights=request.weights,
+        max_distance_km=request.max_distance_km,
+        require_skill=request.require_skill,
+        feasible=feasible
+    )
+    if request.booking_ids:
+        matched = {booking["booking_id"] for booking in bookings}
+        plan["unassigned"] += [booking_id for booking_id in request.booking_ids if booking_id not in matched]
+
+    if request.apply:
+        await persist(db, vendor_id, request.booking_date, bookings, plan["assignments"])
+        for match in plan["assignments"]:
+            await booking_events.emit(
+                match["booking_id"], "assigned",
+                actor_id=current_user["user_id"], actor_role="vendor", vendor_id=current_user["user_id"],
+                therapist_id=match["therapist_id"]
+            )
+
+    return plan
+
 @router.get("/dashboard")
 async def get_dashboard(
     current_user: dict = Depends(require_role(["vendor"])),
@@ -378,7 +516,9 @@ async def get_attendance(
     return {"attendance": attendance, "date": date or datetime.now().date()}
 
 @router.get("/reviews")
+@cached("vendor:reviews", expire=TTL_DEFAULT, tags=["vendor:{vendor_id}"], per_user=True, key_params=["vendor_id"])
 async def get_reviews(
+    vendor_id: Optional[UUID] = Depends(current_vendor_id),
     current_user: dict = Depends(require_role(["vendor"])),
     db: AsyncSession = Depends(get_db)
 ):
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, customer, therapist, vendor, employee, admin
+from app.api.v1.endpoints import auth, customer, therapist, vendor, employee, admin, payments
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(therapist.router, prefix="/therapist", tags=["Therapis
 api_router.include_router(vendor.router, prefix="/vendor", tags=["Vendor"])
 api_router.include_router(employee.router, prefix="/employee", tags=["Employee"])
 api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+api_router.include_router(payments.router, prefix="/payments", tags=["Payments"])
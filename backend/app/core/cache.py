@@ -0,0 +1,97 @@
+import functools
+import hashlib
+import inspect
+from typing import Any, Callable, Dict, Optional, Sequence
+from fastapi import Request, WebSocket
+from fastapi.params import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+
+# TTL tiers. Entries that are invalidated by tag on every write can use
+# the longer ones; untagged entries should stay short.
+TTL_SHORT = 60
+TTL_DEFAULT = 300
+TTL_LONG = 3600
+
+MAX_KEY_LENGTH = 200
+
+
+def cache_key(prefix: str, values: Dict[str, Any]) -> str:
+    key = prefix + "".join(f":{name}={'' if value is None else value}" for name, value in sorted(values.items()))
+    if len(key) > MAX_KEY_LENGTH:
+        key = f"{prefix}:#" + hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return key
+
+
+def _key_params(handler: Callable) -> list:
+    """Parameters that come from the request itself, not from dependencies"""
+    return [
+        name for name, param in inspect.signature(handler).parameters.items()
+        if not isinstance(param.default, Depends) and param.annotation not in (Request, WebSocket)
+    ]
+
+
+def _session_params(handler: Callable) -> list:
+    return [
+        name for name, param in inspect.signature(handler).parameters.items()
+        if param.annotation is AsyncSession
+    ]
+
+
+def cached(
+    prefix: str,
+    expire: int = TTL_DEFAULT,
+    tags: Sequence[str] = (),
+    per_user: bool = False,
+    key_params: Optional[Sequence[str]] = None
+):
+    """
+    Cache a FastAPI handler's JSON result in Redis.
+
+    The key is `prefix` plus the handler's path and query parameters
+    (dependencies such as `db` are left out); `per_user` adds
+    `current_user["user_id"]`. `tags` are formatted with the same values,
+    e.g. "vendor:{vendor_id}", and `invalidate` drops every entry carrying
+    a tag. A value resolved by a dependency (the caller's vendor id, say)
+    can be keyed and tagged on by naming it in `key_params`. Misses go through
+    `redis_client.get_or_compute`, so they are stampede-safe. Computes
+    can also run as an early refresh after the request has finished, so
+    the handler gets its own database session rather than the request's.
+
+        @router.get("/vendors/{vendor_id}/reviews")
+        @cached("vendor:reviews", expire=TTL_LONG, tags=["vendor:{vendor_id}"])
+        async def get_reviews(vendor_id: str, db: AsyncSession = Depends(get_db)):
+            ...
+    """
+    def decorator(handler: Callable) -> Callable:
+        names = list(key_params) if key_params is not None else _key_params(handler)
+        sessions = _session_params(handler)
+
+        @functools.wraps(handler)
+        async def wrapper(**kwargs):
+            values = {name: kwargs.get(name) for name in names}
+            if per_user:
+                values["user_id"] = kwargs["current_user"]["user_id"]
+
+            async def compute():
+                if not sessions:
+                    return await handler(**kwargs)
+                async with AsyncSessionLocal() as session:
+                    return await handler(**{**kwargs, **{name: session for name in sessions}})
+
+            return await redis_client.get_or_compute(
+                cache_key(prefix, values),
+                compute,
+                expire=expire,
+                tags=[tag.format(**values) for tag in tags]
+            )
+
+        return wrapper
+
+    return decorator
+
+
+async def invalidate(*tags: str) -> int:
+    """Drop every cached entry carrying any of `tags`"""
+    return await redis_client.invalidate_tags(*tags)
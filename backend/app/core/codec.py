@@ -0,0 +1,161 @@
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Frame header: 0b100SSSCC, serializer id S and compressor id C. A UTF-8
+# string can never start with a byte in 0x80-0xBF, so framed values are
+# told apart from the plain JSON text stored before codecs existed.
+FRAME = 0x80
+FRAME_MASK = 0xE0
+
+# Payloads smaller than this are stored uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+
+class CodecError(Exception):
+    """A cached value this worker cannot decode, e.g. written with a codec it lacks the library for"""
+    pass
+
+
+def _json() -> Tuple[Callable, Callable]:
+    return lambda value: json.dumps(value, separators=(",", ":")).encode(), json.loads
+
+
+def _orjson() -> Tuple[Callable, Callable]:
+    import orjson
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return lambda value: orjson.dumps(value, option=option), orjson.loads
+
+
+def _msgpack() -> Tuple[Callable, Callable]:
+    import msgpack
+    return (
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda payload: msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    )
+
+
+def _zstd() -> Tuple[Callable, Callable]:
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+
+
+def _lz4() -> Tuple[Callable, Callable]:
+    import lz4.frame
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+# name -> (id, factory). Ids are written into every frame: never reuse one.
+SERIALIZERS: Dict[str, Tuple[int, Callable[[], Tuple[Callable, Callable]]]] = {
+    "json": (0, _json),
+    "orjson": (1, _orjson),
+    "msgpack": (2, _msgpack),
+}
+COMPRESSORS: Dict[str, Tuple[int, Optional[Callable[[], Tuple[Callable, Callable]]]]] = {
+    "none": (0, None),
+    "zstd": (1, _zstd),
+    "lz4": (2, _lz4),
+}
+# Serializers whose payload is JSON text, servable as an HTTP body as-is
+JSON_TEXT = {SERIALIZERS["json"][0], SERIALIZERS["orjson"][0]}
+
+
+class Codec:
+    """
+    How cached values are laid out in Redis.
+
+    Each value is one header byte naming the serializer and compressor
+    that wrote it, then the payload; payloads of at least `min_size`
+    bytes are compressed when that actually makes them smaller. Readers
+    go by the header, not by their own settings, so the configured codec
+    can change between deploys without flushing the cache, and values
+    without a header are read as the plain JSON written before.
+
+    HTTP bodies (the ETag path) are always JSON text, compressed the same
+    way, so they can be served without being decoded and re-encoded.
+    """
+
+    def __init__(self, serializer: str = "orjson", compression: str = "zstd", min_size: int = COMPRESS_MIN_BYTES):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        self.min_size = min_size
+        self._serializers: Dict[int, Tuple[Callable, Callable]] = {}
+        self._compressors: Dict[int, Tuple[Callable, Callable]] = {}
+        # fail at startup, not on the first write, when a library is missing
+        self._serializer = self._load(self._serializers, SERIALIZERS, SERIALIZERS[serializer][0])
+        self._serializer_id = SERIALIZERS[serializer][0]
+        self._compressor_id = COMPRESSORS[compression][0]
+        if self._compressor_id:
+            self._load(self._compressors, COMPRESSORS, self._compressor_id)
+        try:
+            self._json_id = SERIALIZERS["orjson"][0]
+            self._json = self._load(self._serializers, SERIALIZERS, self._json_id)
+        except CodecError:
+            self._json_id = SERIALIZERS["json"][0]
+            self._json = self._load(self._serializers, SERIALIZERS, self._json_id)
+
+    @staticmethod
+    def _load(loaded: Dict[int, Tuple[Callable, Callable]], registry: dict, codec_id: int) -> Tuple[Callable, Callable]:
+        if codec_id not in loaded:
+            for name, (known_id, factory) in registry.items():
+                if known_id == codec_id and factory is not None:
+                    try:
+                        loaded[codec_id] = factory()
+                    except ImportError as e:
+                        raise CodecError(f"Cache codec {name} is not installed: {e}") from e
+                    break
+            else:
+                raise CodecError(f"Unknown cache codec id {codec_id}")
+        return loaded[codec_id]
+
+    def _frame(self, serializer_id: int, payload: bytes) -> bytes:
+        compressor_id = 0
+        if self._compressor_id and len(payload) >= self.min_size:
+            compressed = self._compressors[self._compressor_id][0](payload)
+            if len(compressed) < len(payload):
+                payload, compressor_id = compressed, self._compressor_id
+        return bytes((FRAME | serializer_id << 2 | compressor_id,)) + payload
+
+    def _unframe(self, raw: bytes) -> Tuple[Optional[int], bytes]:
+        """(serializer id, payload), or (None, raw) for a value with no header"""
+        header = raw[0] if raw else 0
+        if header & FRAME_MASK != FRAME:
+            return None, raw
+        payload = raw[1:]
+        compressor_id = header & 0x03
+        if compressor_id:
+            decompress = self._load(self._compressors, COMPRESSORS, compressor_id)[1]
+            try:
+                payload = decompress(payload)
+            except Exception as e:
+                raise CodecError(f"Corrupt cached value: {e}") from e
+        return header >> 2 & 0x07, payload
+
+    def encode(self, value: Any) -> bytes:
+        return self._frame(self._serializer_id, self._serializer[0](value))
+
+    def decode(self, raw: bytes) -> Any:
+        serializer_id, payload = self._unframe(raw)
+        if serializer_id is None:
+            text = raw.decode()
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                return text
+        return self._load(self._serializers, SERIALIZERS, serializer_id)[1](payload)
+
+    def dump_body(self, value: Any) -> bytes:
+        """`value` as JSON text"""
+        return self._json[0](value)
+
+    def encode_body(self, body: Any) -> bytes:
+        """Frame JSON text from `dump_body` (or an older str body) for storage"""
+        return self._frame(self._json_id, body.encode() if isinstance(body, str) else body)
+
+    def decode_body(self, raw: bytes) -> bytes:
+        """The JSON text a frame holds, parsed only if it was stored in another format"""
+        serializer_id, payload = self._unframe(raw)
+        if serializer_id is None or serializer_id in JSON_TEXT:
+            return payload
+        return self.dump_body(self._load(self._serializers, SERIALIZERS, serializer_id)[1](payload))
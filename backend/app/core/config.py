@@ -20,8 +20,21 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    IDEMPOTENCY_TTL: int = 86400
+
+    LOCAL_CACHE_ENABLED: bool = True
+    CACHE_SERIALIZER: str = "orjson"
+    CACHE_COMPRESSION: str = "zstd"
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
+    # Shared secret the payment gateway signs its webhooks with
+    PAYMENT_WEBHOOK_SECRET: str = ""
+
     SMS_PROVIDER: str = "twilio"
     TWILIO_ACCOUNT_SID: str = ""
     TWILIO_AUTH_TOKEN: str = ""
@@ -0,0 +1,85 @@
+from typing import Any, Awaitable, Callable, List, Optional
+from fastapi import Request, Response, status
+from app.core.redis_client import redis_client, content_etag
+
+PRIVATE = "private, no-cache"
+PUBLIC = "public, no-cache"
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _not_modified(request: Request, key: str, cache_control: str) -> Optional[Response]:
+    if not request.headers.get("if-none-match"):
+        return None
+    etag = await redis_client.get_etag(key)
+    if etag and _matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+async def cached_response(request: Request, key: str, cache_control: str = PRIVATE) -> Optional[Response]:
+    """
+    Answer a GET from the cache entry at `key`, or None on a miss.
+
+    A client revalidating with If-None-Match costs one small read of the
+    stored hash and gets a bodiless 304. Anything else gets the stored
+    JSON as-is, without decoding and re-encoding it.
+    """
+    not_modified = await _not_modified(request, key, cache_control)
+    if not_modified:
+        return not_modified
+
+    body, etag = await redis_client.get_with_etag(key)
+    if body is None:
+        return None
+    return _response(request, body, etag or content_etag(body), cache_control)
+
+
+async def cache_response(
+    request: Request,
+    key: str,
+    value: Any,
+    expire: int = 3600,
+    cache_control: str = PRIVATE
+) -> Response:
+    """Serialize `value` once, cache it at `key` with its hash, and answer the request with it"""
+    body = redis_client.codec.dump_body(value)
+    etag = content_etag(body)
+    await redis_client.set_with_etag(key, body, etag, expire=expire)
+    return _response(request, body, etag, cache_control)
+
+
+async def computed_response(
+    request: Request,
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    expire: int = 3600,
+    cache_control: str = PRIVATE,
+    tags: Optional[List[str]] = None
+) -> Response:
+    """
+    `cached_response` and `cache_response` in one, for hot keys: a miss
+    is computed once however many requests are waiting on it, and the
+    entry refreshes ahead of expiry.
+    """
+    not_modified = await _not_modified(request, key, cache_control)
+    if not_modified:
+        return not_modified
+
+    body, etag = await redis_client.get_or_compute_with_etag(key, compute, expire=expire, tags=tags)
+    return _response(request, body, etag, cache_control)
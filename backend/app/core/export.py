@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Sequence
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+from app.core.database import AsyncSessionLocal
+
+# Rows fetched per round trip from the server-side cursor; this, not the
+# size of the export, bounds how much is held in memory at once.
+EXPORT_BATCH_ROWS = 2000
+GZIP_LEVEL = 6
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv")
+}
+
+
+def _plain(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _ndjson(keys: List[str], rows: Sequence[Sequence[Any]]) -> str:
+    return "".join(
+        json.dumps(dict(zip(keys, map(_plain, row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _csv(keys: List[str], rows: Sequence[Sequence[Any]], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(keys)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_rows(statement: Select, fmt: str, compress: bool) -> AsyncIterator[bytes]:
+    """
+    Encode the result of `statement` batch by batch.
+
+    The query runs on its own session with a server-side cursor, since
+    the request's session is closed once the endpoint returns and the
+    body is still being sent. Each batch is encoded and fed through one
+    incremental gzip stream, so neither the rows nor the output are
+    ever held in full.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(statement.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        keys = list(result.keys())
+        first = True
+        async for rows in result.partitions():
+            data = (_csv(keys, rows, header=first) if fmt == "csv" else _ndjson(keys, rows)).encode()
+            first = False
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if first and fmt == "csv":
+            # empty export: still send the header row
+            data = _csv(keys, [], header=True).encode()
+            yield compressor.compress(data) if compressor else data
+
+    if compressor:
+        yield compressor.flush()
+
+
+def export_response(request: Request, statement: Select, name: str, fmt: str) -> StreamingResponse:
+    """Stream `statement` as an NDJSON or CSV download, gzipped when the client accepts it"""
+    media_type, extension = FORMATS[fmt]
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}-{datetime.now():%Y%m%d-%H%M%S}.{extension}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+        "X-Accel-Buffering": "no"
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(stream_rows(statement, fmt, compress), media_type=media_type, headers=headers)
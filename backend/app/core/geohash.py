@@ -0,0 +1,128 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Approximate cell width in km at the equator for each geohash precision
+CELL_WIDTH_KM = {
+    1: 5009.4, 2: 1252.3, 3: 156.5, 4: 39.1,
+    5: 4.89, 6: 1.22, 7: 0.153, 8: 0.0382
+}
+
+# A cell may span at most this fraction of the search radius
+RADIUS_FRACTION = 0.25
+
+
+def encode(latitude: float, longitude: float, precision: int = 6) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def decode(geohash: str) -> Tuple[float, float, float, float]:
+    """Return (latitude, longitude, lat_error, lon_error) for the cell center"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return (
+        (lat_range[0] + lat_range[1]) / 2,
+        (lon_range[0] + lon_range[1]) / 2,
+        (lat_range[1] - lat_range[0]) / 2,
+        (lon_range[1] - lon_range[0]) / 2,
+    )
+
+
+def precision_for_radius(radius_km: float) -> int:
+    """Coarsest precision whose cells are small relative to the radius"""
+    limit = radius_km * RADIUS_FRACTION
+    for precision in sorted(CELL_WIDTH_KM):
+        if CELL_WIDTH_KM[precision] <= limit:
+            return precision
+    return max(CELL_WIDTH_KM)
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def snap(latitude: float, longitude: float, radius_km: float) -> Tuple[str, float, float, float]:
+    """
+    Snap a position to the geohash cell sized for `radius_km`.
+
+    Returns (geohash, center_lat, center_lon, padded_radius). Querying from
+    the center with the padded radius covers the full radius around any
+    point inside the cell, so one cached result serves the whole cell.
+    """
+    cell = encode(latitude, longitude, precision_for_radius(radius_km))
+    center_lat, center_lon, lat_error, lon_error = decode(cell)
+    half_diagonal = distance_km(
+        center_lat, center_lon, center_lat + lat_error, center_lon + lon_error
+    )
+    return cell, center_lat, center_lon, radius_km + half_diagonal
+
+
+def rerank(items: List[Dict[str, Any]], latitude: float, longitude: float, radius_km: float, limit: int) -> List[Dict[str, Any]]:
+    """Recompute `distance` from the caller's own position for a cell-shared result"""
+    ranked = []
+    for item in items:
+        distance = distance_km(latitude, longitude, item["latitude"], item["longitude"])
+        if distance <= radius_km:
+            ranked.append({**item, "distance": round(distance, 2)})
+    ranked.sort(key=lambda item: item["distance"])
+    return ranked[:limit]
+
+
+def location_cache_key(prefix: str, latitude: float, longitude: float, radius_km: float, *parts) -> str:
+    """Cache key shared by every position in the same radius-sized cell"""
+    cell = encode(latitude, longitude, precision_for_radius(radius_km))
+    suffix = ":".join(str(part) for part in parts)
+    return f"{prefix}:{cell}:{radius_km}:{suffix}" if suffix else f"{prefix}:{cell}:{radius_km}"
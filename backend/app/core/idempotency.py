@@ -0,0 +1,187 @@
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+KEY = "idempotency:{}"
+# How long a claimed key blocks duplicates before it is considered abandoned;
+# the claim is renewed every RENEW_EVERY seconds while the request runs
+IN_FLIGHT_TTL = 60
+RENEW_EVERY = IN_FLIGHT_TTL / 3
+POLL_START = 0.025
+POLL_MAX = 0.25
+
+
+def _scope_for(headers: Dict[bytes, bytes]) -> Optional[str]:
+    """Caller the key is scoped to; None for anonymous callers or tokens that don't verify"""
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return f"user:{payload.get('sub')}"
+
+
+def _json_response(status: int, detail: str) -> Dict[str, Any]:
+    body = json.dumps({"detail": detail}).encode()
+    return {
+        "status": status,
+        "headers": [[b"content-type", b"application/json"], [b"content-length", str(len(body)).encode()]],
+        "body": body
+    }
+
+
+class IdempotencyMiddleware:
+    """
+    Honours the Idempotency-Key header on mutating requests.
+
+    The first request with a key claims it in Redis (SET NX) and runs;
+    its response is stored for settings.IDEMPOTENCY_TTL seconds and
+    replayed byte for byte to any retry with the same key, method, path
+    and authenticated caller. A duplicate that arrives while the original is still
+    running waits for it instead of running again; the claim is renewed
+    while the original runs, so a slow request is never run twice. Reusing a key with a
+    different body is rejected with 422; 5xx responses are not stored so
+    the client can retry them.
+    """
+
+    def __init__(self, app: ASGIApp, ttl: Optional[int] = None):
+        self.app = app
+        self.ttl = ttl
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in METHODS or not redis_client.redis:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        key = headers.get(HEADER)
+        caller = _scope_for(headers) if key else None
+        if not key or not caller or len(key) > MAX_KEY_LENGTH:
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        record_key = KEY.format(hashlib.sha256(
+            b"|".join([caller.encode(), scope["method"].encode(), scope["path"].encode(), key])
+        ).hexdigest())
+
+        while True:
+            claimed = await redis_client.set_if_absent(
+                record_key, {"state": "in_flight", "fingerprint": fingerprint}, expire=IN_FLIGHT_TTL
+            )
+            if claimed:
+                await self._run(scope, body, send, record_key, fingerprint)
+                return
+            record = await self._wait(record_key, fingerprint)
+            # the original failed and released the key: this request takes over
+            if not record or record["state"] != "released":
+                break
+
+        if record is None:
+            response = _json_response(409, "A request with this Idempotency-Key is still in progress")
+        elif record["fingerprint"] != fingerprint:
+            response = _json_response(422, "Idempotency-Key was already used with a different request body")
+        else:
+            response = {
+                "status": record["status"],
+                "headers": [[name.encode("latin-1"), value.encode("latin-1")] for name, value in record["headers"]]
+                + [[REPLAYED_HEADER, b"true"]],
+                "body": base64.b64decode(record["body"])
+            }
+        await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+        await send({"type": "http.response.body", "body": response["body"]})
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _run(self, scope: Scope, body: bytes, send: Send, record_key: str, fingerprint: str):
+        replayed = False
+
+        async def receive() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        status = 500
+        headers: List[List[bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message: Message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [list(header) for header in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        renewal = asyncio.create_task(self._keep_claimed(record_key))
+        try:
+            await self.app(scope, receive, capture)
+        except Exception:
+            await redis_client.delete(record_key)
+            raise
+        finally:
+            renewal.cancel()
+
+        if status >= 500:
+            await redis_client.delete(record_key)
+            return
+        await redis_client.set(record_key, {
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+            "body": base64.b64encode(b"".join(chunks)).decode()
+        }, expire=self.ttl or settings.IDEMPOTENCY_TTL)
+
+    @staticmethod
+    async def _keep_claimed(record_key: str):
+        """Keep the in-flight claim alive for as long as the original request runs"""
+        while True:
+            await asyncio.sleep(RENEW_EVERY)
+            try:
+                await redis_client.expire(record_key, IN_FLIGHT_TTL)
+            except Exception:
+                # a missed renewal is retried on the next tick
+                continue
+
+    async def _wait(self, record_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        The finished record, a "released" record if the original gave up
+        the key, or None if it is still running after IN_FLIGHT_TTL
+        """
+        delay = POLL_START
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IN_FLIGHT_TTL
+        while loop.time() < deadline:
+            record = await redis_client.get(record_key)
+            if record is None:
+                return {"state": "released"}
+            if record.get("state") == "done" or record.get("fingerprint") != fingerprint:
+                return record
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+        return None
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Optional
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 2025-01-01T00:00:00Z; 41 bits of milliseconds from here last until 2094
+EPOCH_MS = 1735689600000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# base32hex digits are in ASCII order, so fixed-width strings sort like the integers
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUV"
+PAIRS = [a + b for a in ALPHABET for b in ALPHABET]
+
+LEASE_KEY = "ids:worker:{}"
+LEASE_COUNTER_KEY = "ids:worker:next"
+LEASE_TTL = 60
+RENEW_INTERVAL = 20
+
+# KEYS: lease key; ARGV: owner, ttl
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: lease key; ARGV: owner
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def encode(value: int) -> str:
+    """13-character base32hex (65 bits), the inverse of int(encoded, 32)"""
+    return (
+        ALPHABET[value >> 60]
+        + PAIRS[(value >> 50) & 1023]
+        + PAIRS[(value >> 40) & 1023]
+        + PAIRS[(value >> 30) & 1023]
+        + PAIRS[(value >> 20) & 1023]
+        + PAIRS[(value >> 10) & 1023]
+        + PAIRS[value & 1023]
+    )
+
+
+def decode(encoded: str) -> int:
+    return int(encoded, 32)
+
+
+class IdGenerator:
+    """
+    Snowflake-style 63-bit IDs: milliseconds since EPOCH_MS, a 10-bit
+    worker id and a 12-bit per-millisecond sequence. IDs are unique as
+    long as no two live processes share a worker id, which is guaranteed
+    by leasing the worker id from Redis; time-sortable across the fleet;
+    and strictly increasing within a process even if the wall clock
+    steps backwards.
+    """
+
+    def __init__(self):
+        self.worker_id = random.randint(0, MAX_WORKER_ID)
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{random.getrandbits(32):08x}"
+        self._leased = False
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def next_int(self) -> int:
+        with self._lock:
+            now = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # sequence exhausted: borrow the next millisecond
+                    now += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_{encode(self.next_int())}"
+
+    async def _claim(self) -> bool:
+        start = await redis_client.increment(LEASE_COUNTER_KEY)
+        for offset in range(MAX_WORKER_ID + 1):
+            candidate = (start + offset) & MAX_WORKER_ID
+            if await redis_client.set_if_absent(LEASE_KEY.format(candidate), self._owner, expire=LEASE_TTL):
+                with self._lock:
+                    self.worker_id = candidate
+                self._leased = True
+                return True
+        logger.error("No free ID worker slot; falling back to random worker id %d", self.worker_id)
+        return False
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(RENEW_INTERVAL)
+            try:
+                renewed = await redis_client.run_script(
+                    RENEW_SCRIPT, keys=[LEASE_KEY.format(self.worker_id)], args=[self._owner, LEASE_TTL]
+                )
+                if not renewed:
+                    logger.warning("Lost ID worker lease %d, claiming a new one", self.worker_id)
+                    await self._claim()
+            except Exception:
+                logger.exception("Failed to renew ID worker lease")
+
+    async def start(self):
+        if not await self._claim():
+            return
+        self._task = asyncio.create_task(self._renew())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._leased:
+            await redis_client.run_script(
+                RELEASE_SCRIPT, keys=[LEASE_KEY.format(self.worker_id)], args=[self._owner]
+            )
+            self._leased = False
+
+
+id_generator = IdGenerator()
+
+
+def new_id(prefix: str) -> str:
+    return id_generator.new_id(prefix)
@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+MISSING = object()
+
+
+@dataclass(frozen=True)
+class PrefixPolicy:
+    ttl: float
+    max_entries: int
+    max_bytes: int
+
+
+@dataclass
+class PrefixStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class _Segment:
+    def __init__(self, policy: PrefixPolicy):
+        self.policy = policy
+        # key -> (expires_at, value, size), least recently used first
+        self.entries: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self.stats = PrefixStats()
+
+    def drop(self, key: str) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.stats.entries -= 1
+        self.stats.bytes -= entry[2]
+        return True
+
+
+class LocalCache:
+    """
+    Per-worker LRU with TTLs, in front of Redis for hot key prefixes.
+
+    Only keys under a configured prefix are held, each prefix with its own
+    TTL, entry cap and byte cap (sized by the serialized value), so one
+    busy prefix cannot push out another. Values are shared between
+    callers and must be treated as read-only.
+
+    `generation` moves on every invalidation; a fill that started before
+    an invalidation is discarded instead of caching what may be the
+    value that was just replaced.
+    """
+
+    def __init__(self, policies: Dict[str, PrefixPolicy]):
+        self._segments = {prefix: _Segment(policy) for prefix, policy in policies.items()}
+        # longest prefix wins when prefixes nest
+        self._prefixes = sorted(policies, key=len, reverse=True)
+        self.generation = 0
+        self.active = False
+
+    def _segment(self, key: str) -> Optional[_Segment]:
+        for prefix in self._prefixes:
+            if key.startswith(prefix):
+                return self._segments[prefix]
+        return None
+
+    def covers(self, key: str) -> bool:
+        return self._segment(key) is not None
+
+    def get(self, key: str) -> Any:
+        """The cached value, or MISSING"""
+        segment = self._segment(key) if self.active else None
+        if segment is None:
+            return MISSING
+        entry = segment.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                segment.drop(key)
+            segment.stats.misses += 1
+            return MISSING
+        segment.entries.move_to_end(key)
+        segment.stats.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: Any, size: int, generation: int) -> None:
+        segment = self._segment(key) if self.active else None
+        if segment is None or generation != self.generation or size > segment.policy.max_bytes:
+            return
+        segment.drop(key)
+        segment.entries[key] = (time.monotonic() + segment.policy.ttl, value, size)
+        segment.stats.entries += 1
+        segment.stats.bytes += size
+        while (
+            segment.stats.entries > segment.policy.max_entries
+            or segment.stats.bytes > segment.policy.max_bytes
+        ):
+            segment.drop(next(iter(segment.entries)))
+            segment.stats.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self.generation += 1
+        segment = self._segment(key)
+        if segment is not None and segment.drop(key):
+            segment.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        for segment in self._segments.values():
+            segment.entries.clear()
+            segment.stats.entries = segment.stats.bytes = 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            prefix: {**asdict(segment.stats), **asdict(segment.policy)}
+            for prefix, segment in self._segments.items()
+        }
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException, Query, status
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from app.core.config import settings
+
+# (column, descending)
+SortKey = Tuple[ColumnElement, bool]
+
+
+class PageParams:
+    def __init__(self, cursor: Optional[str], limit: int):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def page_params(default: Optional[int] = None, maximum: Optional[int] = None):
+    """Query dependency for `cursor` and `limit`, with per-endpoint size limits"""
+    maximum = maximum or settings.PAGE_SIZE_MAX
+    default = min(default or settings.PAGE_SIZE_DEFAULT, maximum)
+
+    def dependency(
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+        limit: int = Query(default, ge=1, le=maximum)
+    ) -> PageParams:
+        return PageParams(cursor, limit)
+
+    return dependency
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        kind, raw = next(iter(value.items()))
+        return {
+            "dt": datetime.fromisoformat,
+            "d": date.fromisoformat,
+            "t": time.fromisoformat,
+            "n": Decimal
+        }[kind](raw)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(value) for value in json.loads(raw)]
+    except (binascii.Error, ValueError, KeyError, TypeError, StopIteration):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def _after(sort: Sequence[SortKey], values: List[Any]) -> ColumnElement:
+    """Rows strictly after `values` in `sort` order"""
+    if all(descending == sort[0][1] for _, descending in sort):
+        # uniform direction: a row-value comparison the index can serve directly
+        columns, bound = tuple_(*[column for column, _ in sort]), tuple_(*values)
+        return columns < bound if sort[0][1] else columns > bound
+    clauses = []
+    for index, (column, descending) in enumerate(sort):
+        equal = [sort[i][0] == values[i] for i in range(index)]
+        clauses.append(and_(*equal, column < values[index] if descending else column > values[index]))
+    return or_(*clauses)
+
+
+async def paginate(
+    db: AsyncSession,
+    statement: Select,
+    sort: Sequence[SortKey],
+    page: PageParams
+) -> Dict[str, Any]:
+    """
+    One keyset page of `statement` as {"items", "next_cursor", "limit"}.
+
+    `sort` must end in a unique column (normally the primary key) and
+    every sort column must be selected. Instead of OFFSET the query
+    resumes strictly after the last row of the previous page, so each
+    page is an index range scan of `limit + 1` rows no matter how deep
+    the client has paged.
+    """
+    if page.cursor:
+        statement = statement.where(_after(sort, decode_cursor(page.cursor, len(sort))))
+    statement = statement.order_by(
+        *[column.desc() if descending else column.asc() for column, descending in sort]
+    ).limit(page.limit + 1)
+
+    rows = (await db.execute(statement)).all()
+    items = [dict(row._mapping) for row in rows[:page.limit]]
+    next_cursor = None
+    if len(rows) > page.limit:
+        last = rows[page.limit - 1]._mapping
+        next_cursor = encode_cursor([last[column.key] for column, _ in sort])
+    return {"items": items, "next_cursor": next_cursor, "limit": page.limit}
@@ -1,11 +1,92 @@
 import redis.asyncio as redis
-from typing import Optional, Any
+from contextlib import asynccontextmanager
+from typing import Optional, Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Tuple
+import asyncio
+import hashlib
 import json
+import logging
+import math
+import random
+import time
+import uuid
+from app.core.codec import Codec, CodecError
 from app.core.config import settings
+from app.core.local_cache import LocalCache, PrefixPolicy, MISSING
+
+logger = logging.getLogger(__name__)
+
+ETAG_SUFFIX = ":etag"
+DELTA_SUFFIX = ":delta"
+LOCK_SUFFIX = ":lock"
+TAG_KEY = "cache:tag:{}"
+# Bumped by invalidate_tags; a fill only stores if its tags' versions are
+# still the ones it read before computing
+TAG_VERSION_KEY = "cache:tag:{}:version"
+# Tag sets outlive every entry they list; stale members are harmless
+TAG_TTL = 86400
+
+# get_or_compute: how long one node may hold a recompute before others
+# take over, how often waiters look for its result, and how eagerly hot
+# keys refresh ahead of expiry (higher is earlier)
+COMPUTE_LOCK_TTL = 10.0
+COMPUTE_POLL_INTERVAL = 0.05
+EARLY_REFRESH_BETA = 1.0
+
+# KEYS: lock; ARGV: owner token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS: entry, its delta, its etag, then the set and the version of each
+# tag; ARGV: frame, delta, etag ('' for none), expire, tag TTL, then the
+# version read of each tag. Stores nothing, returning 0, if a tag moved on
+STORE_SCRIPT = """
+local tags = (#KEYS - 3) / 2
+for i = 1, tags do
+    if (redis.call('GET', KEYS[3 + tags + i]) or '0') ~= ARGV[5 + i] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[4])
+if ARGV[3] ~= '' then
+    redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+end
+for i = 1, tags do
+    redis.call('SADD', KEYS[3 + i], KEYS[1])
+    redis.call('EXPIRE', KEYS[3 + i], ARGV[5])
+end
+return 1
+"""
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Hot, rarely changing prefixes kept in each worker's memory as well
+LOCAL_CACHE_POLICIES = {
+    "vendors:": PrefixPolicy(ttl=30, max_entries=2000, max_bytes=32 * 2**20),
+    "vendor:detail:": PrefixPolicy(ttl=60, max_entries=5000, max_bytes=32 * 2**20),
+}
+
+
+def content_etag(body: Any) -> str:
+    if isinstance(body, str):
+        body = body.encode()
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
 
 class RedisClient:
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
+        self._binary: Optional[redis.Redis] = None
+        self._binary_for: Optional[redis.Redis] = None
+        self.codec = Codec(settings.CACHE_SERIALIZER, settings.CACHE_COMPRESSION, settings.CACHE_COMPRESS_MIN_BYTES)
+        self._scripts: Dict[str, Any] = {}
+        self.local: Optional[LocalCache] = LocalCache(LOCAL_CACHE_POLICIES) if settings.LOCAL_CACHE_ENABLED else None
+        self._origin = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
 
     async def connect(self):
         self.redis = await redis.from_url(
@@ -13,54 +94,622 @@ class RedisClient:
             encoding="utf-8",
             decode_responses=True
         )
+        self._scripts = {}
+        if self.local is not None and self._invalidation_task is None:
+            self._invalidation_task = asyncio.create_task(self._listen_invalidations())
 
     async def disconnect(self):
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
+        if self._binary:
+            await self._binary.close()
+            self._binary = self._binary_for = None
         if self.redis:
             await self.redis.close()
 
-    async def get(self, key: str) -> Optional[Any]:
+    @property
+    def binary(self) -> Optional[redis.Redis]:
+        """
+        A client on the same server as `redis` that leaves responses as
+        bytes, for reading codec frames, which are not UTF-8. Writes can
+        go through either client.
+        """
         if not self.redis:
             return None
-        value = await self.redis.get(key)
-        if value:
+        if self._binary_for is not self.redis:
+            pool = self.redis.connection_pool
+            self._binary = redis.Redis(connection_pool=redis.ConnectionPool(
+                connection_class=pool.connection_class,
+                max_connections=pool.max_connections,
+                **{**pool.connection_kwargs, "decode_responses": False}
+            ))
+            self._binary_for = self.redis
+        return self._binary
+
+    def _decode(self, key: str, raw: bytes) -> Any:
+        """`raw` decoded, or MISSING when this worker cannot read it (it is then treated as a miss)"""
+        try:
+            return self.codec.decode(raw)
+        except CodecError as e:
+            logger.warning("Cannot decode cached %s: %s", key, e)
+            return MISSING
+
+    def _decode_body(self, key: str, raw: bytes) -> Optional[bytes]:
+        try:
+            return self.codec.decode_body(raw)
+        except CodecError as e:
+            logger.warning("Cannot decode cached %s: %s", key, e)
+            return None
+
+    async def _listen_invalidations(self):
+        """
+        Evict keys other workers write or delete. The local tier only
+        serves while this subscription is up; any gap empties it, since
+        invalidations sent during the gap are lost.
+        """
+        while True:
+            pubsub = self.redis.pubsub()
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.local.active = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, _, key = message["data"].partition("|")
+                    if origin != self._origin:
+                        self._evict(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation subscription lost")
+            finally:
+                self.local.active = False
+                self.local.clear()
+                await pubsub.close()
+            await asyncio.sleep(1)
+
+    def _evict(self, key: str):
+        self.local.invalidate(key)
+        self.local.invalidate(key + ETAG_SUFFIX)
+
+    async def _invalidate(self, key: str):
+        """Drop `key` from this worker's local tier and tell the others to"""
+        if self.local is not None and self.local.covers(key):
+            self._evict(key)
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{self._origin}|{key}")
+
+    def local_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.local.stats() if self.local is not None else {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.redis:
+            return None
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not MISSING:
                 return value
+            generation = self.local.generation
+        raw = await self.binary.get(key)
+        if raw:
+            value = self._decode(key, raw)
+            if value is MISSING:
+                return None
+            if self.local is not None:
+                self.local.put(key, value, len(raw), generation)
+            return value
         return None
 
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         if not self.redis:
             return False
         if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        return await self.redis.set(key, value, ex=expire)
+            value = self.codec.encode(value)
+        result = await self.redis.set(key, value, ex=expire)
+        await self._invalidate(key)
+        return result
+
+    async def set_if_absent(self, key: str, value: Any, expire: Optional[int] = 3600) -> bool:
+        if not self.redis:
+            return False
+        if isinstance(value, (dict, list)):
+            value = self.codec.encode(value)
+        if not await self.redis.set(key, value, ex=expire, nx=True):
+            return False
+        await self._invalidate(key)
+        return True
+
+    async def get_etag(self, key: str) -> Optional[str]:
+        if not self.redis:
+            return None
+        if self.local is not None:
+            cached = self.local.get(key + ETAG_SUFFIX)
+            if cached is not MISSING:
+                return cached[1]
+        return await self.redis.get(key + ETAG_SUFFIX)
+
+    async def get_with_etag(self, key: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """The JSON text of `key`, and its content hash"""
+        if not self.redis:
+            return None, None
+        if self.local is not None:
+            cached = self.local.get(key + ETAG_SUFFIX)
+            if cached is not MISSING:
+                return cached
+            generation = self.local.generation
+        raw, etag = await self.binary.mget(key, key + ETAG_SUFFIX)
+        body = self._decode_body(key, raw) if raw is not None else None
+        if body is None:
+            return None, None
+        etag = etag.decode() if etag is not None else None
+        if etag is not None and self.local is not None:
+            self.local.put(key + ETAG_SUFFIX, (body, etag), len(body), generation)
+        return body, etag
+
+    async def set_with_etag(self, key: str, body: Any, etag: str, expire: int = 3600) -> bool:
+        """Store JSON text (see `Codec.dump_body`) and its content hash together, with the same TTL"""
+        if not self.redis:
+            return False
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, self.codec.encode_body(body), ex=expire)
+            pipe.set(key + ETAG_SUFFIX, etag, ex=expire)
+            await pipe.execute()
+        await self._invalidate(key)
+        return True
 
     async def delete(self, key: str) -> bool:
         if not self.redis:
             return False
-        return await self.redis.delete(key) > 0
+        deleted = await self.redis.delete(key, key + ETAG_SUFFIX)
+        await self._invalidate(key)
+        return deleted > 0
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """`get` for many keys with one MGET; local-tier hits are not fetched"""
+        if not self.redis or not keys:
+            return [None] * len(keys)
+        values: List[Any] = [MISSING] * len(keys)
+        if self.local is not None:
+            values = [self.local.get(key) for key in keys]
+            generation = self.local.generation
+        missing = [i for i, value in enumerate(values) if value is MISSING]
+        raws = await self.binary.mget([keys[i] for i in missing]) if missing else []
+        for i, raw in zip(missing, raws):
+            values[i] = self._decode(keys[i], raw) if raw else None
+            if values[i] is MISSING:
+                values[i] = None
+            elif values[i] is not None and self.local is not None:
+                self.local.put(keys[i], values[i], len(raw), generation)
+        return values
+
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """`set` for many keys in one MULTI, all with the same TTL"""
+        if not self.redis or not mapping:
+            return False
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self.codec.encode(value) if isinstance(value, (dict, list)) else value, ex=expire)
+            await pipe.execute()
+        for key in mapping:
+            await self._invalidate(key)
+        return True
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        """`delete` for many keys with one DEL; returns how many existed"""
+        if not self.redis or not keys:
+            return 0
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*keys)
+            pipe.delete(*[key + ETAG_SUFFIX for key in keys])
+            deleted, _ = await pipe.execute()
+        for key in keys:
+            await self._invalidate(key)
+        return deleted
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = True) -> AsyncIterator[Optional[Any]]:
+        """
+        Batch raw commands into one round trip, sent when the block exits
+        (as MULTI/EXEC when `transaction`). Yields None when Redis is not
+        connected. Values are not JSON-encoded and the local tier is not
+        invalidated, so keep cached keys out of it.
+
+            async with redis_client.pipeline() as pipe:
+                if pipe is not None:
+                    pipe.hset(...)
+                    pipe.geoadd(...)
+        """
+        if not self.redis:
+            yield None
+            return
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+            await pipe.execute()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int = 3600,
+        beta: float = EARLY_REFRESH_BETA,
+        tags: Optional[List[str]] = None
+    ) -> Optional[Any]:
+        """
+        Cached value of `key`, calling `compute` to fill it when missing.
+
+        A miss is computed once per cluster: concurrent callers in this
+        worker share one in-flight computation, and across workers a
+        Redis lock lets one node compute while the rest wait for its
+        result. Hits refresh ahead of expiry with probability growing as
+        the TTL runs out, scaled by how long the last compute took
+        (probabilistic early expiration), so hot keys are rebuilt in the
+        background before they lapse instead of all at once after.
+        The entry is added to each of `tags` (see `invalidate_tags`).
+
+        A background refresh calls `compute` after the request that
+        triggered it may have finished: it must not use request-scoped
+        resources such as the request's database session.
+        """
+        if not self.redis:
+            return await compute()
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not MISSING:
+                return value
+            generation = self.local.generation
+        raw, _ = await self._read_or_fill(key, compute, expire, beta, etag=False, tags=tags)
+        if raw is None:
+            return None
+        value = self._decode(key, raw)
+        if value is MISSING:
+            return await compute()
+        if self.local is not None:
+            self.local.put(key, value, len(raw), generation)
+        return value
+
+    async def get_or_compute_with_etag(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int = 3600,
+        beta: float = EARLY_REFRESH_BETA,
+        tags: Optional[List[str]] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """`get_or_compute` for `get_with_etag` entries: the JSON text and its content hash"""
+        if not self.redis:
+            value = await compute()
+            if value is None:
+                return None, None
+            body = self.codec.dump_body(value)
+            return body, content_etag(body)
+        if self.local is not None:
+            cached = self.local.get(key + ETAG_SUFFIX)
+            if cached is not MISSING:
+                return cached
+            generation = self.local.generation
+        raw, etag = await self._read_or_fill(key, compute, expire, beta, etag=True, tags=tags)
+        if raw is None:
+            return None, None
+        body = self._decode_body(key, raw)
+        if body is None:
+            value = await compute()
+            body = self.codec.dump_body(value) if value is not None else None
+            return body, content_etag(body) if body is not None else None
+        if self.local is not None:
+            self.local.put(key + ETAG_SUFFIX, (body, etag), len(body), generation)
+        return body, etag
+
+    async def _read_or_fill(self, key: str, compute, expire: int, beta: float, etag: bool, tags: Optional[List[str]]):
+        """The stored frame of `key` and, for `etag` entries, its hash"""
+        async with self.binary.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            pipe.get(key + DELTA_SUFFIX)
+            pipe.get(key + ETAG_SUFFIX)
+            raw, ttl_ms, delta, tag = await pipe.execute()
+        tag = tag.decode() if tag is not None else None
+        if raw is not None and (tag is not None or not etag):
+            if delta and ttl_ms > 0 and -float(delta) * beta * math.log(1.0 - random.random()) * 1000 >= ttl_ms:
+                self._refresh_early(key, compute, expire, etag, tags)
+            return raw, tag if etag else None
+        return await self._single_flight(key, lambda: self._fill(key, compute, expire, etag, tags, wait=True))
+
+    async def _single_flight(self, key: str, fill: Callable[[], Awaitable[Any]]):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fill())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        # shielded: a caller that goes away must not cancel the fill the others wait on
+        return await asyncio.shield(task)
+
+    def _refresh_early(self, key: str, compute, expire: int, etag: bool, tags: Optional[List[str]]):
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(self._fill(key, compute, expire, etag, tags, wait=False))
+        self._inflight[key] = task
+
+        def done(task: asyncio.Task):
+            if self._inflight.get(key) is task:
+                self._inflight.pop(key)
+            if not task.cancelled() and task.exception():
+                logger.warning("Early refresh of %s failed: %s", key, task.exception())
+
+        task.add_done_callback(done)
+
+    async def _fill(self, key: str, compute, expire: int, etag: bool, tags: Optional[List[str]], wait: bool):
+        lock_key, token = key + LOCK_SUFFIX, uuid.uuid4().hex
+        while True:
+            if await self.redis.set(lock_key, token, px=int(COMPUTE_LOCK_TTL * 1000), nx=True):
+                try:
+                    return await self._store_computed(key, compute, expire, etag, tags)
+                finally:
+                    await self.run_script(RELEASE_LOCK_SCRIPT, keys=[lock_key], args=[token])
+            if not wait:
+                # another node is already refreshing it
+                return None, None
+            await asyncio.sleep(COMPUTE_POLL_INTERVAL)
+            raw, tag = await self.binary.mget(key, key + ETAG_SUFFIX)
+            tag = tag.decode() if tag is not None else None
+            if raw is not None and (tag is not None or not etag):
+                return raw, tag if etag else None
+            # otherwise retry the lock, which lapses if its holder died
+
+    async def _store_computed(self, key: str, compute, expire: int, etag: bool, tags: Optional[List[str]]):
+        tags = list(tags or ())
+        versions = await self.redis.mget([TAG_VERSION_KEY.format(name) for name in tags]) if tags else []
+        started = time.perf_counter()
+        value = await compute()
+        delta = time.perf_counter() - started
+        if value is None:
+            return None, None
+        if etag:
+            body = self.codec.dump_body(value)
+            raw, tag = self.codec.encode_body(body), content_etag(body)
+        else:
+            raw, tag = self.codec.encode(value), None
+        stored = await self.run_script(
+            STORE_SCRIPT,
+            keys=[key, key + DELTA_SUFFIX, key + ETAG_SUFFIX]
+            + [TAG_KEY.format(name) for name in tags]
+            + [TAG_VERSION_KEY.format(name) for name in tags],
+            args=[raw, round(delta, 6), tag or "", expire, TAG_TTL] + [version or "0" for version in versions]
+        )
+        if stored:
+            await self._invalidate(key)
+        # else a tag was invalidated while computing: the value may predate
+        # that change, so it is served to this caller but not cached
+        return raw, tag
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every entry cached under any of `tags`; returns how many.
+
+        The tag sets are read and dropped in one MULTI, so an entry
+        tagged while this runs lands in a fresh set instead of being
+        lost; the cost is one DEL per tagged entry. The same MULTI bumps
+        each tag's version, so a fill that computed before this ran does
+        not store its now stale value afterwards.
+        """
+        if not self.redis or not tags:
+            return 0
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for name in tags:
+                pipe.smembers(TAG_KEY.format(name))
+            for name in tags:
+                pipe.delete(TAG_KEY.format(name))
+            for name in tags:
+                pipe.incr(TAG_VERSION_KEY.format(name))
+                pipe.expire(TAG_VERSION_KEY.format(name), TAG_TTL)
+            results = await pipe.execute()
+        keys = set().union(*results[:len(tags)])
+        if not keys:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.delete(key, key + ETAG_SUFFIX, key + DELTA_SUFFIX)
+            deleted = await pipe.execute()
+        for key in keys:
+            await self._invalidate(key)
+        return sum(1 for count in deleted if count)
 
     async def exists(self, key: str) -> bool:
         if not self.redis:
             return False
         return await self.redis.exists(key) > 0
 
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Reset a key's TTL; False if the key does not exist"""
+        if not self.redis:
+            return False
+        return bool(await self.redis.expire(key, seconds))
+
     async def set_hash(self, key: str, mapping: dict, expire: int = 3600) -> bool:
+        """HSET and EXPIRE in one MULTI, so the hash never exists without its TTL"""
         if not self.redis:
             return False
-        await self.redis.hset(key, mapping=mapping)
-        await self.redis.expire(key, expire)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, expire)
+            await pipe.execute()
         return True
 
+    async def get_hashes(self, keys: Sequence[str]) -> List[dict]:
+        """HGETALL of each key in one round trip; missing keys come back empty"""
+        if not self.redis or not keys:
+            return [{} for _ in keys]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            return await pipe.execute()
+
     async def get_hash(self, key: str) -> Optional[dict]:
         if not self.redis:
             return None
         return await self.redis.hgetall(key)
 
+    async def set_hash_field(self, key: str, field: str, value: Any) -> bool:
+        if not self.redis:
+            return False
+        await self.redis.hset(key, field, json.dumps(value))
+        return True
+
+    async def set_hash_field_if_absent(self, key: str, field: str, value: Any) -> bool:
+        if not self.redis:
+            return False
+        return bool(await self.redis.hsetnx(key, field, json.dumps(value)))
+
+    async def hash_field_exists(self, key: str, field: str) -> bool:
+        if not self.redis:
+            return False
+        return bool(await self.redis.hexists(key, field))
+
+    async def get_hash_fields(self, key: str, fields: List[str]) -> List[Optional[Any]]:
+        if not self.redis or not fields:
+            return [None] * len(fields)
+        values = await self.redis.hmget(key, fields)
+        return [json.loads(value) if value else None for value in values]
+
+    async def delete_hash_field(self, key: str, field: str) -> bool:
+        if not self.redis:
+            return False
+        return await self.redis.hdel(key, field) > 0
+
+    async def add_to_set(self, key: str, *members: str) -> int:
+        if not self.redis or not members:
+            return 0
+        return await self.redis.sadd(key, *members)
+
+    async def pop_from_set(self, key: str, count: int = 1) -> List[str]:
+        """Remove and return up to `count` random members"""
+        if not self.redis:
+            return []
+        return await self.redis.spop(key, count) or []
+
     async def increment(self, key: str, amount: int = 1) -> int:
         if not self.redis:
             return 0
         return await self.redis.incrby(key, amount)
 
+    async def increment_hash_field(self, key: str, field: str, amount: int = 1, expire: Optional[int] = None) -> int:
+        if not self.redis:
+            return 0
+        value = await self.redis.hincrby(key, field, amount)
+        if expire:
+            await self.redis.expire(key, expire)
+        return value
+
+    async def geo_add(self, key: str, longitude: float, latitude: float, member: str) -> bool:
+        if not self.redis:
+            return False
+        await self.redis.geoadd(key, [longitude, latitude, member])
+        return True
+
+    async def geo_remove(self, key: str, member: str) -> bool:
+        if not self.redis:
+            return False
+        return await self.redis.zrem(key, member) > 0
+
+    async def geo_search(
+        self,
+        key: str,
+        longitude: float,
+        latitude: float,
+        radius: float,
+        unit: str = "km",
+        count: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Members within radius of a point as (member, distance), nearest first"""
+        if not self.redis:
+            return []
+        results = await self.redis.geosearch(
+            key,
+            longitude=longitude,
+            latitude=latitude,
+            radius=radius,
+            unit=unit,
+            sort="ASC",
+            count=count,
+            withdist=True
+        )
+        return [(member, float(distance)) for member, distance in results]
+
+    async def publish(self, channel: str, message: Any) -> int:
+        if not self.redis:
+            return 0
+        if isinstance(message, (dict, list)):
+            message = json.dumps(message)
+        return await self.redis.publish(channel, message)
+
+    def pubsub(self) -> Optional[Any]:
+        if not self.redis:
+            return None
+        return self.redis.pubsub()
+
+    async def stream_add(self, stream: str, data: Any, maxlen: Optional[int] = None) -> Optional[str]:
+        """Append a JSON entry to a stream, optionally trimming it to about `maxlen`; returns its id"""
+        if not self.redis:
+            return None
+        return await self.redis.xadd(stream, {"data": json.dumps(data)}, maxlen=maxlen, approximate=True)
+
+    async def stream_create_group(self, stream: str, group: str, start_id: str = "0") -> bool:
+        if not self.redis:
+            return False
+        try:
+            await self.redis.xgroup_create(stream, group, id=start_id, mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        return True
+
+    async def stream_read_group(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: Optional[int] = None
+    ) -> List[Tuple[str, Any]]:
+        """New entries for a consumer group member as (id, data)"""
+        if not self.redis:
+            return []
+        response = await self.redis.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block)
+        if not response:
+            return []
+        return [(entry_id, json.loads(fields["data"])) for entry_id, fields in response[0][1]]
+
+    async def stream_claim_stale(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        min_idle: int,
+        count: int = 100
+    ) -> List[Tuple[str, Any]]:
+        """Take over entries another member read but never acknowledged"""
+        if not self.redis:
+            return []
+        _, entries, *_ = await self.redis.xautoclaim(stream, group, consumer, min_idle, count=count)
+        return [(entry_id, json.loads(fields["data"])) for entry_id, fields in entries if fields]
+
+    async def stream_ack(self, stream: str, group: str, entry_ids: List[str], delete: bool = False) -> int:
+        if not self.redis or not entry_ids:
+            return 0
+        acked = await self.redis.xack(stream, group, *entry_ids)
+        if delete:
+            await self.redis.xdel(stream, *entry_ids)
+        return acked
+
+    async def run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """Run a Lua script by SHA, loading it on first use"""
+        if not self.redis:
+            return None
+        if script not in self._scripts:
+            self._scripts[script] = self.redis.register_script(script)
+        return await self._scripts[script](keys=keys, args=args)
+
 redis_client = RedisClient()
@@ -65,6 +65,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
     return {"user_id": user_id, "role": role}
 
+def get_websocket_user(token: str, allowed_roles: list) -> Optional[Dict]:
+    """Resolve a WebSocket/SSE access token; None if it is invalid or not allowed"""
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        return None
+
+    if payload.get("type") != "access" or payload.get("sub") is None:
+        return None
+    if payload.get("role") not in allowed_roles:
+        return None
+
+    return {"user_id": payload["sub"], "role": payload.get("role")}
+
 def require_role(allowed_roles: list):
     async def role_checker(current_user: Dict = Depends(get_current_user)):
         if current_user["role"] not in allowed_roles:
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+BLOCK_MS = 2000
+# Entries left unacknowledged this long (crashed worker, failed batch) are retried
+CLAIM_IDLE_MS = 30000
+RETRY_DELAY = 5.0
+
+Entry = Tuple[str, Any]
+
+
+class RetryLater(Exception):
+    """Raised by a handler to leave a batch pending without logging a failure"""
+
+
+Handler = Callable[[List[Entry]], Awaitable[List[str]]]
+
+
+class StreamConsumer:
+    """
+    Background member of a Redis Stream consumer group.
+
+    Reads batches of up to `batch_size` entries and hands them to
+    `handler`, which returns the ids it has fully processed; only those
+    are acknowledged. Anything left pending - because the handler raised,
+    skipped it, or the process died mid-batch - is claimed back from the
+    group after CLAIM_IDLE_MS by whichever member gets to it first, so
+    entries are processed at least once.
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        group: str,
+        handler: Handler,
+        batch_size: int = BATCH_SIZE,
+        delete_acked: bool = False
+    ):
+        self.stream = stream
+        self.group = group
+        self.handler = handler
+        self.batch_size = batch_size
+        self.delete_acked = delete_acked
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _next_batch(self) -> List[Entry]:
+        entries = await redis_client.stream_claim_stale(
+            self.stream, self.group, self.name, CLAIM_IDLE_MS, count=self.batch_size
+        )
+        if entries:
+            return entries
+        return await redis_client.stream_read_group(
+            self.stream, self.group, self.name, count=self.batch_size, block=BLOCK_MS
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                if not self._ready:
+                    self._ready = await redis_client.stream_create_group(self.stream, self.group)
+                entries = await self._next_batch()
+                if not entries:
+                    if not redis_client.redis:
+                        await asyncio.sleep(RETRY_DELAY)
+                    continue
+                done = await self.handler(entries)
+                await redis_client.stream_ack(self.stream, self.group, done, delete=self.delete_acked)
+            except asyncio.CancelledError:
+                raise
+            except RetryLater as e:
+                logger.info("Consumer %s on %s deferred a batch: %s", self.group, self.stream, e)
+                await asyncio.sleep(RETRY_DELAY)
+            except Exception:
+                # the group may have vanished with the stream; recreating it is harmless
+                self._ready = False
+                logger.exception("Consumer %s on %s failed, retrying", self.group, self.stream)
+                await asyncio.sleep(RETRY_DELAY)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
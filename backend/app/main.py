@@ -5,12 +5,42 @@ import redis.asyncio as redis
 
 from app.core.config import settings
 from app.core.redis_client import redis_client
+from app.core.ids import id_generator
+from app.core.idempotency import IdempotencyMiddleware
 from app.api.v1.router import api_router
+from app.services.location_ingest import history_writer
+from app.services.location_history import location_compactor
+from app.services.booking_feed import booking_feed
+from app.services.booking_writer import booking_writer
+from app.services.booking_events import booking_events
+from app.services import booking_consumers
+from app.services.coupons import coupon_redemptions
+from app.services.autocomplete import autocomplete
+from app.services.vendor_index import vendor_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_client.connect()
+    await id_generator.start()
+    history_writer.start()
+    location_compactor.start()
+    booking_feed.start()
+    booking_writer.start()
+    booking_consumers.register()
+    booking_events.start()
+    coupon_redemptions.start()
+    autocomplete.start()
+    vendor_index.start()
     yield
+    await vendor_index.stop()
+    await autocomplete.stop()
+    await coupon_redemptions.stop()
+    await booking_events.stop()
+    await booking_writer.stop()
+    await booking_feed.stop()
+    await location_compactor.stop()
+    await history_writer.stop()
+    await id_generator.stop()
     await redis_client.disconnect()
 
 app = FastAPI(
@@ -20,6 +50,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
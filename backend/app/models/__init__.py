@@ -1,151 +1,47 @@
 # Database Models
-from app.models.user import UserProfile, UserRole, UserSession, UserDocument
-from app.models.department import Department, Role, Permission, RolePermission
-from app.models.vendor import (
-    Vendor, VendorDocument, VendorService, VendorAvailability,
-    VendorPayout, VendorReview, VendorContract
-)
+from app.models.user import UserProfile
+from app.models.vendor import Vendor, VendorAvailability
 from app.models.therapist import (
-    Therapist, TherapistCertification, TherapistSchedule,
-    TherapistAvailability, TherapistLeave, TherapistPerformance,
-    TherapistAssignment, TherapistEarnings, TherapistLocation
-)
-from app.models.service import (
-    Service, ServiceCategory, ServiceVariant, ServicePricingTier,
-    ServiceReview, ServiceAvailability, ServiceTag, PopularService
-)
-from app.models.booking import (
-    Booking, BookingService, BookingStatusHistory, BookingNote,
-    BookingCancellation, BookingReschedule, ServiceExecutionLog,
-    BookingPhoto, BookingReview
-)
-from app.models.payment import (
-    Payment, PaymentMethod, PaymentGateway, Refund,
-    Wallet, WalletTransaction, Invoice, InvoiceItem
-)
-from app.models.customer import (
-    Customer, CustomerAddress, CustomerSegment, CustomerPreference,
-    CustomerLoyaltyTier, LoyaltyPointsTransaction, CustomerReferral,
-    CustomerComplaint, CustomerCommunicationLog, CustomerFavorite
-)
-from app.models.hr import (
-    Employee, EmployeeOnboarding, Attendance, AttendancePolicy,
-    Leave, LeaveType, LeaveBalance, Holiday, WorkShift,
-    OvertimeRecord, SalaryStructure, SalaryComponent, Training,
-    PerformanceReview, Document as EmployeeDocument
-)
-from app.models.marketing import (
-    Campaign, CampaignTarget, CampaignAnalytics, Promotion,
-    PromotionRule, Coupon, CouponUsage, ReferralProgram,
-    EmailTemplate, SMSTemplate, Notification
-)
-from app.models.support import (
-    Ticket, TicketCategory, TicketPriority, TicketMessage,
-    TicketSLA, CannedResponse, ChatConversation, ChatMessage, FAQ
-)
-from app.models.legal import (
-    Contract, ContractType, LegalDocument, ComplianceRequirement,
-    ComplianceAudit, LitigationCase, LegalNotice, RegulatoryFiling
-)
-from app.models.operations import (
-    InventoryItem, InventoryTransaction, InventoryLocation,
-    Supplier, PurchaseOrder, PurchaseOrderItem, Warehouse,
-    StockLevel, StockAlert, AssetManagement
-)
-from app.models.finance import (
-    ExpenseCategory, Expense, BudgetAllocation, FinancialReport,
-    TaxRecord, AccountingEntry, BankAccount, CommissionRule,
-    CommissionRecord
-)
-from app.models.analytics import (
-    UserActivity, PageView, SearchQuery, ConversionEvent,
-    ABTest, ABTestVariant, AnalyticsReport, KPI, Dashboard
-)
-from app.models.system import (
-    AuditLog, SystemSetting, FeatureFlag, APIKey, Webhook,
-    WebhookLog, ScheduledJob, ErrorLog, AppVersion
-)
-from app.models.location import (
-    City, State, Country, Zone, ServiceArea, LocationTracking
-)
-from app.models.communication import (
-    EmailLog, SMSLog, PushNotification, InAppMessage, Broadcast
+    Therapist, TherapistSchedule, TherapistLeave,
+    TherapistAssignment, TherapistLocation
 )
+from app.models.service import Service, ServiceCategory, ServicePricingTier, ServiceTag
+from app.models.booking import Booking, BookingService, BookingStatusHistory
+from app.models.hr import Attendance, Leave, Holiday
+from app.models.marketing import Promotion, PromotionRule, Coupon, CouponUsage, Notification
+from app.models.finance import CommissionRule
+from app.models.analytics import SearchQuery
+from app.models.system import AuditLog
 
 __all__ = [
     # User models
-    "UserProfile", "UserRole", "UserSession", "UserDocument",
-
-    # Department models
-    "Department", "Role", "Permission", "RolePermission",
+    "UserProfile",
 
     # Vendor models
-    "Vendor", "VendorDocument", "VendorService", "VendorAvailability",
-    "VendorPayout", "VendorReview", "VendorContract",
+    "Vendor", "VendorAvailability",
 
     # Therapist models
-    "Therapist", "TherapistCertification", "TherapistSchedule",
-    "TherapistAvailability", "TherapistLeave", "TherapistPerformance",
-    "TherapistAssignment", "TherapistEarnings", "TherapistLocation",
+    "Therapist", "TherapistSchedule", "TherapistLeave",
+    "TherapistAssignment", "TherapistLocation",
 
     # Service models
-    "Service", "ServiceCategory", "ServiceVariant", "ServicePricingTier",
-    "ServiceReview", "ServiceAvailability", "ServiceTag", "PopularService",
+    "Service", "ServiceCategory", "ServicePricingTier", "ServiceTag",
 
     # Booking models
-    "Booking", "BookingService", "BookingStatusHistory", "BookingNote",
-    "BookingCancellation", "BookingReschedule", "ServiceExecutionLog",
-    "BookingPhoto", "BookingReview",
-
-    # Payment models
-    "Payment", "PaymentMethod", "PaymentGateway", "Refund",
-    "Wallet", "WalletTransaction", "Invoice", "InvoiceItem",
-
-    # Customer models
-    "Customer", "CustomerAddress", "CustomerSegment", "CustomerPreference",
-    "CustomerLoyaltyTier", "LoyaltyPointsTransaction", "CustomerReferral",
-    "CustomerComplaint", "CustomerCommunicationLog", "CustomerFavorite",
+    "Booking", "BookingService", "BookingStatusHistory",
 
     # HR models
-    "Employee", "EmployeeOnboarding", "Attendance", "AttendancePolicy",
-    "Leave", "LeaveType", "LeaveBalance", "Holiday", "WorkShift",
-    "OvertimeRecord", "SalaryStructure", "SalaryComponent", "Training",
-    "PerformanceReview", "EmployeeDocument",
+    "Attendance", "Leave", "Holiday",
 
     # Marketing models
-    "Campaign", "CampaignTarget", "CampaignAnalytics", "Promotion",
-    "PromotionRule", "Coupon", "CouponUsage", "ReferralProgram",
-    "EmailTemplate", "SMSTemplate", "Notification",
-
-    # Support models
-    "Ticket", "TicketCategory", "TicketPriority", "TicketMessage",
-    "TicketSLA", "CannedResponse", "ChatConversation", "ChatMessage", "FAQ",
-
-    # Legal models
-    "Contract", "ContractType", "LegalDocument", "ComplianceRequirement",
-    "ComplianceAudit", "LitigationCase", "LegalNotice", "RegulatoryFiling",
-
-    # Operations models
-    "InventoryItem", "InventoryTransaction", "InventoryLocation",
-    "Supplier", "PurchaseOrder", "PurchaseOrderItem", "Warehouse",
-    "StockLevel", "StockAlert", "AssetManagement",
+    "Promotion", "PromotionRule", "Coupon", "CouponUsage", "Notification",
 
     # Finance models
-    "ExpenseCategory", "Expense", "BudgetAllocation", "FinancialReport",
-    "TaxRecord", "AccountingEntry", "BankAccount", "CommissionRule",
-    "CommissionRecord",
+    "CommissionRule",
 
     # Analytics models
-    "UserActivity", "PageView", "SearchQuery", "ConversionEvent",
-    "ABTest", "ABTestVariant", "AnalyticsReport", "KPI", "Dashboard",
+    "SearchQuery",
 
     # System models
-    "AuditLog", "SystemSetting", "FeatureFlag", "APIKey", "Webhook",
-    "WebhookLog", "ScheduledJob", "ErrorLog", "AppVersion",
-
-    # Location models
-    "City", "State", "Country", "Zone", "ServiceArea", "LocationTracking",
-
-    # Communication models
-    "EmailLog", "SMSLog", "PushNotification", "InAppMessage", "Broadcast",
+    "AuditLog",
 ]
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Integer, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class SearchQuery(Base):
+    __tablename__ = "search_queries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    query = Column(Text, nullable=False)
+    user_id = Column(UUID(as_uuid=True))
+    results_count = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, Numeric, Text, Time, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from app.core.database import Base
+
+
+class Booking(Base):
+    __tablename__ = "bookings"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    # the id clients, caches and events know the booking by
+    booking_number = Column(Text, unique=True, nullable=False)
+    customer_id = Column(UUID(as_uuid=True), nullable=False)
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id", ondelete="RESTRICT"), nullable=False)
+    booking_type = Column(Text, nullable=False)
+    service_location = Column(JSONB, nullable=False)
+    booking_date = Column(Date, nullable=False)
+    booking_time = Column(Time, nullable=False)
+    total_amount = Column(Numeric(10, 2), nullable=False)
+    discount_amount = Column(Numeric(10, 2), server_default="0")
+    tax_amount = Column(Numeric(10, 2), server_default="0")
+    service_charge = Column(Numeric(10, 2), server_default="0")
+    final_amount = Column(Numeric(10, 2), nullable=False)
+    status = Column(Text, server_default="pending")
+    payment_status = Column(Text, server_default="pending")
+    special_instructions = Column(Text)
+    cancellation_reason = Column(Text)
+    cancelled_by = Column(UUID(as_uuid=True))
+    cancelled_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class BookingService(Base):
+    __tablename__ = "booking_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False)
+    service_id = Column(UUID(as_uuid=True), nullable=False)
+    service_name = Column(Text, nullable=False)
+    service_duration = Column(Integer, nullable=False)
+    service_price = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Integer, server_default="1")
+    addon_services = Column(JSONB, server_default="[]")
+    subtotal = Column(Numeric(10, 2), nullable=False)
+    therapist_id = Column(UUID(as_uuid=True), ForeignKey("therapists.id"))
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class BookingStatusHistory(Base):
+    __tablename__ = "booking_status_history"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(Text)
+    to_status = Column(Text, nullable=False)
+    changed_by = Column(UUID(as_uuid=True))
+    reason = Column(Text)
+    metadata_ = Column("metadata", JSONB, server_default="{}")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class CommissionRule(Base):
+    """Commission % for a vendor, a service, or both; NULL matches any"""
+    __tablename__ = "commission_rules"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id", ondelete="CASCADE"))
+    service_id = Column(UUID(as_uuid=True), ForeignKey("services.id", ondelete="CASCADE"))
+    commission_rate = Column(Numeric(5, 2), nullable=False)
+    is_active = Column(Boolean, server_default="true")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Computed, Date, DateTime, Integer, Numeric, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class Attendance(Base):
+    __tablename__ = "attendance"
+    __table_args__ = (UniqueConstraint("employee_id", "date"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    employee_id = Column(UUID(as_uuid=True), nullable=False)
+    date = Column(Date, nullable=False)
+    check_in = Column(DateTime(timezone=True))
+    check_out = Column(DateTime(timezone=True))
+    status = Column(Text, server_default="present")
+    working_hours = Column(Numeric(5, 2))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Leave(Base):
+    __tablename__ = "leave_requests"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    employee_id = Column(UUID(as_uuid=True), nullable=False)
+    leave_type = Column(Text, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    total_days = Column(Integer, Computed("end_date - start_date + 1"))
+    reason = Column(Text, nullable=False)
+    status = Column(Text, server_default="pending")
+    approved_by = Column(UUID(as_uuid=True))
+    approved_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Holiday(Base):
+    __tablename__ = "holidays"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    date = Column(Date, unique=True, nullable=False)
+    name = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
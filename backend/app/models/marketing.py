@@ -0,0 +1,73 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from app.core.database import Base
+
+
+class Promotion(Base):
+    __tablename__ = "promotions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    name = Column(Text, nullable=False)
+    description = Column(Text)
+    # percentage | fixed
+    type = Column(Text, nullable=False)
+    discount_value = Column(Numeric(10, 2), nullable=False)
+    min_booking_amount = Column(Numeric(10, 2), server_default="0")
+    max_discount_amount = Column(Numeric(10, 2))
+    applicable_services = Column(ARRAY(UUID(as_uuid=True)))
+    applicable_vendors = Column(ARRAY(UUID(as_uuid=True)))
+    valid_from = Column(DateTime(timezone=True))
+    # open-ended when NULL
+    valid_to = Column(DateTime(timezone=True))
+    total_usage_limit = Column(Integer)
+    usage_limit_per_customer = Column(Integer)
+    status = Column(Text, server_default="active")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PromotionRule(Base):
+    __tablename__ = "promotion_rules"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    promotion_id = Column(UUID(as_uuid=True), ForeignKey("promotions.id", ondelete="CASCADE"), nullable=False)
+    # day_of_week | time_range | min_quantity
+    rule_type = Column(Text, nullable=False)
+    rule_value = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Coupon(Base):
+    __tablename__ = "coupons"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    code = Column(Text, unique=True, nullable=False)
+    promotion_id = Column(UUID(as_uuid=True), ForeignKey("promotions.id", ondelete="CASCADE"), nullable=False)
+    is_active = Column(Boolean, server_default="true")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CouponUsage(Base):
+    __tablename__ = "coupon_usage"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    coupon_id = Column(UUID(as_uuid=True), ForeignKey("coupons.id", ondelete="CASCADE"), nullable=False)
+    customer_id = Column(UUID(as_uuid=True), nullable=False)
+    booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id", ondelete="CASCADE"), unique=True, nullable=False)
+    discount_amount = Column(Numeric(10, 2), nullable=False)
+    used_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    type = Column(Text, nullable=False)
+    title = Column(Text, nullable=False)
+    message = Column(Text, nullable=False)
+    data = Column(JSONB, server_default="{}")
+    channels = Column(ARRAY(Text), server_default="{push,in_app}")
+    is_read = Column(Boolean, server_default="false")
+    read_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,67 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from app.core.database import Base
+
+
+class ServiceCategory(Base):
+    __tablename__ = "service_categories"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    name = Column(Text, unique=True, nullable=False)
+    slug = Column(Text, unique=True, nullable=False)
+    description = Column(Text)
+    icon = Column(Text)
+    image_url = Column(Text)
+    display_order = Column(Integer, server_default="0")
+    is_active = Column(Boolean, server_default="true")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Service(Base):
+    __tablename__ = "services"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    name = Column(Text, nullable=False)
+    slug = Column(Text, unique=True, nullable=False)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("service_categories.id", ondelete="SET NULL"))
+    description = Column(Text)
+    short_description = Column(Text)
+    benefits = Column(ARRAY(Text))
+    duration = Column(Integer, nullable=False)
+    base_price = Column(Numeric(10, 2), nullable=False)
+    discounted_price = Column(Numeric(10, 2))
+    image_url = Column(Text)
+    images = Column(ARRAY(Text))
+    techniques = Column(Text)
+    focus_areas = Column(ARRAY(Text))
+    contraindications = Column(Text)
+    is_popular = Column(Boolean, server_default="false")
+    is_featured = Column(Boolean, server_default="false")
+    is_active = Column(Boolean, server_default="true")
+    display_order = Column(Integer, server_default="0")
+    metadata_ = Column("metadata", JSONB, server_default="{}")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ServicePricingTier(Base):
+    """Unit price of a service from `min_quantity` sessions upwards"""
+    __tablename__ = "service_pricing_tiers"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    service_id = Column(UUID(as_uuid=True), ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    min_quantity = Column(Integer, nullable=False)
+    price = Column(Numeric(10, 2), nullable=False)
+    is_active = Column(Boolean, server_default="true")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ServiceTag(Base):
+    __tablename__ = "service_tags"
+    __table_args__ = (UniqueConstraint("service_id", "tag"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    service_id = Column(UUID(as_uuid=True), ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    tag = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
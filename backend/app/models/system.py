@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Text, func
+from sqlalchemy.dialects.postgresql import INET, JSONB, UUID
+from app.core.database import Base
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_logs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    user_id = Column(UUID(as_uuid=True))
+    action = Column(Text, nullable=False)
+    resource_type = Column(Text, nullable=False)
+    resource_id = Column(UUID(as_uuid=True))
+    old_values = Column(JSONB)
+    new_values = Column(JSONB)
+    ip_address = Column(INET)
+    user_agent = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
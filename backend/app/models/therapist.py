@@ -0,0 +1,115 @@
+from sqlalchemy import (
+    Boolean, Column, Computed, Date, DateTime, ForeignKey, Integer, Numeric, Text, Time, func
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from app.core.database import Base
+
+
+class Therapist(Base):
+    __tablename__ = "therapists"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    user_id = Column(UUID(as_uuid=True), unique=True)
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+    name = Column(Text, nullable=False)
+    email = Column(Text)
+    mobile = Column(Text, nullable=False)
+    gender = Column(Text)
+    date_of_birth = Column(Date)
+    profile_image = Column(Text)
+    specialization = Column(ARRAY(Text))
+    experience_years = Column(Integer, server_default="0")
+    certifications = Column(JSONB, server_default="[]")
+    languages = Column(ARRAY(Text))
+    rating = Column(Numeric(3, 2), server_default="0.00")
+    total_reviews = Column(Integer, server_default="0")
+    total_services = Column(Integer, server_default="0")
+    total_earnings = Column(Numeric(12, 2), server_default="0")
+    status = Column(Text, server_default="active")
+    availability_status = Column(Text, server_default="offline")
+    address = Column(JSONB)
+    emergency_contact = Column(JSONB)
+    bank_details = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TherapistSchedule(Base):
+    __tablename__ = "therapist_schedules"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    therapist_id = Column(UUID(as_uuid=True), ForeignKey("therapists.id", ondelete="CASCADE"), nullable=False)
+    day_of_week = Column(Integer, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    is_available = Column(Boolean, server_default="true")
+    break_start = Column(Time)
+    break_end = Column(Time)
+    max_bookings = Column(Integer, server_default="5")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TherapistLeave(Base):
+    __tablename__ = "therapist_leaves"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    therapist_id = Column(UUID(as_uuid=True), ForeignKey("therapists.id", ondelete="CASCADE"), nullable=False)
+    leave_type = Column(Text, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    total_days = Column(Integer, Computed("end_date - start_date + 1"))
+    reason = Column(Text, nullable=False)
+    status = Column(Text, server_default="pending")
+    approved_by = Column(UUID(as_uuid=True))
+    approved_at = Column(DateTime(timezone=True))
+    rejection_reason = Column(Text)
+    documents = Column(ARRAY(Text))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TherapistAssignment(Base):
+    __tablename__ = "therapist_assignments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    booking_id = Column(UUID(as_uuid=True), nullable=False)
+    therapist_id = Column(UUID(as_uuid=True), ForeignKey("therapists.id", ondelete="RESTRICT"), nullable=False)
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id", ondelete="RESTRICT"), nullable=False)
+    customer_id = Column(UUID(as_uuid=True), nullable=False)
+    service_id = Column(UUID(as_uuid=True), nullable=False)
+    assignment_date = Column(Date, nullable=False)
+    assignment_time = Column(Time, nullable=False)
+    status = Column(Text, server_default="assigned")
+    location_address = Column(Text, nullable=False)
+    location_latitude = Column(Numeric(10, 8))
+    location_longitude = Column(Numeric(11, 8))
+    estimated_duration = Column(Integer, nullable=False)
+    actual_start_time = Column(DateTime(timezone=True))
+    actual_end_time = Column(DateTime(timezone=True))
+    actual_duration = Column(Integer)
+    distance_traveled = Column(Numeric(10, 2))
+    travel_time = Column(Integer)
+    customer_rating = Column(Integer)
+    customer_feedback = Column(Text)
+    tips_amount = Column(Numeric(10, 2), server_default="0")
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TherapistLocation(Base):
+    __tablename__ = "therapist_locations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    therapist_id = Column(UUID(as_uuid=True), ForeignKey("therapists.id", ondelete="CASCADE"), nullable=False)
+    booking_id = Column(UUID(as_uuid=True))
+    latitude = Column(Numeric(10, 8), nullable=False)
+    longitude = Column(Numeric(11, 8), nullable=False)
+    accuracy = Column(Numeric(10, 2))
+    altitude = Column(Numeric(10, 2))
+    speed = Column(Numeric(10, 2))
+    heading = Column(Numeric(5, 2))
+    battery_level = Column(Integer)
+    is_moving = Column(Boolean, server_default="false")
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, DateTime, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from app.core.database import Base
+
+
+class UserProfile(Base):
+    __tablename__ = "user_profiles"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    name = Column(Text, nullable=False)
+    mobile = Column(Text, unique=True, nullable=False)
+    email = Column(Text)
+    gender = Column(Text)
+    date_of_birth = Column(Date)
+    profile_image = Column(Text)
+    role = Column(Text, nullable=False)
+    employee_id = Column(Text, unique=True)
+    department_id = Column(UUID(as_uuid=True))
+    designation = Column(Text)
+    joining_date = Column(Date)
+    status = Column(Text, server_default="active")
+    address = Column(JSONB)
+    emergency_contact = Column(JSONB)
+    preferences = Column(JSONB, server_default="{}")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,44 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, Text, Time, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from app.core.database import Base
+
+
+class Vendor(Base):
+    __tablename__ = "vendors"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    user_id = Column(UUID(as_uuid=True), unique=True)
+    business_name = Column(Text, nullable=False)
+    business_type = Column(Text)
+    registration_number = Column(Text)
+    gst_number = Column(Text)
+    pan_number = Column(Text)
+    contact_person = Column(Text, nullable=False)
+    contact_mobile = Column(Text, nullable=False)
+    contact_email = Column(Text, nullable=False)
+    business_address = Column(JSONB, nullable=False)
+    operating_hours = Column(JSONB)
+    services_offered = Column(ARRAY(UUID(as_uuid=True)))
+    rating = Column(Numeric(3, 2), server_default="0.00")
+    total_reviews = Column(Integer, server_default="0")
+    total_bookings = Column(Integer, server_default="0")
+    verification_status = Column(Text, server_default="pending")
+    verification_documents = Column(JSONB)
+    commission_rate = Column(Numeric(5, 2), server_default="15.00")
+    status = Column(Text, server_default="active")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class VendorAvailability(Base):
+    __tablename__ = "vendor_availability"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+    day_of_week = Column(Integer, nullable=False)
+    open_time = Column(Time, nullable=False)
+    close_time = Column(Time, nullable=False)
+    is_open = Column(Boolean, server_default="true")
+    break_start = Column(Time)
+    break_end = Column(Time)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
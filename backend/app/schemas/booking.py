@@ -1,11 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime, date, time
 
 class ServiceItem(BaseModel):
     service_id: str
-    quantity: int = 1
-    price: float
+    quantity: int = Field(1, ge=1, le=20)
+    # Informational only: prices and durations come from the pricing engine
+    price: Optional[float] = None
+    duration: Optional[int] = Field(None, ge=15, le=480)
 
 class BookingCreate(BaseModel):
     vendor_id: str
@@ -14,6 +16,15 @@ class BookingCreate(BaseModel):
     booking_time: time
     location: dict
     special_requests: Optional[str] = None
+    therapist_id: Optional[str] = None
+    coupon_code: Optional[str] = None
+
+class PriceQuoteRequest(BaseModel):
+    vendor_id: str
+    services: List[ServiceItem] = Field(..., min_length=1)
+    booking_date: Optional[date] = None
+    booking_time: Optional[time] = None
+    coupon_code: Optional[str] = None
 
 class BookingUpdate(BaseModel):
     booking_date: Optional[date] = None
@@ -47,3 +58,25 @@ class TherapistAssignmentUpdate(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     notes: Optional[str] = None
+
+class AutoAssignRequest(BaseModel):
+    booking_date: date
+    # Booking numbers to match; all of the day's unassigned bookings when left out
+    booking_ids: Optional[List[str]] = Field(None, min_length=1, max_length=2000)
+    max_distance_km: float = Field(25, gt=0, le=200)
+    require_skill: bool = True
+    weights: Optional[Dict[str, float]] = None
+    apply: bool = False
+
+class BookingEvent(BaseModel):
+    event_id: str
+    type: str
+    booking_id: str
+    status: str
+    previous_status: Optional[str] = None
+    actor_id: Optional[str] = None
+    actor_role: Optional[str] = None
+    customer_id: Optional[str] = None
+    vendor_id: Optional[str] = None
+    details: Dict[str, Any] = {}
+    occurred_at: datetime
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+class LocationFix(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+    accuracy: Optional[float] = None
+    altitude: Optional[float] = None
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+    battery_level: Optional[int] = Field(None, ge=0, le=100)
+    booking_id: Optional[str] = None
+
+class LocationBatch(BaseModel):
+    fixes: List[LocationFix] = Field(..., min_length=1, max_length=500)
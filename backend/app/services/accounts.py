@@ -0,0 +1,96 @@
+import uuid
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Booking, Therapist, UserProfile, Vendor
+
+# subject issued by the OTP/password login stubs: user_<mobile>
+MOBILE_SUBJECT_PREFIX = "user_"
+
+
+def parse_uuid(value: object) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+async def user_ids(db: AsyncSession, subjects: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """
+    Auth user id for each access token subject that has one.
+
+    Subjects are the auth user id itself, or `user_<mobile>` from the
+    login stubs, looked up by the profile's mobile number. Subjects that
+    match no user are left out.
+    """
+    resolved: Dict[str, uuid.UUID] = {}
+    by_mobile: Dict[str, str] = {}
+    for subject in set(subjects):
+        parsed = parse_uuid(subject)
+        if parsed:
+            resolved[subject] = parsed
+        elif subject.startswith(MOBILE_SUBJECT_PREFIX):
+            by_mobile[subject[len(MOBILE_SUBJECT_PREFIX):]] = subject
+    if by_mobile:
+        rows = await db.execute(
+            select(UserProfile.mobile, UserProfile.id).where(UserProfile.mobile.in_(list(by_mobile)))
+        )
+        for mobile, profile_id in rows.all():
+            resolved[by_mobile[mobile]] = profile_id
+    return resolved
+
+
+async def user_id(db: AsyncSession, subject: str) -> Optional[uuid.UUID]:
+    return (await user_ids(db, [subject])).get(subject)
+
+
+async def employee_id(db: AsyncSession, subject: str) -> Optional[uuid.UUID]:
+    """`employees.id` of the subject; an employee record shares its auth user's id"""
+    return await user_id(db, subject)
+
+
+async def vendor_ids(db: AsyncSession, subjects: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """`vendors.id` of the vendor account behind each subject"""
+    users = await user_ids(db, subjects)
+    if not users:
+        return {}
+    rows = await db.execute(select(Vendor.user_id, Vendor.id).where(Vendor.user_id.in_(list(users.values()))))
+    by_user = dict(rows.all())
+    return {subject: by_user[user] for subject, user in users.items() if user in by_user}
+
+
+async def vendor_id(db: AsyncSession, subject: str) -> Optional[uuid.UUID]:
+    return (await vendor_ids(db, [subject])).get(subject)
+
+
+async def therapist_ids(db: AsyncSession, subjects: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """`therapists.id` of the therapist account behind each subject"""
+    users = await user_ids(db, subjects)
+    if not users:
+        return {}
+    rows = await db.execute(
+        select(Therapist.user_id, Therapist.id).where(Therapist.user_id.in_(list(users.values())))
+    )
+    by_user = dict(rows.all())
+    return {subject: by_user[user] for subject, user in users.items() if user in by_user}
+
+
+async def therapist_id(db: AsyncSession, subject: str) -> Optional[uuid.UUID]:
+    return (await therapist_ids(db, [subject])).get(subject)
+
+
+async def booking_ids(db: AsyncSession, booking_numbers: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """
+    `bookings.id` by booking number. Everything outside the database
+    (reservations, caches, events, clients) knows a booking by its
+    number; bookings not written yet are left out.
+    """
+    numbers = list(set(booking_numbers))
+    if not numbers:
+        return {}
+    rows = await db.execute(select(Booking.booking_number, Booking.id).where(Booking.booking_number.in_(numbers)))
+    return dict(rows.all())
+
+
+async def booking_id(db: AsyncSession, booking_number: str) -> Optional[uuid.UUID]:
+    return (await booking_ids(db, [booking_number])).get(booking_number)
@@ -0,0 +1,351 @@
+import time
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.geohash import EARTH_RADIUS_KM
+from app.models import Booking, BookingService, Therapist, TherapistAssignment
+from app.services.accounts import MOBILE_SUBJECT_PREFIX
+from app.services.availability import SLOTS_PER_DAY, availability, busy_span
+from app.services.fleet import fleet, MAX_POSITION_AGE
+from app.services.reservations import reservations
+from app.services.vendor_index import service_slug
+
+DEFAULT_WEIGHTS = {
+    "distance": 1.0,   # per km travelled
+    "skill": 10.0,     # missing specialization, when not required
+    "rating": 2.0,     # per rating point below 5
+    "load": 1.5,       # per assignment already on the therapist's day
+}
+DEFAULT_MAX_DISTANCE_KM = 25.0
+# Largest batch matched at once, on either side
+MAX_PROBLEM_SIZE = 2000
+
+INFEASIBLE = 1e9
+
+
+def distance_matrix(origins: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Haversine km between every (lat, lon) row of `origins` and of `targets`"""
+    lat1 = np.radians(origins[:, 0])[:, None]
+    lon1 = np.radians(origins[:, 1])[:, None]
+    lat2 = np.radians(targets[:, 0])[None, :]
+    lon2 = np.radians(targets[:, 1])[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def skill_matrix(bookings: List[Dict[str, Any]], therapists: List[Dict[str, Any]]) -> np.ndarray:
+    """True where the therapist has the booking's service (or it needs none)"""
+    vocabulary: Dict[str, int] = {}
+    wanted = np.full(len(bookings), -1)
+    for i, booking in enumerate(bookings):
+        if booking.get("service"):
+            wanted[i] = vocabulary.setdefault(service_slug(booking["service"]), len(vocabulary))
+
+    has_skill = np.zeros((len(therapists), len(vocabulary) + 1), dtype=bool)
+    for j, therapist in enumerate(therapists):
+        for skill in therapist.get("skills") or []:
+            index = vocabulary.get(service_slug(skill))
+            if index is not None:
+                has_skill[j, index] = True
+    # the extra last column stands for "no service requested" and always matches
+    has_skill[:, -1] = True
+    return has_skill[:, wanted].T
+
+
+def points(items: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([[item["latitude"], item["longitude"]] for item in items], dtype=float)
+
+
+def cost_matrix(
+    bookings: List[Dict[str, Any]],
+    therapists: List[Dict[str, Any]],
+    distance: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+    max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
+    require_skill: bool = True,
+    feasible: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Bookings x therapists cost matrix over a precomputed `distance`
+    matrix. Pairs beyond `max_distance_km`,
+    lacking the skill (when required) or masked out by `feasible` (e.g.
+    not free at the booking time) cost INFEASIBLE.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    rating = np.array([float(t.get("rating") or 0) for t in therapists])
+    load = np.array([float(t.get("load") or 0) for t in therapists])
+
+    skilled = skill_matrix(bookings, therapists)
+
+    cost = (
+        weights["distance"] * distance
+        + (weights["rating"] * (5.0 - rating) + weights["load"] * load)[None, :]
+    )
+    if require_skill:
+        cost[~skilled] = INFEASIBLE
+    else:
+        cost += weights["skill"] * ~skilled
+    cost[distance > max_distance_km] = INFEASIBLE
+    if feasible is not None:
+        cost[~feasible] = INFEASIBLE
+    return cost
+
+
+def assign(
+    bookings: List[Dict[str, Any]],
+    therapists: List[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
+    require_skill: bool = True,
+    feasible: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Minimum-cost matching of pending bookings to available therapists,
+    at most one booking per therapist. Bookings with no feasible
+    therapist are returned as unassigned.
+    """
+    if not bookings or not therapists:
+        return {"assignments": [], "unassigned": [b["booking_id"] for b in bookings], "total_cost": 0.0}
+
+    distance = distance_matrix(points(bookings), points(therapists))
+    cost = cost_matrix(bookings, therapists, distance, weights, max_distance_km, require_skill, feasible)
+    rows, cols = linear_sum_assignment(cost)
+
+    assignments = []
+    assigned = set()
+    total = 0.0
+    for i, j in zip(rows, cols):
+        if cost[i, j] >= INFEASIBLE:
+            continue
+        assigned.add(i)
+        total += float(cost[i, j])
+        assignments.append({
+            "booking_id": bookings[i]["booking_id"],
+            "therapist_id": therapists[j]["therapist_id"],
+            "distance": round(float(distance[i, j]), 2),
+            "cost": round(float(cost[i, j]), 3)
+        })
+
+    return {
+        "assignments": assignments,
+        "unassigned": [b["booking_id"] for i, b in enumerate(bookings) if i not in assigned],
+        "total_cost": round(total, 3)
+    }
+
+
+def _coordinates(location: Any) -> Optional[Tuple[float, float]]:
+    try:
+        latitude, longitude = float(location["latitude"]), float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def _slot_array(slots: str) -> np.ndarray:
+    """Cached '0'/'1' slot string as a boolean row"""
+    return np.frombuffer(slots.encode(), dtype=np.uint8) == ord("1")
+
+
+async def feasibility(
+    db: AsyncSession,
+    vendor_id: uuid.UUID,
+    day: date,
+    bookings: List[Dict[str, Any]],
+    therapists: List[Dict[str, Any]]
+) -> np.ndarray:
+    """
+    Bookings x therapists mask of pairs where the therapist works the
+    whole booking (schedule, leave and holidays, from availability) and
+    none of it is taken by another booking or a live reservation. Slots
+    a booking already holds itself do not count against it.
+    """
+    fields = await availability.get_day(db, str(vendor_id), day)
+    claims = await reservations.claims([t["therapist_id"] for t in therapists], day)
+
+    spans = np.zeros((len(bookings), SLOTS_PER_DAY), dtype=bool)
+    for i, booking in enumerate(bookings):
+        first, count = busy_span(booking["start"], booking["duration"])
+        spans[i, first:first + count] = True
+    index = {booking["booking_id"]: i for i, booking in enumerate(bookings)}
+
+    base = np.zeros((len(therapists), SLOTS_PER_DAY), dtype=bool)
+    taken: List[Dict[str, np.ndarray]] = []
+    for j, therapist in enumerate(therapists):
+        therapist_id = therapist["therapist_id"]
+        owners: Dict[str, np.ndarray] = {}
+        slots = fields.get(f"base:{therapist_id}")
+        if slots is not None:
+            base[j] = _slot_array(slots)
+            prefix = f"busy:{therapist_id}:"
+            for field, span in fields.items():
+                if field.startswith(prefix):
+                    first, count = map(int, span.split(":"))
+                    mask = owners.setdefault(field[len(prefix):], np.zeros(SLOTS_PER_DAY, dtype=bool))
+                    mask[first:first + count] = True
+            for slot, owner in claims.get(therapist_id, {}).items():
+                owners.setdefault(owner, np.zeros(SLOTS_PER_DAY, dtype=bool))[slot] = True
+        taken.append(owners)
+
+    free = base.copy()
+    for j, owners in enumerate(taken):
+        for mask in owners.values():
+            free[j] &= ~mask
+    feasible = (spans.astype(np.int32) @ (~free).T.astype(np.int32)) == 0
+    # recheck the pairs where the booking itself is one of the owners
+    for j, owners in enumerate(taken):
+        for owner in owners:
+            i = index.get(owner)
+            if i is None:
+                continue
+            own_free = base[j].copy()
+            for other, mask in owners.items():
+                if other != owner:
+                    own_free &= ~mask
+            feasible[i, j] = not (spans[i] & ~own_free).any()
+    return feasible
+
+
+async def load_problem(
+    db: AsyncSession,
+    vendor_id: uuid.UUID,
+    day: date,
+    booking_numbers: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[np.ndarray]]:
+    """
+    `assign` inputs for a vendor's day, read from the database and the
+    fleet rather than taken from the caller: its bookings that still
+    need a therapist (only `booking_numbers` among them, if given), its
+    active therapists that are available with a fresh position, and
+    their `feasibility` mask. Bookings without coordinates or services
+    cannot be routed and are left out.
+    """
+    assigned = select(TherapistAssignment.booking_id).where(TherapistAssignment.status != "cancelled")
+    query = (
+        select(Booking.id, Booking.booking_number, Booking.customer_id, Booking.booking_time, Booking.service_location)
+        .where(
+            Booking.vendor_id == vendor_id,
+            Booking.booking_date == day,
+            Booking.status.in_(("pending", "confirmed")),
+            Booking.id.not_in(assigned)
+        )
+        .order_by(Booking.booking_time)
+        .limit(MAX_PROBLEM_SIZE)
+    )
+    if booking_numbers is not None:
+        query = query.where(Booking.booking_number.in_(list(booking_numbers)))
+    rows = (await db.execute(query)).all()
+    items: Dict[uuid.UUID, List[Any]] = {}
+    if rows:
+        for item in (await db.execute(
+            select(
+                BookingService.booking_id, BookingService.service_id, BookingService.service_name,
+                BookingService.service_duration, BookingService.quantity
+            )
+            .where(BookingService.booking_id.in_([row.id for row in rows]))
+            .order_by(BookingService.created_at)
+        )).all():
+            items.setdefault(item.booking_id, []).append(item)
+    bookings = []
+    for row in rows:
+        point = _coordinates(row.service_location)
+        lines = items.get(row.id)
+        if not point or not lines:
+            continue
+        bookings.append({
+            "booking_id": row.booking_number, "latitude": point[0], "longitude": point[1],
+            "service": lines[0].service_name,
+            # what `persist` needs to write the assignment
+            "id": row.id,
+            "customer_id": row.customer_id,
+            "service_id": lines[0].service_id,
+            "address": row.service_location.get("address") or "",
+            "start": row.booking_time,
+            "duration": sum(line.service_duration * (line.quantity or 1) for line in lines)
+        })
+
+    rows = (await db.execute(
+        select(Therapist.id, Therapist.user_id, Therapist.mobile, Therapist.specialization, Therapist.rating)
+        .where(Therapist.vendor_id == vendor_id, Therapist.status == "active")
+        .limit(MAX_PROBLEM_SIZE)
+    )).all()
+    if not bookings or not rows:
+        return bookings, [], None
+    load = dict((await db.execute(
+        select(TherapistAssignment.therapist_id, func.count())
+        .where(
+            TherapistAssignment.therapist_id.in_([row.id for row in rows]),
+            TherapistAssignment.assignment_date == day,
+            TherapistAssignment.status != "cancelled"
+        )
+        .group_by(TherapistAssignment.therapist_id)
+    )).all())
+
+    # the fleet knows therapists by their token subject: the user id, or user_<mobile>
+    subjects = {
+        row.id: ([str(row.user_id)] if row.user_id else []) + [MOBILE_SUBJECT_PREFIX + row.mobile]
+        for row in rows
+    }
+    positions = await fleet.get_positions([subject for keys in subjects.values() for subject in keys])
+    fresh_after = time.time() - MAX_POSITION_AGE
+    therapists = []
+    for row in rows:
+        position = next((positions[key] for key in subjects[row.id] if positions.get(key)), None)
+        if not position or position["status"] != "available" or position["updated_at"] < fresh_after:
+            continue
+        therapists.append({
+            "therapist_id": str(row.id),
+            "latitude": position["latitude"],
+            "longitude": position["longitude"],
+            "skills": row.specialization or [],
+            "rating": float(row.rating or 0),
+            "load": load.get(row.id, 0)
+        })
+    if not therapists:
+        return bookings, therapists, None
+    return bookings, therapists, await feasibility(db, vendor_id, day, bookings, therapists)
+
+
+async def persist(
+    db: AsyncSession,
+    vendor_id: uuid.UUID,
+    day: date,
+    bookings: List[Dict[str, Any]],
+    assignments: List[Dict[str, Any]]
+) -> None:
+    """
+    Write an applied plan: a TherapistAssignment row per match, then the
+    therapist's time marked busy in the cached availability. Assigned
+    bookings drop out of `load_problem`, so rerunning the day does not
+    hand them to someone else.
+    """
+    by_number = {booking["booking_id"]: booking for booking in bookings}
+    chosen = [(by_number[match["booking_id"]], match["therapist_id"]) for match in assignments]
+    if not chosen:
+        return
+    await db.execute(insert(TherapistAssignment), [
+        {
+            "booking_id": booking["id"],
+            "therapist_id": uuid.UUID(therapist_id),
+            "vendor_id": vendor_id,
+            "customer_id": booking["customer_id"],
+            "service_id": booking["service_id"],
+            "assignment_date": day,
+            "assignment_time": booking["start"],
+            "location_address": booking["address"],
+            "location_latitude": booking["latitude"],
+            "location_longitude": booking["longitude"],
+            "estimated_duration": booking["duration"]
+        }
+        for booking, therapist_id in chosen
+    ])
+    await db.commit()
+    for booking, therapist_id in chosen:
+        await availability.occupy(
+            booking["booking_id"], str(vendor_id), day, therapist_id, booking["start"], booking["duration"]
+        )
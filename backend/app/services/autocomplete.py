@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import logging
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, insert, select
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.core.streams import StreamConsumer, Entry
+from app.models import SearchQuery, Service, ServiceCategory, ServiceTag, Vendor
+
+logger = logging.getLogger(__name__)
+
+REBUILD_INTERVAL = 300
+POPULARITY_WINDOW = timedelta(days=30)
+# Most frequent logged queries considered per rebuild
+POPULAR_QUERIES = 50000
+# A logged query only credits the suggestions it completes when it is
+# specific enough; "m" completes half the catalogue and says nothing.
+CREDIT_FANOUT = 25
+# Answers for prefixes up to this length are ranked at build time, since
+# their key ranges are the widest and they are what the first keystrokes hit.
+PRECOMPUTED_PREFIX = 3
+MAX_SUGGESTIONS = 10
+
+# Searches are logged to a stream and written to SearchQuery in batches
+SEARCH_LOG_STREAM = "search:queries"
+SEARCH_LOG_GROUP = "search-log"
+SEARCH_LOG_MAXLEN = 100000
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents stripped, punctuation collapsed to single spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _keys(text: str) -> Iterable[str]:
+    """Every word-suffix of `text`, so "tissue" finds "Deep Tissue Massage" too"""
+    words = normalize(text).split()
+    for i in range(len(words)):
+        yield " ".join(words[i:])
+
+
+@dataclass
+class PrefixIndex:
+    """
+    Immutable sorted-array prefix index.
+
+    `keys` is sorted and `refs[i]` is the suggestion `keys[i]` points to,
+    so all completions of a prefix are one contiguous slice found with two
+    bisects. Built once per rebuild and then only read, which is what
+    lets the swap be a single reference assignment.
+    """
+    suggestions: List[Tuple[str, str, str]] = field(default_factory=list)  # (kind, id, label)
+    scores: List[float] = field(default_factory=list)
+    keys: List[str] = field(default_factory=list)
+    refs: array = field(default_factory=lambda: array("I"))
+    top: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+    built_at: Optional[datetime] = None
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "\uffff")
+
+    def _best(self, refs: Iterable[int], limit: int) -> List[int]:
+        return heapq.nlargest(limit, set(refs), key=lambda ref: (self.scores[ref], -len(self.suggestions[ref][2])))
+
+    def completions(self, prefix: str) -> List[int]:
+        lo, hi = self._range(prefix)
+        return list(self.refs[lo:hi])
+
+    def lookup(self, text: str, limit: int = MAX_SUGGESTIONS) -> List[Dict[str, Any]]:
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        if len(prefix) <= PRECOMPUTED_PREFIX:
+            best = self.top.get(prefix, ())[:limit]
+        else:
+            best = self._best(self.completions(prefix), limit)
+        return [
+            {"type": kind, "id": item_id, "label": label, "score": round(self.scores[ref], 3)}
+            for ref in best
+            for kind, item_id, label in [self.suggestions[ref]]
+        ]
+
+
+def build_index(
+    entries: Sequence[Tuple[str, str, str, Sequence[str], float]],
+    query_counts: Sequence[Tuple[str, int]]
+) -> PrefixIndex:
+    """
+    `entries` are (kind, id, label, extra terms, prior score); extra terms
+    (tags, category names) find the suggestion but are never shown.
+    `query_counts` are (query, times searched) from the search log.
+    """
+    index = PrefixIndex()
+    pairs = []
+    for kind, item_id, label, terms, prior in entries:
+        ref = len(index.suggestions)
+        index.suggestions.append((kind, item_id, label))
+        index.scores.append(prior)
+        for term in (label, *terms):
+            pairs.extend((key, ref) for key in _keys(term))
+    pairs = sorted(set(pairs))
+    index.keys = [key for key, _ in pairs]
+    index.refs = array("I", (ref for _, ref in pairs))
+
+    for query, count in query_counts:
+        prefix = normalize(query)
+        if not prefix:
+            continue
+        completed = set(index.completions(prefix))
+        if 0 < len(completed) <= CREDIT_FANOUT:
+            for ref in completed:
+                index.scores[ref] += math.log1p(count)
+
+    grouped: Dict[str, List[int]] = {}
+    for key, ref in pairs:
+        for length in range(1, min(len(key), PRECOMPUTED_PREFIX) + 1):
+            grouped.setdefault(key[:length], []).append(ref)
+    index.top = {prefix: tuple(index._best(refs, MAX_SUGGESTIONS)) for prefix, refs in grouped.items()}
+    index.built_at = datetime.now(timezone.utc)
+    return index
+
+
+async def _load() -> Tuple[list, list]:
+    async with AsyncSessionLocal() as session:
+        categories = {
+            str(row.id): row.name for row in (await session.execute(
+                select(ServiceCategory.id, ServiceCategory.name).where(ServiceCategory.is_active.is_(True))
+            )).all()
+        }
+        tags: Dict[str, List[str]] = {}
+        for row in (await session.execute(select(ServiceTag.service_id, ServiceTag.tag))).all():
+            tags.setdefault(str(row.service_id), []).append(row.tag)
+        services = (await session.execute(
+            select(Service.id, Service.name, Service.category_id, Service.is_popular).where(Service.is_active.is_(True))
+        )).all()
+        vendors = (await session.execute(
+            select(Vendor.id, Vendor.business_name, Vendor.total_bookings).where(
+                Vendor.status == "active", Vendor.verification_status == "verified"
+            )
+        )).all()
+        query_counts = (await session.execute(
+            select(func.lower(SearchQuery.query), func.count())
+            .where(SearchQuery.created_at >= datetime.now(timezone.utc) - POPULARITY_WINDOW)
+            .group_by(func.lower(SearchQuery.query))
+            .order_by(func.count().desc())
+            .limit(POPULAR_QUERIES)
+        )).all()
+
+    entries = [("category", category_id, name, (), 0.0) for category_id, name in categories.items()]
+    entries += [
+        (
+            "service", str(s.id), s.name,
+            [*tags.get(str(s.id), ()), categories.get(str(s.category_id), "")],
+            1.0 if s.is_popular else 0.0
+        )
+        for s in services
+    ]
+    entries += [
+        ("vendor", str(v.id), v.business_name, (), math.log1p(v.total_bookings or 0) / 4)
+        for v in vendors
+    ]
+    return entries, [(query, count) for query, count in query_counts]
+
+
+def settled_queries(entries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The searches a batch of logged keystrokes amounts to. A search box
+    logs "s", "sw", "swed", "swedish" as one customer types; only the
+    last query of such a chain from the same searcher is kept.
+    """
+    kept: List[Optional[Dict[str, Any]]] = []
+    last: Dict[str, int] = {}
+    for entry in entries:
+        previous = last.get(entry["searcher"])
+        if previous is not None and normalize(entry["query"]).startswith(normalize(kept[previous]["query"])):
+            kept[previous] = None
+        last[entry["searcher"]] = len(kept)
+        kept.append(entry)
+    return [entry for entry in kept if entry is not None]
+
+
+class Autocomplete:
+    """
+    Keystroke-rate suggestions over services, tags, categories and vendors.
+
+    Lookups only read the current PrefixIndex, never the database. A
+    background task rebuilds the index from scratch every REBUILD_INTERVAL
+    off the event loop and swaps it in with one assignment, so a lookup
+    always sees either the old index or the new one, never a mix.
+
+    Searches are logged with one XADD each and written to SearchQuery
+    by a consumer group in batches, which is where the popularity the
+    index is ranked by comes from.
+    """
+
+    def __init__(self, interval: int = REBUILD_INTERVAL):
+        self.interval = interval
+        self._index = PrefixIndex()
+        self._task: Optional[asyncio.Task] = None
+        self._log_consumer = StreamConsumer(SEARCH_LOG_STREAM, SEARCH_LOG_GROUP, self.persist_queries, delete_acked=True)
+
+    async def rebuild(self):
+        entries, query_counts = await _load()
+        index = await asyncio.to_thread(build_index, entries, query_counts)
+        self._index = index
+        logger.info("Autocomplete index rebuilt: %d suggestions, %d keys", len(index.suggestions), len(index.keys))
+
+    def suggest(self, text: str, limit: int = MAX_SUGGESTIONS) -> List[Dict[str, Any]]:
+        return self._index.lookup(text, limit)
+
+    async def log_query(self, query: str, results_count: int, searcher: str) -> None:
+        """Record a search; `searcher` only groups one person's keystrokes and is not stored"""
+        if not normalize(query):
+            return
+        await redis_client.stream_add(SEARCH_LOG_STREAM, {
+            "query": query,
+            "results_count": results_count,
+            "searcher": searcher,
+            "searched_at": datetime.now(timezone.utc).isoformat()
+        }, maxlen=SEARCH_LOG_MAXLEN)
+
+    async def persist_queries(self, entries: List[Entry]) -> List[str]:
+        rows = [
+            {
+                "query": entry["query"],
+                "results_count": entry["results_count"],
+                "created_at": datetime.fromisoformat(entry["searched_at"])
+            }
+            for entry in settled_queries([entry for _, entry in entries])
+        ]
+        if rows:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(SearchQuery), rows)
+                await session.commit()
+        return [entry_id for entry_id, _ in entries]
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Autocomplete rebuild failed, keeping the previous index")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._log_consumer.start()
+
+    async def stop(self):
+        await self._log_consumer.stop()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+autocomplete = Autocomplete()
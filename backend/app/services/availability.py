@@ -0,0 +1,296 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.redis_client import redis_client
+from app.models import (
+    Booking, Therapist, TherapistSchedule, TherapistLeave, TherapistAssignment,
+    VendorAvailability, Holiday
+)
+from app.services.reservations import reservations
+from app.services.vendor_index import service_slug
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+DAY_KEY = "availability:{}:{}"
+DAY_TTL = 6 * 3600
+
+# Cached vendor-days dropped when a schedule changes: every future day
+# with that weekday may be cached, up to this far ahead
+CACHE_HORIZON_DAYS = 90
+
+# KEYS: vendor-day hash; ARGV: therapist_id, first slot, slot count, occupy|release, booking_id
+# Each booking's span is kept in a busy:<therapist>:<booking> field, so a
+# release frees only the slots no other booking of the therapist covers.
+UPDATE_SCRIPT = """
+local free = redis.call('HGET', KEYS[1], 'free:' .. ARGV[1])
+if not free then
+    return 0
+end
+local first = tonumber(ARGV[2])
+local count = tonumber(ARGV[3])
+local prefix = 'busy:' .. ARGV[1] .. ':'
+local fill
+if ARGV[4] == 'release' then
+    redis.call('HDEL', KEYS[1], prefix .. ARGV[5])
+    local base = redis.call('HGET', KEYS[1], 'base:' .. ARGV[1]) or free
+    local slots = {}
+    for i = first + 1, first + count do
+        slots[#slots + 1] = string.sub(base, i, i)
+    end
+    local fields = redis.call('HGETALL', KEYS[1])
+    for i = 1, #fields, 2 do
+        if string.sub(fields[i], 1, #prefix) == prefix then
+            local other_first, other_count = string.match(fields[i + 1], '(%d+):(%d+)')
+            other_first = tonumber(other_first)
+            for slot = math.max(first, other_first), math.min(first + count, other_first + tonumber(other_count)) - 1 do
+                slots[slot - first + 1] = '0'
+            end
+        end
+    end
+    fill = table.concat(slots)
+else
+    redis.call('HSET', KEYS[1], prefix .. ARGV[5], first .. ':' .. count)
+    fill = string.rep('0', count)
+end
+redis.call('HSET', KEYS[1], 'free:' .. ARGV[1], string.sub(free, 1, first) .. fill .. string.sub(free, first + count + 1))
+return 1
+"""
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def window_bits(start: time, end: time) -> int:
+    """Slots lying entirely inside [start, end)"""
+    first = -(-_minutes(start) // SLOT_MINUTES)
+    last = _minutes(end) // SLOT_MINUTES
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def busy_span(start: time, duration: int) -> Tuple[int, int]:
+    """(first slot, slot count) touched by an appointment"""
+    begin = _minutes(start)
+    first = begin // SLOT_MINUTES
+    last = min(-(-(begin + duration) // SLOT_MINUTES), SLOTS_PER_DAY)
+    return first, max(last - first, 0)
+
+
+def busy_bits(start: time, duration: int) -> int:
+    first, count = busy_span(start, duration)
+    return ((1 << count) - 1) << first
+
+
+def to_slots(mask: int) -> str:
+    """Day mask as a '0'/'1' string, slot 0 first, as stored in Redis"""
+    return format(mask, f"0{SLOTS_PER_DAY}b")[::-1]
+
+
+def from_slots(slots: str) -> int:
+    return int(slots[::-1], 2)
+
+
+def start_bits(free: int, slot_count: int) -> int:
+    """Slots where `slot_count` consecutive free slots begin"""
+    starts = free
+    for shift in range(1, slot_count):
+        starts &= free >> shift
+    return starts
+
+
+def _dow(day: date) -> int:
+    # Matches the schema's day_of_week: 0 = Sunday
+    return day.isoweekday() % 7
+
+
+class AvailabilityEngine:
+    """
+    Free-slot engine for vendors and therapists.
+
+    A day is 96 fifteen-minute slots. For each therapist of a vendor the
+    working day (TherapistSchedule intersected with VendorAvailability,
+    minus breaks, approved TherapistLeave and Holiday) is folded into a
+    bitmask, and live TherapistAssignments and confirmed reservations are
+    cleared from it. The masks for one vendor-day are cached together in
+    a Redis hash, so a free-slot query is one HGETALL plus a few shifts
+    and ANDs per therapist. New or cancelled assignments patch the cached
+    masks in place with a Lua script instead of rebuilding the day.
+    """
+
+    async def build_day(self, db: AsyncSession, vendor_id: str, day: date) -> Dict[str, str]:
+        dow = _dow(day)
+
+        vendor_hours = (await db.execute(
+            select(VendorAvailability).where(
+                VendorAvailability.vendor_id == vendor_id,
+                VendorAvailability.day_of_week == dow
+            )
+        )).scalar_one_or_none()
+        holiday = (await db.execute(select(Holiday).where(Holiday.date == day))).first()
+
+        fields: Dict[str, str] = {"built_at": datetime.utcnow().isoformat()}
+        if holiday or (vendor_hours and not vendor_hours.is_open):
+            return fields
+
+        vendor_mask = (1 << SLOTS_PER_DAY) - 1
+        if vendor_hours:
+            vendor_mask = window_bits(vendor_hours.open_time, vendor_hours.close_time)
+            if vendor_hours.break_start and vendor_hours.break_end:
+                vendor_mask &= ~window_bits(vendor_hours.break_start, vendor_hours.break_end)
+
+        rows = (await db.execute(
+            select(Therapist, TherapistSchedule)
+            .join(TherapistSchedule, TherapistSchedule.therapist_id == Therapist.id)
+            .where(
+                Therapist.vendor_id == vendor_id,
+                Therapist.status == "active",
+                TherapistSchedule.day_of_week == dow,
+                TherapistSchedule.is_available.is_(True)
+            )
+        )).all()
+        if not rows:
+            return fields
+
+        therapist_ids = [therapist.id for therapist, _ in rows]
+        on_leave = set((await db.execute(
+            select(TherapistLeave.therapist_id).where(
+                TherapistLeave.therapist_id.in_(therapist_ids),
+                TherapistLeave.status == "approved",
+                TherapistLeave.start_date <= day,
+                TherapistLeave.end_date >= day
+            )
+        )).scalars().all())
+        assignments = (await db.execute(
+            select(TherapistAssignment, Booking.booking_number)
+            .outerjoin(Booking, Booking.id == TherapistAssignment.booking_id)
+            .where(
+                TherapistAssignment.therapist_id.in_(therapist_ids),
+                TherapistAssignment.assignment_date == day,
+                TherapistAssignment.status != "cancelled"
+            )
+        )).all()
+
+        busy: Dict[Any, int] = {}
+        for assignment, booking_number in assignments:
+            first, count = busy_span(assignment.assignment_time, assignment.estimated_duration)
+            busy[assignment.therapist_id] = busy.get(assignment.therapist_id, 0) | ((1 << count) - 1) << first
+            fields[f"busy:{assignment.therapist_id}:{booking_number or assignment.id}"] = f"{first}:{count}"
+
+        # confirmed bookings not yet assigned exist only as reservation claims
+        by_str = {str(therapist_id): therapist_id for therapist_id in therapist_ids}
+        claims = await reservations.claims(list(by_str), day, confirmed_only=True)
+        for therapist_id, slots in claims.items():
+            owned: Dict[str, List[int]] = {}
+            for slot, owner in slots.items():
+                owned.setdefault(owner, []).append(slot)
+            for owner, claimed in owned.items():
+                field = f"busy:{therapist_id}:{owner}"
+                if field in fields:
+                    continue
+                first, count = min(claimed), max(claimed) - min(claimed) + 1
+                busy[by_str[therapist_id]] = busy.get(by_str[therapist_id], 0) | ((1 << count) - 1) << first
+                fields[field] = f"{first}:{count}"
+
+        for therapist, schedule in rows:
+            if therapist.id in on_leave:
+                continue
+            base = window_bits(schedule.start_time, schedule.end_time) & vendor_mask
+            if schedule.break_start and schedule.break_end:
+                base &= ~window_bits(schedule.break_start, schedule.break_end)
+            therapist_id = str(therapist.id)
+            fields[f"base:{therapist_id}"] = to_slots(base)
+            fields[f"free:{therapist_id}"] = to_slots(base & ~busy.get(therapist.id, 0))
+            fields[f"skills:{therapist_id}"] = ",".join(
+                service_slug(skill) for skill in therapist.specialization or []
+            )
+        return fields
+
+    async def get_day(self, db: AsyncSession, vendor_id: str, day: date) -> Dict[str, str]:
+        key = DAY_KEY.format(vendor_id, day.isoformat())
+        fields = await redis_client.get_hash(key)
+        if fields:
+            return fields
+        fields = await self.build_day(db, vendor_id, day)
+        await redis_client.set_hash(key, fields, expire=DAY_TTL)
+        return fields
+
+    async def free_slots(
+        self,
+        db: AsyncSession,
+        vendor_id: str,
+        day: date,
+        duration: int,
+        service: Optional[str] = None,
+        not_before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Start times where some qualified therapist is free for `duration` minutes"""
+        fields = await self.get_day(db, vendor_id, day)
+        slot_count = -(-duration // SLOT_MINUTES)
+        skill = service_slug(service) if service else None
+
+        therapists_by_slot: Dict[int, List[str]] = {}
+        for field, slots in fields.items():
+            if not field.startswith("free:"):
+                continue
+            therapist_id = field[len("free:"):]
+            if skill and skill not in fields.get(f"skills:{therapist_id}", "").split(","):
+                continue
+            starts = start_bits(from_slots(slots), slot_count)
+            while starts:
+                low = starts & -starts
+                therapists_by_slot.setdefault(low.bit_length() - 1, []).append(therapist_id)
+                starts ^= low
+
+        earliest = 0
+        if not_before and not_before.date() == day:
+            earliest = -(-(not_before.hour * 60 + not_before.minute) // SLOT_MINUTES)
+
+        return [
+            {
+                "time": f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}",
+                "therapist_ids": therapists_by_slot[slot]
+            }
+            for slot in sorted(therapists_by_slot)
+            if slot >= earliest
+        ]
+
+    async def _patch(
+        self, booking_id: str, vendor_id: str, day: date, therapist_id: str, start: time, duration: int, mode: str
+    ) -> bool:
+        first, count = busy_span(start, duration)
+        patched = await redis_client.run_script(
+            UPDATE_SCRIPT,
+            keys=[DAY_KEY.format(vendor_id, day.isoformat())],
+            args=[therapist_id, first, count, mode, booking_id]
+        )
+        return bool(patched)
+
+    async def occupy(
+        self, booking_id: str, vendor_id: str, day: date, therapist_id: str, start: time, duration: int
+    ) -> bool:
+        return await self._patch(booking_id, vendor_id, day, therapist_id, start, duration, "occupy")
+
+    async def release(
+        self, booking_id: str, vendor_id: str, day: date, therapist_id: str, start: time, duration: int
+    ) -> bool:
+        """Free the slots of this booking that no other booking of the therapist covers"""
+        return await self._patch(booking_id, vendor_id, day, therapist_id, start, duration, "release")
+
+    async def invalidate(self, vendor_id: str, day: date) -> bool:
+        """Drop a cached vendor-day after schedule, leave or holiday changes"""
+        return await redis_client.delete(DAY_KEY.format(vendor_id, day.isoformat()))
+
+    async def invalidate_range(self, vendor_id: str, start: date, end: date) -> int:
+        """`invalidate` for every day from `start` to `end`, past days and days beyond the horizon skipped"""
+        first = max(start, date.today())
+        last = min(end, date.today() + timedelta(days=CACHE_HORIZON_DAYS))
+        return await redis_client.delete_many([
+            DAY_KEY.format(vendor_id, (first + timedelta(days=offset)).isoformat())
+            for offset in range((last - first).days + 1)
+        ])
+
+
+availability = AvailabilityEngine()
@@ -0,0 +1,165 @@
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
+from sqlalchemy import func, insert, select, update
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.models import Booking, BookingStatusHistory, Notification
+from app.schemas.booking import BookingEvent
+from app.services import accounts
+from app.services.booking_events import booking_events
+from app.services.booking_feed import booking_feed
+
+logger = logging.getLogger(__name__)
+
+# Status history rows need the booking row, which the write-behind queue
+# may not have inserted yet; events still orphaned after this are dropped.
+ORPHAN_AFTER = timedelta(hours=1)
+
+# Booking.status each event status may move a booking from, in the order a
+# batch applies them. Forward moves only, so redelivered or late events
+# cannot roll a booking back.
+TRANSITIONS = {
+    "confirmed": ("pending", "rescheduled"),
+    "assigned": ("pending", "confirmed", "rescheduled"),
+    "in_progress": ("pending", "confirmed", "assigned", "rescheduled"),
+    "completed": ("pending", "confirmed", "assigned", "in_progress", "rescheduled"),
+    "rescheduled": ("pending", "confirmed", "assigned"),
+    "cancelled": ("pending", "confirmed", "assigned", "in_progress", "rescheduled"),
+}
+
+ANALYTICS_KEY = "analytics:bookings:{}"
+ANALYTICS_VENDOR_KEY = "analytics:bookings:{}:{}"
+ANALYTICS_TTL = 90 * 86400
+
+NOTIFICATIONS = {
+    "confirmed": ("booking_confirmed", "Booking confirmed", "Your booking has been confirmed."),
+    "cancelled": ("booking_cancelled", "Booking cancelled", "Your booking has been cancelled."),
+    "assigned": ("therapist_assigned", "Therapist assigned", "A therapist has been assigned to your booking."),
+    "in_progress": ("service_started", "Service started", "Your service has started."),
+    "completed": ("service_completed", "Service completed", "Your service is complete. We hope you enjoyed it!"),
+}
+
+
+async def invalidate_caches(events: List[BookingEvent]):
+    # create_booking caches the new booking itself; only later changes make it stale
+    stale = {event.booking_id for event in events if event.type != "booking.created"}
+    await redis_client.delete_many([f"booking:{booking_id}" for booking_id in stale])
+
+
+async def publish_live(events: List[BookingEvent]):
+    for event in events:
+        if event.type != "booking.created":
+            await booking_feed.publish_status(event.booking_id, event.status, **event.details)
+
+
+async def _booking_customers(session, booking_numbers: List[str]) -> Dict[str, uuid.UUID]:
+    rows = (await session.execute(
+        select(Booking.booking_number, Booking.customer_id).where(Booking.booking_number.in_(booking_numbers))
+    )).all()
+    return dict(rows)
+
+
+async def record_history(events: List[BookingEvent]) -> Set[str]:
+    # the write-behind queue records the initial status with the booking itself
+    events = [event for event in events if event.type != "booking.created"]
+    if not events:
+        return set()
+    async with AsyncSessionLocal() as session:
+        known = await accounts.booking_ids(session, [event.booking_id for event in events])
+        cutoff = datetime.now(timezone.utc) - ORPHAN_AFTER
+        # only events whose booking row is still on its way wait for it
+        deferred = {
+            event.event_id for event in events
+            if event.booking_id not in known and event.occurred_at > cutoff
+        }
+        actors = await accounts.user_ids(session, [event.actor_id for event in events if event.actor_id])
+        rows = [
+            {
+                "booking_id": known[event.booking_id],
+                "from_status": event.previous_status,
+                "to_status": event.status,
+                "changed_by": actors.get(event.actor_id),
+                "reason": event.details.get("reason"),
+                "created_at": event.occurred_at
+            }
+            for event in events
+            if event.booking_id in known
+        ]
+        dropped = len(events) - len(rows) - len(deferred)
+        if dropped:
+            logger.warning("Dropped %d status events for bookings that were never persisted", dropped)
+        if rows:
+            await session.execute(insert(BookingStatusHistory), rows)
+            await _apply_statuses(session, known, events)
+            await session.commit()
+    return deferred
+
+
+async def _apply_statuses(session, known: Dict[str, uuid.UUID], events: List[BookingEvent]):
+    """Move Booking.status (and payment_status, once confirmed) along with the history rows"""
+    moved: Dict[str, Set[uuid.UUID]] = {}
+    for event in events:
+        if event.booking_id in known and event.status in TRANSITIONS:
+            moved.setdefault(event.status, set()).add(known[event.booking_id])
+    for to_status, allowed_from in TRANSITIONS.items():
+        if to_status in moved:
+            await session.execute(
+                update(Booking)
+                .where(Booking.id.in_(moved[to_status]), Booking.status.in_(allowed_from))
+                .values(status=to_status, updated_at=func.now())
+            )
+    # checkout confirms a booking only once it is paid
+    if "confirmed" in moved:
+        await session.execute(
+            update(Booking)
+            .where(Booking.id.in_(moved["confirmed"]), Booking.payment_status == "pending")
+            .values(payment_status="paid")
+        )
+
+
+async def send_notifications(events: List[BookingEvent]):
+    events = [event for event in events if event.status in NOTIFICATIONS and event.type != "booking.created"]
+    if not events:
+        return
+    async with AsyncSessionLocal() as session:
+        users = await accounts.user_ids(session, [event.customer_id for event in events if event.customer_id])
+        missing = list({event.booking_id for event in events if event.customer_id not in users})
+        customers = await _booking_customers(session, missing) if missing else {}
+        rows = []
+        for event in events:
+            customer_id = users.get(event.customer_id) or customers.get(event.booking_id)
+            if not customer_id:
+                continue
+            kind, title, message = NOTIFICATIONS[event.status]
+            rows.append({
+                "user_id": customer_id,
+                "type": kind,
+                "title": title,
+                "message": message,
+                "data": {"booking_id": event.booking_id, "event_id": event.event_id, **event.details}
+            })
+        if rows:
+            await session.execute(insert(Notification), rows)
+            await session.commit()
+
+
+async def roll_up_analytics(events: List[BookingEvent]):
+    counts = Counter()
+    for event in events:
+        day = event.occurred_at.date().isoformat()
+        counts[(ANALYTICS_KEY.format(day), event.status)] += 1
+        if event.vendor_id:
+            counts[(ANALYTICS_VENDOR_KEY.format(event.vendor_id, day), event.status)] += 1
+    for (key, field), amount in counts.items():
+        await redis_client.increment_hash_field(key, field, amount, expire=ANALYTICS_TTL)
+
+
+def register():
+    booking_events.subscribe("booking-cache", invalidate_caches)
+    booking_events.subscribe("booking-live", publish_live)
+    booking_events.subscribe("booking-history", record_history, batch_size=500)
+    booking_events.subscribe("booking-notifications", send_notifications)
+    booking_events.subscribe("booking-analytics", roll_up_analytics, batch_size=1000)
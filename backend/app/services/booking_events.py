@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Collection, List, Optional
+from app.core.ids import new_id
+from app.core.redis_client import redis_client
+from app.core.streams import StreamConsumer, Entry
+from app.schemas.booking import BookingEvent
+
+logger = logging.getLogger(__name__)
+
+EVENTS_STREAM = "bookings:events"
+# Every consumer group reads the same entries, so they are trimmed by length
+# rather than deleted on ack; this is days of headroom for a lagging group.
+EVENTS_MAXLEN = 200000
+
+# Handlers may return the event ids they could not process yet; only those
+# stay pending (and are redelivered), the rest of the batch is acknowledged.
+EventHandler = Callable[[List[BookingEvent]], Awaitable[Optional[Collection[str]]]]
+
+
+class BookingEventBus:
+    """
+    Booking lifecycle events on a Redis Stream.
+
+    Endpoints `emit` one typed BookingEvent per transition and return;
+    side effects (cache invalidation, live feed, status history,
+    notifications, analytics) are separate consumer groups on the stream,
+    each with its own cursor, so they fail, retry and scale out across
+    processes independently. Delivery is at least once: a handler that
+    raises gets the same batch again, one that defers events gets just
+    those again.
+    """
+
+    def __init__(self):
+        self._consumers: List[StreamConsumer] = []
+
+    async def emit(
+        self,
+        booking_id: str,
+        status: str,
+        previous_status: Optional[str] = None,
+        actor_id: Optional[str] = None,
+        actor_role: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        **details
+    ) -> Optional[BookingEvent]:
+        event = BookingEvent(
+            event_id=new_id("event"),
+            type=event_type or f"booking.{status}",
+            booking_id=booking_id,
+            status=status,
+            previous_status=previous_status,
+            actor_id=actor_id,
+            actor_role=actor_role,
+            customer_id=customer_id,
+            vendor_id=vendor_id,
+            details=details,
+            occurred_at=datetime.now(timezone.utc)
+        )
+        if not await redis_client.stream_add(EVENTS_STREAM, event.model_dump(mode="json"), maxlen=EVENTS_MAXLEN):
+            logger.warning("Booking event %s for %s was not recorded", event.type, booking_id)
+            return None
+        return event
+
+    def subscribe(self, group: str, handler: EventHandler, batch_size: int = 200):
+        """Run `handler` on batches of events in its own consumer group"""
+        async def consume(entries: List[Entry]) -> List[str]:
+            events = [BookingEvent(**data) for _, data in entries]
+            deferred = set(await handler(events) or ())
+            if deferred:
+                logger.info("Consumer %s deferred %d of %d events", group, len(deferred), len(events))
+            return [entry_id for (entry_id, _), event in zip(entries, events) if event.event_id not in deferred]
+
+        self._consumers.append(StreamConsumer(EVENTS_STREAM, group, consume, batch_size=batch_size))
+
+    def start(self):
+        for consumer in self._consumers:
+            consumer.start()
+
+    async def stop(self):
+        for consumer in self._consumers:
+            await consumer.stop()
+
+
+booking_events = BookingEventBus()
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "booking:{}:feed"
+CHANNEL_PREFIX = "booking:"
+SNAPSHOT_KEY = "booking:{}:live"
+SNAPSHOT_TTL = 6 * 3600
+
+QUEUE_SIZE = 100
+# How long `listen` waits for Redis to confirm a new subscription
+SUBSCRIBE_TIMEOUT = 5.0
+
+
+class BookingFeed:
+    """
+    Push channel for in-progress bookings.
+
+    Publishers (location ingest, status changes) PUBLISH to a per-booking
+    Redis channel and keep the latest position/status in a snapshot hash.
+    Each worker holds a single pub/sub connection, subscribes to a booking
+    channel only while it has local listeners, and fans messages out to
+    their in-memory queues, so thousands of open streams cost one Redis
+    connection per worker rather than one per client.
+
+    Subscribes and unsubscribes are serialized, and `listen` only returns
+    once Redis has confirmed the subscription, so a snapshot read inside
+    the context cannot miss an event published while subscribing.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        # channel -> set once Redis confirms the subscription
+        self._subscribed: Dict[str, asyncio.Event] = {}
+        self._lock = asyncio.Lock()
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, booking_id: str, event: Dict[str, Any]) -> None:
+        event = {**event, "booking_id": booking_id, "sent_at": time.time()}
+        await redis_client.set_hash(
+            SNAPSHOT_KEY.format(booking_id), {event["type"]: json.dumps(event)}, expire=SNAPSHOT_TTL
+        )
+        await redis_client.publish(CHANNEL.format(booking_id), event)
+
+    async def publish_status(self, booking_id: str, status: str, **details) -> None:
+        await self.publish(booking_id, {"type": "status", "status": status, **details})
+
+    async def publish_position(
+        self, booking_id: str, therapist_id: str, latitude: float, longitude: float, recorded_at: float
+    ) -> None:
+        await self.publish(booking_id, {
+            "type": "position",
+            "therapist_id": therapist_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "recorded_at": recorded_at
+        })
+
+    async def snapshot(self, booking_id: str) -> Dict[str, Any]:
+        state = await redis_client.get_hash(SNAPSHOT_KEY.format(booking_id)) or {}
+        return {kind: json.loads(event) for kind, event in state.items()}
+
+    async def _dispatch(self):
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception:
+                logger.exception("Booking feed pub/sub read failed")
+                await asyncio.sleep(1)
+                continue
+            if message and message.get("type") == "subscribe":
+                subscribed = self._subscribed.get(message["channel"])
+                if subscribed:
+                    subscribed.set()
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            booking_id = message["channel"][len(CHANNEL_PREFIX):].rsplit(":", 1)[0]
+            for queue in list(self._listeners.get(booking_id, ())):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(message["data"])
+
+    def start(self):
+        if self._task is None:
+            self._pubsub = redis_client.pubsub()
+            if self._pubsub is not None:
+                self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+
+    @asynccontextmanager
+    async def listen(self, booking_id: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        Queue of raw JSON events for a booking, open for the context's
+        lifetime. Read the snapshot inside the context, not before it.
+        """
+        channel = CHANNEL.format(booking_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        async with self._lock:
+            listeners = self._listeners.setdefault(booking_id, set())
+            if not listeners and self._pubsub is not None:
+                self._subscribed[channel] = asyncio.Event()
+                await self._pubsub.subscribe(channel)
+            listeners.add(queue)
+            subscribed = self._subscribed.get(channel)
+        try:
+            if subscribed is not None:
+                try:
+                    await asyncio.wait_for(subscribed.wait(), timeout=SUBSCRIBE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("No subscribe confirmation for %s, continuing without it", channel)
+            yield queue
+        finally:
+            async with self._lock:
+                listeners.discard(queue)
+                if not listeners and self._listeners.get(booking_id) is listeners:
+                    self._listeners.pop(booking_id)
+                    self._subscribed.pop(channel, None)
+                    if self._pubsub is not None:
+                        await self._pubsub.unsubscribe(channel)
+
+
+booking_feed = BookingFeed()
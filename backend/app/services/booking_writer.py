@@ -0,0 +1,138 @@
+import logging
+import uuid
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.core.streams import StreamConsumer, Entry
+from app.models import Booking, BookingService, BookingStatusHistory
+from app.services import accounts
+from app.services.accounts import parse_uuid
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_STREAM = "bookings:outbox"
+OUTBOX_GROUP = "booking-writer"
+DEAD_LETTER_STREAM = "bookings:outbox:dead"
+
+
+def _booking_row(booking: Dict[str, Any], customer_id: Optional[uuid.UUID]) -> Dict[str, Any]:
+    # the database generates the uuid primary key; the id everything else
+    # knows the booking by is its booking number
+    location = booking.get("location") or {}
+    return {
+        "booking_number": booking["id"],
+        "customer_id": customer_id,
+        "vendor_id": parse_uuid(booking["vendor_id"]),
+        "booking_type": location.get("type", "home_service"),
+        "service_location": location,
+        "booking_date": date.fromisoformat(booking["booking_date"]),
+        "booking_time": time.fromisoformat(booking["booking_time"]),
+        "total_amount": booking.get("subtotal", booking["total_amount"]),
+        "discount_amount": booking.get("discount_amount", 0),
+        "final_amount": booking["total_amount"],
+        "status": booking["status"],
+        "payment_status": booking["payment_status"],
+        "special_instructions": booking.get("special_requests"),
+        "created_at": datetime.fromisoformat(booking["created_at"])
+    }
+
+
+def _service_rows(booking: Dict[str, Any], booking_id: uuid.UUID) -> List[Dict[str, Any]]:
+    therapist_id = parse_uuid(booking.get("therapist_id"))
+    return [
+        {
+            "booking_id": booking_id,
+            "service_id": parse_uuid(item["service_id"]),
+            "service_name": item["name"],
+            "service_duration": item["duration"],
+            "service_price": item["unit_price"],
+            "quantity": item["quantity"],
+            "subtotal": item["amount"],
+            "therapist_id": therapist_id
+        }
+        for item in booking["services"]
+    ]
+
+
+def _history_row(booking: Dict[str, Any], booking_id: uuid.UUID, customer_id: Optional[uuid.UUID]) -> Dict[str, Any]:
+    return {
+        "booking_id": booking_id,
+        "from_status": None,
+        "to_status": booking["status"],
+        "changed_by": customer_id,
+        "created_at": datetime.fromisoformat(booking["created_at"])
+    }
+
+
+class BookingWriter:
+    """
+    Write-behind persistence for new bookings.
+
+    `create_booking` only appends the booking to a Redis Stream (one
+    XADD) and returns; a consumer group drains the stream in the
+    background and writes Booking, BookingService and BookingStatusHistory
+    rows with one multi-row INSERT per table per batch. Entries are
+    acknowledged and deleted only after the transaction commits, and a
+    worker that dies mid-batch leaves them pending for another to claim,
+    so accepted bookings survive cache expiry and restarts (given Redis
+    persistence). Replays skip booking numbers that already have a row.
+    """
+
+    def __init__(self):
+        self._consumer = StreamConsumer(OUTBOX_STREAM, OUTBOX_GROUP, self.persist, delete_acked=True)
+
+    async def enqueue(self, booking: Dict[str, Any]) -> Optional[str]:
+        return await redis_client.stream_add(OUTBOX_STREAM, booking)
+
+    async def _insert(self, bookings: List[Dict[str, Any]]):
+        async with AsyncSessionLocal() as session:
+            existing = await accounts.booking_ids(session, [b["id"] for b in bookings])
+            fresh = [b for b in bookings if b["id"] not in existing]
+            if not fresh:
+                return
+            # a customer that maps to no user leaves customer_id NULL, which
+            # the NOT NULL constraint rejects into the dead letter stream
+            customers = await accounts.user_ids(session, [b["customer_id"] for b in fresh])
+            inserted = dict((await session.execute(
+                insert(Booking).returning(Booking.booking_number, Booking.id),
+                [_booking_row(b, customers.get(b["customer_id"])) for b in fresh]
+            )).all())
+            await session.execute(
+                insert(BookingService),
+                [row for b in fresh for row in _service_rows(b, inserted[b["id"]])]
+            )
+            await session.execute(
+                insert(BookingStatusHistory),
+                [_history_row(b, inserted[b["id"]], customers.get(b["customer_id"])) for b in fresh]
+            )
+            await session.commit()
+
+    async def persist(self, entries: List[Entry]) -> List[str]:
+        try:
+            await self._insert([booking for _, booking in entries])
+            return [entry_id for entry_id, _ in entries]
+        except (IntegrityError, DataError):
+            logger.warning("Booking batch of %d rejected, retrying one by one", len(entries))
+
+        # isolate the bad rows so they don't hold up the rest of the batch
+        done = []
+        for entry_id, booking in entries:
+            try:
+                await self._insert([booking])
+            except (IntegrityError, DataError) as e:
+                logger.error("Booking %s cannot be persisted, moved to %s: %s", booking.get("id"), DEAD_LETTER_STREAM, e)
+                await redis_client.stream_add(DEAD_LETTER_STREAM, {"entry_id": entry_id, "booking": booking, "error": str(e)})
+            done.append(entry_id)
+        return done
+
+    def start(self):
+        self._consumer.start()
+
+    async def stop(self):
+        await self._consumer.stop()
+
+
+booking_writer = BookingWriter()
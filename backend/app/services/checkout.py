@@ -0,0 +1,97 @@
+import hashlib
+import hmac
+import logging
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.services.availability import availability
+from app.services.booking_events import booking_events
+from app.services.coupons import coupon_redemptions
+from app.services.reservations import reservations, HOLD_TTL, RECORD_GRACE
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_KEY = "payment:{}"
+# Paid records only need to outlive the confirm that follows the payment
+PAID_TTL = 3 * 86400
+
+
+class HoldExpired(Exception):
+    """The slot hold lapsed or was taken over before the booking was confirmed"""
+    pass
+
+
+def to_paise(amount: Any) -> int:
+    return round(float(amount) * 100)
+
+
+class Checkout:
+    """
+    Payment-gated booking confirmation.
+
+    A booking is created with the amount due recorded next to its slot
+    hold. The payment gateway's webhook, verified by its signature, is
+    the only thing that marks the booking paid, and only for the amount
+    due; confirming a booking that is not paid is refused. The webhook
+    confirms the booking itself, so a client that never comes back after
+    paying still gets its slot, and the client's confirm is a no-op
+    replay of it.
+    """
+
+    async def expect_payment(self, booking_id: str, amount: Any) -> bool:
+        return await redis_client.set_hash(
+            PAYMENT_KEY.format(booking_id),
+            {"status": "due", "amount_due": to_paise(amount)},
+            expire=HOLD_TTL + RECORD_GRACE
+        )
+
+    async def record_payment(self, booking_id: str, payment_id: str, amount: int) -> bool:
+        """Mark a booking paid, if `amount` (paise) covers what is due on it"""
+        payment = await redis_client.get_hash(PAYMENT_KEY.format(booking_id))
+        if not payment:
+            logger.warning("Payment %s for unknown or expired booking %s", payment_id, booking_id)
+            return False
+        if int(amount) < int(payment["amount_due"]):
+            logger.warning("Payment %s for %s is short: %s < %s", payment_id, booking_id, amount, payment["amount_due"])
+            return False
+        return await redis_client.set_hash(
+            PAYMENT_KEY.format(booking_id),
+            {"status": "paid", "payment_id": payment_id, "amount_paid": int(amount)},
+            expire=PAID_TTL
+        )
+
+    async def is_paid(self, booking_id: str) -> bool:
+        payment = await redis_client.get_hash(PAYMENT_KEY.format(booking_id))
+        return bool(payment) and payment.get("status") == "paid"
+
+    @staticmethod
+    def verify_signature(body: bytes, signature: Optional[str]) -> bool:
+        """Gateway webhook signature: hex HMAC-SHA256 of the raw body"""
+        if not settings.PAYMENT_WEBHOOK_SECRET or not signature:
+            return False
+        expected = hmac.new(settings.PAYMENT_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    async def confirm(self, booking_id: str, actor_id: Optional[str], actor_role: str) -> Dict[str, Any]:
+        """
+        Turn the paid slot hold into a confirmed booking. Raises HoldExpired
+        (after giving back its coupon use) when the hold is gone; confirming
+        a booking that already is changes nothing and emits nothing.
+        """
+        outcome, record = await reservations.confirm(booking_id)
+        if outcome == "already_confirmed":
+            return record
+        if outcome != "confirmed":
+            await coupon_redemptions.release(booking_id)
+            raise HoldExpired(booking_id)
+
+        await availability.occupy(booking_id, **reservations.span_of(record))
+        await booking_events.emit(
+            booking_id, "confirmed", previous_status="pending",
+            actor_id=actor_id, actor_role=actor_role,
+            customer_id=record.get("customer_id"), vendor_id=record["vendor_id"]
+        )
+        return record
+
+
+checkout = Checkout()
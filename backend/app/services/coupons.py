@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, insert, select
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.core.streams import StreamConsumer, Entry
+from app.models import Coupon, CouponUsage
+from app.services import accounts
+from app.services.pricing import pricing_engine
+from app.services.reservations import reservations, HOLD_TTL
+
+logger = logging.getLogger(__name__)
+
+# Usage caps are per promotion, shared by every coupon code of it
+USED_KEY = "coupon:promotion:{}:used"
+CUSTOMERS_KEY = "coupon:promotion:{}:customers"
+REDEMPTION_KEY = "coupon:redemption:{}"
+REDEMPTION_TTL = 30 * 86400
+
+# Redemptions of bookings still on a slot hold, scored by when the hold
+# is past expiring; the sweep gives back the ones never confirmed
+HOLDS_KEY = "coupon:holds"
+HOLD_GRACE = 60
+SWEEP_INTERVAL = 30
+SWEEP_BATCH = 200
+
+USAGE_STREAM = "coupons:usage"
+USAGE_GROUP = "coupon-usage"
+# Usage rows reference the booking, which the write-behind queue may not
+# have inserted yet; redemptions still orphaned after this are dropped.
+ORPHAN_AFTER = timedelta(hours=1)
+
+# KEYS: used counter, per-customer hash, redemption record, held redemptions
+# ARGV: customer_id, total limit, per-customer limit, promotion_id, record ttl,
+#       hold deadline ms, booking_id (0 limits mean unlimited)
+REDEEM_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return {1, 'duplicate'}
+end
+local total = tonumber(ARGV[2])
+local per_customer = tonumber(ARGV[3])
+if total > 0 and tonumber(redis.call('GET', KEYS[1]) or '0') >= total then
+    return {0, 'exhausted'}
+end
+if per_customer > 0 and tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0') >= per_customer then
+    return {0, 'customer_limit'}
+end
+redis.call('INCR', KEYS[1])
+redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+redis.call('SET', KEYS[3], ARGV[4] .. '|' .. ARGV[1], 'EX', ARGV[5])
+redis.call('ZADD', KEYS[4], ARGV[6], ARGV[7])
+return {1, 'redeemed'}
+"""
+
+# KEYS: redemption record, used counter, per-customer hash; ARGV: customer_id
+RELEASE_SCRIPT = """
+if redis.call('DEL', KEYS[1]) == 0 then
+    return 0
+end
+if tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    redis.call('DECR', KEYS[2])
+end
+if tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0') > 0 then
+    redis.call('HINCRBY', KEYS[3], ARGV[1], -1)
+end
+return 1
+"""
+
+# KEYS: held redemptions; ARGV: now ms, count. Removing what it returns
+# makes each due booking one worker's to check.
+DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+class CouponLimitReached(Exception):
+    pass
+
+
+class CouponRedemptions:
+    """
+    Coupon usage caps without database locks.
+
+    Global and per-customer usage counts of a promotion (shared by all
+    of its coupon codes) live in Redis and a Lua script checks both caps
+    and increments both counters in one atomic step, so any number of
+    concurrent checkouts can redeem the same promotion and the caps hold
+    exactly. Counters are seeded from CouponUsage the first time a
+    promotion (or a customer of it) is seen. A use taken by a booking
+    whose slot hold expires unconfirmed is given back by a periodic
+    sweep. Redemptions and releases are appended to a stream and
+    reconciled into CouponUsage rows in the background.
+    """
+
+    def __init__(self, sweep_interval: int = SWEEP_INTERVAL):
+        self._consumer = StreamConsumer(USAGE_STREAM, USAGE_GROUP, self.reconcile, delete_acked=True)
+        self.sweep_interval = sweep_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _seed(self, promotion_id: str, customer_id: str):
+        used_key, customers_key = USED_KEY.format(promotion_id), CUSTOMERS_KEY.format(promotion_id)
+        seed_total = not await redis_client.exists(used_key)
+        seed_customer = not await redis_client.hash_field_exists(customers_key, customer_id)
+        if not seed_total and not seed_customer:
+            return
+        usage = (
+            select(func.count()).select_from(CouponUsage)
+            .join(Coupon, Coupon.id == CouponUsage.coupon_id)
+            .where(Coupon.promotion_id == promotion_id)
+        )
+        async with AsyncSessionLocal() as session:
+            if seed_total:
+                total = (await session.execute(usage)).scalar_one()
+                await redis_client.set_if_absent(used_key, total, expire=None)
+            if seed_customer:
+                user_id = await accounts.user_id(session, customer_id)
+                mine = 0
+                if user_id:
+                    mine = (await session.execute(usage.where(CouponUsage.customer_id == user_id))).scalar_one()
+                await redis_client.set_hash_field_if_absent(customers_key, customer_id, mine)
+
+    async def redeem(self, code: str, customer_id: str, booking_id: str, discount: float) -> Dict[str, Any]:
+        """Count one use of `code`'s promotion for a booking; raises CouponLimitReached past either cap"""
+        code = code.upper()
+        limits = (await pricing_engine.rules()).coupon_limits.get(code)
+        if limits is None:
+            raise CouponLimitReached(f"Coupon {code} is no longer available")
+        if not redis_client.redis:
+            raise CouponLimitReached("Coupons are temporarily unavailable")
+
+        promotion_id = limits["promotion_id"]
+        await self._seed(promotion_id, customer_id)
+        won, outcome = await redis_client.run_script(
+            REDEEM_SCRIPT,
+            keys=[
+                USED_KEY.format(promotion_id), CUSTOMERS_KEY.format(promotion_id),
+                REDEMPTION_KEY.format(booking_id), HOLDS_KEY
+            ],
+            args=[
+                customer_id, limits["total"], limits["per_customer"], promotion_id, REDEMPTION_TTL,
+                int((time.time() + HOLD_TTL + HOLD_GRACE) * 1000), booking_id
+            ]
+        )
+        if not won:
+            raise CouponLimitReached(
+                f"Coupon {code} has been fully redeemed" if outcome == "exhausted"
+                else f"You have already used coupon {code}"
+            )
+        if outcome == "redeemed":
+            await redis_client.stream_add(USAGE_STREAM, {
+                "action": "redeem",
+                "coupon_id": limits["coupon_id"],
+                "customer_id": customer_id,
+                "booking_id": booking_id,
+                "discount_amount": discount,
+                "used_at": datetime.now(timezone.utc).isoformat()
+            })
+        return {"coupon_code": code, "booking_id": booking_id, "status": outcome}
+
+    async def release(self, booking_id: str) -> bool:
+        """Give back the use a booking took, e.g. when it is cancelled or its hold expires"""
+        record = await redis_client.get(REDEMPTION_KEY.format(booking_id))
+        if not record:
+            return False
+        promotion_id, _, customer_id = str(record).rpartition("|")
+        released = await redis_client.run_script(
+            RELEASE_SCRIPT,
+            keys=[REDEMPTION_KEY.format(booking_id), USED_KEY.format(promotion_id), CUSTOMERS_KEY.format(promotion_id)],
+            args=[customer_id]
+        )
+        if released:
+            await redis_client.stream_add(USAGE_STREAM, {"action": "release", "booking_id": booking_id})
+        return bool(released)
+
+    async def release_expired(self) -> int:
+        """Give back the uses of bookings whose slot hold ran out without being confirmed"""
+        released = 0
+        while True:
+            due = await redis_client.run_script(
+                DUE_SCRIPT, keys=[HOLDS_KEY], args=[int(time.time() * 1000), SWEEP_BATCH]
+            ) or []
+            for booking_id in due:
+                record = await reservations.get(booking_id)
+                if not record or record.get("status") != "confirmed":
+                    released += await self.release(booking_id)
+            if len(due) < SWEEP_BATCH:
+                return released
+
+    async def reconcile(self, entries: List[Entry]) -> List[str]:
+        redeemed = {entry["booking_id"]: entry for _, entry in entries if entry["action"] == "redeem"}
+        released = {entry["booking_id"] for _, entry in entries if entry["action"] == "release"}
+        # a redeem and release of the same booking within one batch cancel out
+        pending = [entry for booking_id, entry in redeemed.items() if booking_id not in released]
+        deferred = set()
+
+        async with AsyncSessionLocal() as session:
+            known = await accounts.booking_ids(session, [entry["booking_id"] for entry in pending] + list(released))
+            if pending:
+                # replays of a batch that committed but was never acknowledged
+                recorded = set((await session.execute(
+                    select(CouponUsage.booking_id).where(CouponUsage.booking_id.in_(list(known.values())))
+                )).scalars().all())
+                customers = await accounts.user_ids(session, [entry["customer_id"] for entry in pending])
+                cutoff = datetime.now(timezone.utc) - ORPHAN_AFTER
+                # only redemptions whose booking row is still on its way wait for it
+                deferred = {
+                    entry["booking_id"] for entry in pending
+                    if entry["booking_id"] not in known and datetime.fromisoformat(entry["used_at"]) > cutoff
+                }
+                rows = [
+                    {
+                        "coupon_id": entry["coupon_id"],
+                        "customer_id": customers.get(entry["customer_id"]),
+                        "booking_id": known[entry["booking_id"]],
+                        "discount_amount": entry["discount_amount"],
+                        "used_at": datetime.fromisoformat(entry["used_at"])
+                    }
+                    for entry in pending
+                    if entry["booking_id"] in known and known[entry["booking_id"]] not in recorded
+                    and entry["customer_id"] in customers
+                ]
+                orphaned = sum(entry["booking_id"] not in known for entry in pending) - len(deferred)
+                if orphaned:
+                    logger.warning("Dropped %d coupon redemptions for bookings that were never persisted", orphaned)
+                strangers = sum(entry["customer_id"] not in customers for entry in pending)
+                if strangers:
+                    logger.warning("Dropped %d coupon redemptions by customers with no user account", strangers)
+                if rows:
+                    await session.execute(insert(CouponUsage), rows)
+            stale = [known[booking_id] for booking_id in released - set(redeemed) if booking_id in known]
+            if stale:
+                await session.execute(delete(CouponUsage).where(CouponUsage.booking_id.in_(stale)))
+            await session.commit()
+        return [
+            entry_id for entry_id, entry in entries
+            if not (entry["action"] == "redeem" and entry["booking_id"] in deferred)
+        ]
+
+    async def _sweep(self):
+        while True:
+            try:
+                released = await self.release_expired()
+                if released:
+                    logger.info("Gave back %d coupon uses of expired slot holds", released)
+            except Exception:
+                logger.exception("Coupon hold sweep failed")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self):
+        self._consumer.start()
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._consumer.stop()
+
+
+coupon_redemptions = CouponRedemptions()
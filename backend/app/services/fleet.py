@@ -0,0 +1,195 @@
+import time
+from typing import Any, Dict, List, Optional
+from app.core.redis_client import redis_client
+from app.services.vendor_index import service_slug
+
+STATE_KEY = "fleet:therapist:{}"
+STATE_PREFIX = "fleet:therapist:"
+AVAILABLE_KEY = "geo:therapists:available"
+SKILL_KEY_PREFIX = "geo:therapists:available:"
+
+STATE_TTL = 900
+MAX_POSITION_AGE = 300
+
+STATUSES = ("available", "busy", "offline")
+
+# KEYS: state hash, available geo set
+# ARGV: therapist_id, longitude, latitude, updated_at, status, skills csv,
+#       skills given flag, ttl, skill set prefix
+UPDATE_SCRIPT = """
+local id = ARGV[1]
+local old = redis.call('HMGET', KEYS[1], 'status', 'skills', 'longitude', 'latitude', 'updated_at')
+local status = ARGV[5] ~= '' and ARGV[5] or (old[1] or 'offline')
+local skills = ARGV[7] == '1' and ARGV[6] or (old[2] or '')
+local lon = old[3]
+local lat = old[4]
+local updated_at = old[5] or ARGV[4]
+
+-- fixes older than the stored one (late batches) never move the therapist back
+if ARGV[2] ~= '' and (not old[5] or tonumber(ARGV[4]) >= tonumber(old[5])) then
+    lon = ARGV[2]
+    lat = ARGV[3]
+    updated_at = ARGV[4]
+end
+
+redis.call('HSET', KEYS[1], 'status', status, 'skills', skills, 'updated_at', updated_at)
+if lon and lat then
+    redis.call('HSET', KEYS[1], 'longitude', lon, 'latitude', lat)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+
+local keep = {}
+if status == 'available' and lon and lat then
+    redis.call('GEOADD', KEYS[2], lon, lat, id)
+    for skill in string.gmatch(skills, '[^,]+') do
+        keep[skill] = true
+        redis.call('GEOADD', ARGV[9] .. skill, lon, lat, id)
+    end
+else
+    redis.call('ZREM', KEYS[2], id)
+end
+for skill in string.gmatch(old[2] or '', '[^,]+') do
+    if not keep[skill] then
+        redis.call('ZREM', ARGV[9] .. skill, id)
+    end
+end
+return status
+"""
+
+# KEYS: geo set to search
+# ARGV: longitude, latitude, radius_km, count, min updated_at, state key prefix
+NEAREST_SCRIPT = """
+local hits = redis.call('GEOSEARCH', KEYS[1], 'FROMLONLAT', ARGV[1], ARGV[2],
+    'BYRADIUS', ARGV[3], 'km', 'ASC', 'WITHDIST')
+local wanted = tonumber(ARGV[4])
+local min_updated = tonumber(ARGV[5])
+local result = {}
+for _, hit in ipairs(hits) do
+    local state = redis.call('HMGET', ARGV[6] .. hit[1],
+        'updated_at', 'status', 'skills', 'latitude', 'longitude')
+    if not state[1] then
+        redis.call('ZREM', KEYS[1], hit[1])
+    elseif tonumber(state[1]) >= min_updated and state[2] == 'available' then
+        table.insert(result, {hit[1], hit[2], state[3], state[4], state[5], state[1]})
+        if #result >= wanted then
+            break
+        end
+    end
+end
+return result
+"""
+
+
+class FleetPositions:
+    """
+    Live therapist positions and availability.
+
+    Each therapist has a small state hash (position, status, skills) that
+    expires if the device stops reporting. Available therapists are also
+    members of a GEO set per skill, so "N nearest available therapists
+    with skill X within R km" is a single Lua call: one GEOSEARCH plus
+    freshness checks on the hits, executed inside Redis.
+    """
+
+    async def _update(
+        self,
+        therapist_id: str,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        status: Optional[str] = None,
+        skills: Optional[List[str]] = None,
+        updated_at: Optional[float] = None
+    ) -> Optional[str]:
+        skills_csv = ",".join(sorted({service_slug(skill) for skill in skills or []}))
+        # device clocks run ahead; a future timestamp would block every later fix
+        now = time.time()
+        updated_at = min(updated_at, now) if updated_at else now
+        return await redis_client.run_script(
+            UPDATE_SCRIPT,
+            keys=[STATE_KEY.format(therapist_id), AVAILABLE_KEY],
+            args=[
+                therapist_id,
+                "" if longitude is None else longitude,
+                "" if latitude is None else latitude,
+                updated_at,
+                status or "",
+                skills_csv,
+                "1" if skills is not None else "0",
+                STATE_TTL,
+                SKILL_KEY_PREFIX,
+            ]
+        )
+
+    async def update_position(
+        self,
+        therapist_id: str,
+        latitude: float,
+        longitude: float,
+        updated_at: Optional[float] = None
+    ) -> Optional[str]:
+        return await self._update(therapist_id, latitude, longitude, updated_at=updated_at)
+
+    async def update_status(
+        self,
+        therapist_id: str,
+        status: str,
+        skills: Optional[List[str]] = None
+    ) -> Optional[str]:
+        if status not in STATUSES:
+            raise ValueError(f"Unknown availability status: {status}")
+        return await self._update(therapist_id, status=status, skills=skills)
+
+    @staticmethod
+    def _position(therapist_id: str, state: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        if not state or "latitude" not in state:
+            return None
+        return {
+            "therapist_id": therapist_id,
+            "latitude": float(state["latitude"]),
+            "longitude": float(state["longitude"]),
+            "status": state.get("status", "offline"),
+            "skills": [skill for skill in state.get("skills", "").split(",") if skill],
+            "updated_at": float(state["updated_at"])
+        }
+
+    async def get_position(self, therapist_id: str) -> Optional[Dict[str, Any]]:
+        return self._position(therapist_id, await redis_client.get_hash(STATE_KEY.format(therapist_id)))
+
+    async def get_positions(self, therapist_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Positions of many therapists in one round trip, None where unknown"""
+        states = await redis_client.get_hashes([STATE_KEY.format(therapist_id) for therapist_id in therapist_ids])
+        return {
+            therapist_id: self._position(therapist_id, state)
+            for therapist_id, state in zip(therapist_ids, states)
+        }
+
+    async def nearest_available(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        count: int = 5,
+        skill: Optional[str] = None,
+        max_age: int = MAX_POSITION_AGE
+    ) -> List[Dict[str, Any]]:
+        """Nearest available therapists with fresh positions, distance in km"""
+        key = SKILL_KEY_PREFIX + service_slug(skill) if skill else AVAILABLE_KEY
+        rows = await redis_client.run_script(
+            NEAREST_SCRIPT,
+            keys=[key],
+            args=[longitude, latitude, radius, count, time.time() - max_age, STATE_PREFIX]
+        )
+        return [
+            {
+                "therapist_id": therapist_id,
+                "distance": round(float(distance), 2),
+                "skills": [s for s in (skills or "").split(",") if s],
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "updated_at": float(updated_at)
+            }
+            for therapist_id, distance, skills, lat, lon, updated_at in rows or []
+        ]
+
+
+fleet = FleetPositions()
@@ -0,0 +1,301 @@
+import asyncio
+import heapq
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.models import TherapistLocation
+
+logger = logging.getLogger(__name__)
+
+FULL_RESOLUTION_AGE = timedelta(hours=24)
+TOLERANCE_METERS = 15.0
+TRACK_GAP = timedelta(minutes=10)
+COMPACTION_WINDOW = timedelta(days=1)
+COMPACTION_INTERVAL = 3600
+DELETE_CHUNK = 5000
+# Late therapist-days compacted per batch
+LATE_BATCH = 100
+
+# Longest range a trail may span, and most fixes read for one
+MAX_TRAIL_RANGE = timedelta(days=7)
+MAX_TRAIL_ROWS = 50000
+
+WATERMARK_KEY = "location:compaction:watermark"
+LOCK_KEY = "location:compaction:lock"
+# "<therapist_id>|<date>" of fixes that arrived behind the watermark
+LATE_KEY = "location:compaction:late"
+
+METERS_PER_DEGREE = 111320.0
+
+
+def _project(points: Sequence[Dict[str, Any]]) -> List[tuple]:
+    """Equirectangular projection to meters around the track's first point"""
+    lat0 = math.radians(points[0]["latitude"])
+    scale_x = METERS_PER_DEGREE * math.cos(lat0)
+    return [(p["longitude"] * scale_x, p["latitude"] * METERS_PER_DEGREE) for p in points]
+
+
+def _offset(point: tuple, start: tuple, end: tuple) -> float:
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(point[0] - (start[0] + t * dx), point[1] - (start[1] + t * dy))
+
+
+def _farthest(xy: List[tuple], first: int, last: int) -> tuple:
+    """(offset, index) of the point between `first` and `last` farthest from their segment"""
+    max_offset = 0.0
+    index = first
+    for i in range(first + 1, last):
+        offset = _offset(xy[i], xy[first], xy[last])
+        if offset > max_offset:
+            max_offset = offset
+            index = i
+    return max_offset, index
+
+
+def simplify(points: Sequence[Dict[str, Any]], tolerance: float = TOLERANCE_METERS) -> List[int]:
+    """
+    Douglas-Peucker simplification of a GPS track.
+
+    Returns the indexes of the points to keep, always including both ends.
+    Iterative so long tracks cannot hit the recursion limit.
+    """
+    if len(points) < 3:
+        return list(range(len(points)))
+
+    xy = _project(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        max_offset, index = _farthest(xy, first, last)
+        if max_offset > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [i for i, kept in enumerate(keep) if kept]
+
+
+def simplify_to(points: Sequence[Dict[str, Any]], max_points: int) -> List[int]:
+    """
+    Douglas-Peucker by point budget: the indexes of the `max_points` most
+    significant points, both ends included. Always splits the segment with
+    the largest offset next, so one pass yields the budget exactly.
+    """
+    if len(points) <= max_points:
+        return list(range(len(points)))
+
+    xy = _project(points)
+    keep = {0, len(points) - 1}
+    heap: List[tuple] = []
+
+    def split(first: int, last: int):
+        if last - first > 1:
+            max_offset, index = _farthest(xy, first, last)
+            heapq.heappush(heap, (-max_offset, first, last, index))
+
+    split(0, len(points) - 1)
+    while heap and len(keep) < max_points:
+        _, first, last, index = heapq.heappop(heap)
+        keep.add(index)
+        split(first, index)
+        split(index, last)
+
+    return sorted(keep)
+
+
+def _tracks(rows: Sequence[Any]) -> List[List[Any]]:
+    """Split a therapist's fixes into tracks by booking and by reporting gaps"""
+    tracks: List[List[Any]] = []
+    for row in rows:
+        current = tracks[-1] if tracks else None
+        if (
+            current is None
+            or current[-1].booking_id != row.booking_id
+            or row.timestamp - current[-1].timestamp > TRACK_GAP
+        ):
+            tracks.append([row])
+        else:
+            current.append(row)
+    return tracks
+
+
+def _as_point(row: Any) -> Dict[str, Any]:
+    return {
+        "latitude": float(row.latitude),
+        "longitude": float(row.longitude),
+        "speed": float(row.speed) if row.speed is not None else None,
+        "heading": float(row.heading) if row.heading is not None else None,
+        "timestamp": row.timestamp.isoformat()
+    }
+
+
+async def compact_therapist(db: AsyncSession, therapist_id: Any, start: datetime, end: datetime) -> int:
+    """Drop redundant fixes for one therapist in [start, end); returns rows removed"""
+    result = await db.execute(
+        select(TherapistLocation)
+        .where(
+            TherapistLocation.therapist_id == therapist_id,
+            TherapistLocation.timestamp >= start,
+            TherapistLocation.timestamp < end
+        )
+        .order_by(TherapistLocation.timestamp)
+    )
+    rows = result.scalars().all()
+
+    dropped = []
+    for track in _tracks(rows):
+        kept = set(simplify([_as_point(row) for row in track]))
+        dropped.extend(row.id for i, row in enumerate(track) if i not in kept)
+
+    for chunk_start in range(0, len(dropped), DELETE_CHUNK):
+        chunk = dropped[chunk_start:chunk_start + DELETE_CHUNK]
+        await db.execute(delete(TherapistLocation).where(TherapistLocation.id.in_(chunk)))
+    return len(dropped)
+
+
+async def compact(now: Optional[datetime] = None) -> int:
+    """
+    Simplify every fix older than FULL_RESOLUTION_AGE that has not been
+    compacted yet, one day window at a time. Progress is kept as a
+    watermark so each window is processed once and the work per run stays
+    proportional to new data rather than to total history. Fixes written
+    behind the watermark later (devices uploading after a long offline
+    stretch) are queued by `mark_late` and compacted per therapist-day.
+    """
+    now = now or datetime.now(timezone.utc)
+    end = now - FULL_RESOLUTION_AGE
+    removed = 0
+
+    async with AsyncSessionLocal() as db:
+        watermark = await redis_client.get(WATERMARK_KEY)
+        if watermark:
+            start = datetime.fromisoformat(watermark)
+        else:
+            start = (await db.execute(select(func.min(TherapistLocation.timestamp)))).scalar()
+            if start is None:
+                return 0
+
+        while start < end:
+            window_end = min(start + COMPACTION_WINDOW, end)
+            therapist_ids = (await db.execute(
+                select(TherapistLocation.therapist_id)
+                .where(TherapistLocation.timestamp >= start, TherapistLocation.timestamp < window_end)
+                .distinct()
+            )).scalars().all()
+
+            for therapist_id in therapist_ids:
+                removed += await compact_therapist(db, therapist_id, start, window_end)
+                await db.commit()
+
+            await redis_client.set(WATERMARK_KEY, window_end.isoformat(), expire=365 * 86400)
+            start = window_end
+
+        # fixes uploaded after their window was compacted
+        while True:
+            late = await redis_client.pop_from_set(LATE_KEY, LATE_BATCH)
+            if not late:
+                break
+            for entry in late:
+                therapist_id, _, day = entry.partition("|")
+                day_start = datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+                removed += await compact_therapist(
+                    db, uuid.UUID(therapist_id), day_start, day_start + timedelta(days=1)
+                )
+                await db.commit()
+
+    logger.info("Location compaction removed %d fixes up to %s", removed, end.isoformat())
+    return removed
+
+
+async def mark_late(rows: Sequence[Dict[str, Any]]) -> int:
+    """Queue the therapist-days of freshly written fixes that are already behind the watermark"""
+    watermark = await redis_client.get(WATERMARK_KEY)
+    if not watermark:
+        return 0
+    cutoff = datetime.fromisoformat(watermark)
+    days = {
+        f"{row['therapist_id']}|{row['timestamp'].date().isoformat()}"
+        for row in rows
+        if row["timestamp"] < cutoff
+    }
+    return await redis_client.add_to_set(LATE_KEY, *days)
+
+
+async def get_trail(
+    db: AsyncSession,
+    booking_id: Optional[Any] = None,
+    therapist_id: Optional[Any] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = 2000
+) -> List[Dict[str, Any]]:
+    """
+    Trail for a booking or a therapist time range, capped at `max_points`.
+    At most MAX_TRAIL_ROWS fixes are read; callers bound the range.
+    """
+    query = select(
+        TherapistLocation.latitude, TherapistLocation.longitude, TherapistLocation.speed,
+        TherapistLocation.heading, TherapistLocation.timestamp
+    ).order_by(TherapistLocation.timestamp).limit(MAX_TRAIL_ROWS)
+    if booking_id:
+        query = query.where(TherapistLocation.booking_id == booking_id)
+    if therapist_id:
+        query = query.where(TherapistLocation.therapist_id == therapist_id)
+    if start:
+        query = query.where(TherapistLocation.timestamp >= start)
+    if end:
+        query = query.where(TherapistLocation.timestamp < end)
+
+    points = [_as_point(row) for row in (await db.execute(query)).all()]
+    if len(points) <= max_points:
+        return points
+    # seconds of CPU for a long range; keep it off the event loop
+    kept = await asyncio.to_thread(simplify_to, points, max_points)
+    return [points[i] for i in kept]
+
+
+class LocationCompactor:
+    """Runs `compact` periodically; a Redis lock keeps it to one worker at a time"""
+
+    def __init__(self, interval: int = COMPACTION_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                if await redis_client.set_if_absent(LOCK_KEY, "1", expire=self.interval):
+                    await compact()
+            except Exception:
+                logger.exception("Location compaction failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+location_compactor = LocationCompactor()
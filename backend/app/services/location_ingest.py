@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.models import Booking, TherapistAssignment, TherapistLocation
+from app.schemas.location import LocationFix
+from app.services import accounts, location_history
+from app.services.fleet import fleet
+from app.services.booking_feed import booking_feed
+from app.services.reservations import reservations
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 2.0
+MAX_BUFFERED = 50000
+
+# Whether a therapist serves a booking, cached per (subject, booking number);
+# misses are kept shorter so a new assignment is picked up quickly
+ASSIGNED_KEY = "location:assigned:{}:{}"
+ASSIGNED_TTL = 300
+UNASSIGNED_TTL = 30
+LIVE_ASSIGNMENT_STATUSES = ("assigned", "acknowledged", "in_transit", "reached", "in_progress")
+
+
+def _epoch(fix: LocationFix, now: float) -> float:
+    """Device timestamp of a fix, never later than `now`: a skewed clock must not pin the position"""
+    recorded_at = fix.recorded_at
+    if recorded_at.tzinfo is None:
+        recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+    return min(recorded_at.timestamp(), now)
+
+
+async def _resolve(session: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Swap token subjects and booking numbers for the uuids the table references"""
+    therapists = await accounts.therapist_ids(session, {row["therapist_id"] for row in rows})
+    bookings = await accounts.booking_ids(session, {row["booking_id"] for row in rows if row["booking_id"]})
+    resolved = [
+        {**row, "therapist_id": therapists[row["therapist_id"]], "booking_id": bookings.get(row["booking_id"])}
+        for row in rows
+        if row["therapist_id"] in therapists
+    ]
+    if len(resolved) < len(rows):
+        logger.warning("Dropped %d location fixes from accounts with no therapist record", len(rows) - len(resolved))
+    return resolved
+
+
+async def assigned_bookings(subject: str, booking_numbers: Iterable[str]) -> Set[str]:
+    """
+    The booking numbers among `booking_numbers` the therapist behind
+    `subject` is serving: a live TherapistAssignment, or the therapist
+    held by the booking's confirmed reservation
+    """
+    numbers = sorted(set(booking_numbers))
+    if not numbers:
+        return set()
+    cached = await redis_client.get_many([ASSIGNED_KEY.format(subject, number) for number in numbers])
+    allowed = {number for number, hit in zip(numbers, cached) if hit and hit.get("assigned")}
+    missing = [number for number, hit in zip(numbers, cached) if hit is None]
+    if not missing:
+        return allowed
+
+    found: Set[str] = set()
+    async with AsyncSessionLocal() as session:
+        therapist_id = await accounts.therapist_id(session, subject)
+        if therapist_id:
+            found.update((await session.execute(
+                select(Booking.booking_number)
+                .join(TherapistAssignment, TherapistAssignment.booking_id == Booking.id)
+                .where(
+                    Booking.booking_number.in_(missing),
+                    TherapistAssignment.therapist_id == therapist_id,
+                    TherapistAssignment.status.in_(LIVE_ASSIGNMENT_STATUSES)
+                )
+            )).scalars().all())
+    if therapist_id:
+        for number in missing:
+            if number not in found:
+                record = await reservations.get(number)
+                if record and record.get("status") == "confirmed" and record.get("therapist_id") == str(therapist_id):
+                    found.add(number)
+
+    await redis_client.set_many(
+        {ASSIGNED_KEY.format(subject, number): {"assigned": True} for number in found}, expire=ASSIGNED_TTL
+    )
+    await redis_client.set_many(
+        {ASSIGNED_KEY.format(subject, number): {"assigned": False} for number in missing if number not in found},
+        expire=UNASSIGNED_TTL
+    )
+    return allowed | found
+
+
+class LocationHistoryWriter:
+    """
+    Buffers GPS fixes in-process and appends them to `TherapistLocation`
+    with one multi-row INSERT per flush, instead of one session and one
+    statement per ping. Flushes every FLUSH_INTERVAL seconds or as soon
+    as BATCH_SIZE rows are waiting. A crash loses at most the unflushed
+    window; the live position in Redis is unaffected.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def append(self, rows: List[Dict[str, Any]]):
+        self._buffer.extend(rows)
+        if len(self._buffer) > MAX_BUFFERED:
+            dropped = len(self._buffer) - MAX_BUFFERED
+            del self._buffer[:dropped]
+            logger.warning("Location history buffer full, dropped %d oldest fixes", dropped)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        rows, self._buffer = self._buffer, []
+        try:
+            async with AsyncSessionLocal() as session:
+                resolved = await _resolve(session, rows)
+                for start in range(0, len(resolved), self.batch_size):
+                    await session.execute(insert(TherapistLocation), resolved[start:start + self.batch_size])
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to persist %d location fixes, retrying next flush", len(rows))
+            self._buffer[:0] = rows
+            return 0
+        try:
+            await location_history.mark_late(resolved)
+        except Exception:
+            logger.exception("Failed to queue late location fixes for compaction")
+        return len(resolved)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+history_writer = LocationHistoryWriter()
+
+
+async def ingest_fixes(therapist_id: str, fixes: List[LocationFix]) -> int:
+    """
+    Move the live position to the newest fix and queue every fix for
+    history. Fixes tagged with a booking the therapist is not serving are
+    dropped, so nobody can write into another booking's live feed.
+    """
+    allowed = await assigned_bookings(therapist_id, (fix.booking_id for fix in fixes if fix.booking_id))
+    kept = [fix for fix in fixes if not fix.booking_id or fix.booking_id in allowed]
+    if len(kept) < len(fixes):
+        logger.warning("Dropped %d location fixes for bookings not assigned to %s", len(fixes) - len(kept), therapist_id)
+    fixes = kept
+    if not fixes:
+        return 0
+    now = time.time()
+    stamped = [(_epoch(fix, now), fix) for fix in fixes]
+    recorded_at, latest = max(stamped, key=lambda pair: pair[0])
+    await fleet.update_position(
+        therapist_id, latest.latitude, latest.longitude, updated_at=recorded_at
+    )
+    if latest.booking_id:
+        await booking_feed.publish_position(
+            latest.booking_id, therapist_id, latest.latitude, latest.longitude, recorded_at
+        )
+    history_writer.append([
+        {
+            "therapist_id": therapist_id,
+            "booking_id": fix.booking_id,
+            "latitude": fix.latitude,
+            "longitude": fix.longitude,
+            "accuracy": fix.accuracy,
+            "altitude": fix.altitude,
+            "speed": fix.speed,
+            "heading": fix.heading,
+            "battery_level": fix.battery_level,
+            "is_moving": bool(fix.speed and fix.speed > 0.5),
+            "timestamp": datetime.fromtimestamp(epoch, tz=timezone.utc)
+        }
+        for epoch, fix in stamped
+    ])
+    return len(fixes)
@@ -0,0 +1,365 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, time as clock_time, timezone
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from sqlalchemy import or_, select
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.models import (
+    Service, ServicePricingTier, Promotion, PromotionRule, Coupon, CommissionRule, Vendor
+)
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "pricing:rules:version"
+# How often a worker checks VERSION_KEY, and rebuilds regardless of it
+VERSION_CHECK_INTERVAL = 5.0
+MAX_RULES_AGE = 600.0
+
+DEFAULT_COMMISSION_RATE = 15.0
+
+Condition = Callable[["Cart"], bool]
+
+
+class PricingError(Exception):
+    pass
+
+
+@dataclass
+class ServicePrice:
+    service_id: str
+    name: str
+    duration: int
+    unit_price: float
+    # tier unit prices by ascending min_quantity
+    tier_quantities: List[int] = field(default_factory=list)
+    tier_prices: List[float] = field(default_factory=list)
+
+    def price_for(self, quantity: int) -> float:
+        index = bisect_right(self.tier_quantities, quantity) - 1
+        return self.tier_prices[index] if index >= 0 else self.unit_price
+
+
+@dataclass
+class CompiledPromotion:
+    promotion_id: str
+    name: str
+    kind: str
+    value: float
+    min_amount: float
+    max_discount: Optional[float]
+    services: Optional[FrozenSet[str]]
+    vendors: Optional[FrozenSet[str]]
+    valid_from: Optional[datetime]
+    valid_to: Optional[datetime]
+    conditions: List[Condition] = field(default_factory=list)
+
+    def discount(self, cart: "Cart", eligible: float) -> float:
+        if eligible <= 0 or eligible < self.min_amount:
+            return 0.0
+        if self.valid_from and cart.now < self.valid_from:
+            return 0.0
+        if self.valid_to and cart.now > self.valid_to:
+            return 0.0
+        if not all(condition(cart) for condition in self.conditions):
+            return 0.0
+        amount = eligible * self.value / 100 if self.kind == "percentage" else self.value
+        if self.max_discount is not None:
+            amount = min(amount, self.max_discount)
+        return min(amount, eligible)
+
+
+@dataclass
+class Cart:
+    vendor_id: str
+    # appointment wall-clock time (for day/time rules) and checkout time (for validity)
+    at: datetime
+    now: datetime
+    lines: List[Dict[str, Any]]
+    quantity: int
+
+
+@dataclass
+class RuleTable:
+    services: Dict[str, ServicePrice] = field(default_factory=dict)
+    automatic: Dict[Optional[str], List[CompiledPromotion]] = field(default_factory=dict)
+    coupons: Dict[str, CompiledPromotion] = field(default_factory=dict)
+    # code -> redemption caps; limits of 0 mean unlimited
+    coupon_limits: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # (vendor_id, service_id) -> commission %, with None as the wildcard
+    commission: Dict[Tuple[Optional[str], Optional[str]], float] = field(default_factory=dict)
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _compile_condition(rule_type: str, value: Any) -> Condition:
+    """PromotionRule row -> predicate on the cart; unknown rule types never match"""
+    if rule_type == "day_of_week":
+        days = frozenset(int(day) for day in value)
+        return lambda cart: cart.at.isoweekday() % 7 in days
+    if rule_type == "time_range":
+        start, end = clock_time.fromisoformat(value["start"]), clock_time.fromisoformat(value["end"])
+        return lambda cart: start <= cart.at.time() < end
+    if rule_type == "min_quantity":
+        minimum = int(value)
+        return lambda cart: cart.quantity >= minimum
+    logger.warning("Unknown promotion rule type %r, promotion disabled", rule_type)
+    return lambda cart: False
+
+
+def compile_rules(
+    services: List[Any],
+    tiers: List[Any],
+    promotions: List[Any],
+    rules: List[Any],
+    coupons: List[Any],
+    commission_rules: List[Any],
+    vendors: List[Any]
+) -> RuleTable:
+    table = RuleTable()
+
+    for service in services:
+        price = service.discounted_price if service.discounted_price is not None else service.base_price
+        table.services[str(service.id)] = ServicePrice(str(service.id), service.name, service.duration, float(price))
+    for tier in sorted(tiers, key=lambda tier: tier.min_quantity):
+        service = table.services.get(str(tier.service_id))
+        if service:
+            service.tier_quantities.append(tier.min_quantity)
+            service.tier_prices.append(float(tier.price))
+
+    conditions: Dict[str, List[Condition]] = {}
+    for rule in rules:
+        conditions.setdefault(str(rule.promotion_id), []).append(_compile_condition(rule.rule_type, rule.rule_value))
+
+    compiled: Dict[str, CompiledPromotion] = {}
+    limits: Dict[str, Dict[str, int]] = {}
+    for promotion in promotions:
+        promotion_id = str(promotion.id)
+        compiled[promotion_id] = CompiledPromotion(
+            promotion_id=promotion_id,
+            name=promotion.name,
+            kind=promotion.type,
+            value=float(promotion.discount_value),
+            min_amount=float(promotion.min_booking_amount or 0),
+            max_discount=float(promotion.max_discount_amount) if promotion.max_discount_amount is not None else None,
+            services=frozenset(map(str, promotion.applicable_services)) if promotion.applicable_services else None,
+            vendors=frozenset(map(str, promotion.applicable_vendors)) if promotion.applicable_vendors else None,
+            valid_from=_utc(promotion.valid_from),
+            valid_to=_utc(promotion.valid_to),
+            conditions=conditions.get(promotion_id, [])
+        )
+        limits[promotion_id] = {
+            "total": promotion.total_usage_limit or 0,
+            "per_customer": promotion.usage_limit_per_customer or 0
+        }
+
+    # promotions behind a coupon only apply when the code is presented
+    for coupon in coupons:
+        promotion = compiled.get(str(coupon.promotion_id))
+        if promotion:
+            table.coupons[coupon.code.upper()] = promotion
+            table.coupon_limits[coupon.code.upper()] = {
+                "coupon_id": str(coupon.id), "promotion_id": promotion.promotion_id, **limits[promotion.promotion_id]
+            }
+    coupon_only = {promotion.promotion_id for promotion in table.coupons.values()}
+    for promotion in compiled.values():
+        if promotion.promotion_id in coupon_only:
+            continue
+        for vendor_id in promotion.vendors or [None]:
+            table.automatic.setdefault(vendor_id, []).append(promotion)
+
+    for vendor in vendors:
+        if vendor.commission_rate is not None:
+            table.commission[(str(vendor.id), None)] = float(vendor.commission_rate)
+    for rule in commission_rules:
+        vendor_id = str(rule.vendor_id) if rule.vendor_id else None
+        service_id = str(rule.service_id) if rule.service_id else None
+        table.commission[(vendor_id, service_id)] = float(rule.commission_rate)
+
+    return table
+
+
+def _commission_rate(table: RuleTable, vendor_id: str, service_id: str) -> float:
+    commission = table.commission
+    for key in ((vendor_id, service_id), (vendor_id, None), (None, service_id), (None, None)):
+        if key in commission:
+            return commission[key]
+    return DEFAULT_COMMISSION_RATE
+
+
+def price_cart(
+    table: RuleTable,
+    vendor_id: str,
+    items: List[Dict[str, Any]],
+    at: Optional[datetime] = None,
+    coupon_code: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Price a cart against a compiled rule table: tiered unit prices, the
+    best automatic promotion, an optional coupon, and per-line commission.
+    `at` is the appointment time day/time rules are checked against.
+    Raises PricingError for unknown services or coupon codes.
+    """
+    now = datetime.now(timezone.utc)
+    at = at or now
+    coupon = None
+    if coupon_code:
+        coupon = table.coupons.get(coupon_code.upper())
+        if coupon is None:
+            raise PricingError(f"Unknown coupon code {coupon_code}")
+
+    candidates = table.automatic.get(vendor_id, []) + table.automatic.get(None, [])
+    if coupon:
+        candidates = candidates + [coupon]
+    eligible = [0.0] * len(candidates)
+
+    lines = []
+    subtotal = 0.0
+    quantity = 0
+    for item in items:
+        service = table.services.get(item["service_id"])
+        if service is None:
+            raise PricingError(f"Unknown service {item['service_id']}")
+        line_quantity = item.get("quantity", 1)
+        unit_price = service.price_for(line_quantity)
+        amount = round(unit_price * line_quantity, 2)
+        for index, promotion in enumerate(candidates):
+            if (promotion.services is None or service.service_id in promotion.services) and (
+                promotion.vendors is None or vendor_id in promotion.vendors
+            ):
+                eligible[index] += amount
+        lines.append({
+            "service_id": service.service_id,
+            "name": service.name,
+            "quantity": line_quantity,
+            "duration": service.duration,
+            "unit_price": unit_price,
+            "amount": amount
+        })
+        subtotal += amount
+        quantity += line_quantity
+
+    cart = Cart(vendor_id=vendor_id, at=at, now=now, lines=lines, quantity=quantity)
+    best, best_discount = None, 0.0
+    for index, promotion in enumerate(candidates):
+        if promotion is coupon:
+            continue
+        discount = promotion.discount(cart, eligible[index])
+        if discount > best_discount:
+            best, best_discount = promotion, discount
+    applied = [(best, best_discount)] if best else []
+    if coupon:
+        coupon_discount = coupon.discount(cart, min(eligible[-1], subtotal - best_discount))
+        if coupon_discount <= 0:
+            raise PricingError(f"Coupon {coupon_code} does not apply to this booking")
+        applied.append((coupon, coupon_discount))
+
+    discount = round(sum(amount for _, amount in applied), 2)
+    total = round(subtotal - discount, 2)
+    commission = 0.0
+    for line in lines:
+        # spread the cart discount over lines by value for the commission base
+        share = line["amount"] / subtotal if subtotal else 0.0
+        line["discount"] = round(discount * share, 2)
+        line["net_amount"] = round(line["amount"] - line["discount"], 2)
+        line["commission_rate"] = _commission_rate(table, vendor_id, line["service_id"])
+        line["commission"] = round(line["net_amount"] * line["commission_rate"] / 100, 2)
+        commission += line["commission"]
+
+    return {
+        "vendor_id": vendor_id,
+        "lines": lines,
+        "subtotal": round(subtotal, 2),
+        "discount_amount": discount,
+        "promotions": [
+            {"promotion_id": promotion.promotion_id, "name": promotion.name, "discount": round(amount, 2)}
+            for promotion, amount in applied
+        ],
+        "coupon_code": coupon_code.upper() if coupon else None,
+        "total_amount": total,
+        "commission": round(commission, 2),
+        "net_amount": round(total - commission, 2),
+        "duration": sum(line["duration"] * line["quantity"] for line in lines)
+    }
+
+
+class PricingEngine:
+    """
+    Server-side cart pricing.
+
+    Active services, pricing tiers, promotions with their rules, coupons
+    and commission rules are loaded once and compiled into a RuleTable of
+    dict lookups and precompiled predicates, so pricing a cart is a single
+    pass over its lines with no I/O. Anything that edits pricing data
+    calls `invalidate`, which bumps a version counter in Redis; every
+    worker notices within VERSION_CHECK_INTERVAL and recompiles.
+    """
+
+    def __init__(self):
+        self._table: Optional[RuleTable] = None
+        self._version: Optional[int] = None
+        self._compiled_at = 0.0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> RuleTable:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            async def rows(statement):
+                return (await session.execute(statement)).scalars().all()
+
+            promotions = await rows(select(Promotion).where(
+                Promotion.status == "active",
+                or_(Promotion.valid_to.is_(None), Promotion.valid_to >= now)
+            ))
+            promotion_ids = [promotion.id for promotion in promotions]
+            return compile_rules(
+                services=await rows(select(Service).where(Service.is_active.is_(True))),
+                tiers=await rows(select(ServicePricingTier).where(ServicePricingTier.is_active.is_(True))),
+                promotions=promotions,
+                rules=await rows(select(PromotionRule).where(PromotionRule.promotion_id.in_(promotion_ids))),
+                coupons=await rows(select(Coupon).where(
+                    Coupon.is_active.is_(True), Coupon.promotion_id.in_(promotion_ids)
+                )),
+                commission_rules=await rows(select(CommissionRule).where(CommissionRule.is_active.is_(True))),
+                vendors=await rows(select(Vendor).where(Vendor.status == "active"))
+            )
+
+    async def rules(self) -> RuleTable:
+        now = time.monotonic()
+        if self._table is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return self._table
+        async with self._lock:
+            if self._table is not None and time.monotonic() - self._checked_at < VERSION_CHECK_INTERVAL:
+                return self._table
+            version = int(await redis_client.get(VERSION_KEY) or 0)
+            stale = self._table is None or version != self._version or now - self._compiled_at > MAX_RULES_AGE
+            if stale:
+                self._table = await self._load()
+                self._version = version
+                self._compiled_at = time.monotonic()
+            self._checked_at = time.monotonic()
+        return self._table
+
+    async def quote(
+        self,
+        vendor_id: str,
+        items: List[Dict[str, Any]],
+        at: Optional[datetime] = None,
+        coupon_code: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return price_cart(await self.rules(), vendor_id, items, at=at, coupon_code=coupon_code)
+
+    async def invalidate(self) -> int:
+        self._checked_at = 0.0
+        return await redis_client.increment(VERSION_KEY)
+
+
+pricing_engine = PricingEngine()
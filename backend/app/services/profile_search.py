@@ -0,0 +1,117 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from app.models import UserProfile, Vendor
+
+# word_similarity() cut-off for fuzzy name matches through the `<%` operator
+WORD_SIMILARITY_THRESHOLD = 0.4
+# Shorter digit runs match far too many numbers to be useful
+MIN_PHONE_DIGITS = 4
+DEFAULT_LIMIT = 20
+
+# Every condition below is served by the gin_trgm_ops indexes created in
+# supabase/migrations/20251101000000_admin_search_trigram_indexes.sql,
+# so Postgres answers a search with bitmap index scans, never a table scan.
+
+
+def _terms(query: str) -> Tuple[str, Optional[str]]:
+    text = " ".join(query.lower().split())
+    digits = re.sub(r"\D", "", query)
+    return text, digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def match(
+    query: str,
+    names: Sequence[ColumnElement] = (),
+    emails: Sequence[ColumnElement] = (),
+    phones: Sequence[ColumnElement] = ()
+) -> Tuple[ColumnElement, ColumnElement]:
+    """
+    WHERE clause and rank (0..1) for a fuzzy lookup of `query`.
+
+    Names match on trigram word similarity, so typos and partial words
+    still hit; emails match as substrings, ranked exact > prefix > infix;
+    phone numbers match on their digits wherever they appear in the query.
+    """
+    text, digits = _terms(query)
+    conditions, scores = [], []
+    for column in names:
+        conditions += [literal(text).op("<%")(column), column.icontains(text, autoescape=True)]
+        scores.append(func.word_similarity(text, column))
+    for column in emails:
+        conditions.append(column.icontains(text, autoescape=True))
+        scores.append(case(
+            (func.lower(column) == text, 1.0),
+            (func.lower(column).startswith(text, autoescape=True), 0.9),
+            (column.icontains(text, autoescape=True), 0.6),
+            else_=0.0
+        ))
+    for column in phones if digits else ():
+        conditions.append(column.contains(digits))
+        scores.append(case(
+            (column.endswith(digits), 1.0),
+            (column.contains(digits), 0.8),
+            else_=0.0
+        ))
+    return or_(*conditions), func.greatest(*scores)
+
+
+def user_match(query: str) -> Tuple[ColumnElement, ColumnElement]:
+    return match(query, names=[UserProfile.name], emails=[UserProfile.email], phones=[UserProfile.mobile])
+
+
+def vendor_match(query: str) -> Tuple[ColumnElement, ColumnElement]:
+    return match(
+        query,
+        names=[Vendor.business_name, Vendor.contact_person],
+        emails=[Vendor.contact_email],
+        phones=[Vendor.contact_mobile]
+    )
+
+
+async def _ranked(db: AsyncSession, statement, score: ColumnElement, limit: int) -> List[Dict[str, Any]]:
+    # `<%` reads its threshold from this setting; scope it to the transaction
+    await db.execute(select(func.set_config(
+        "pg_trgm.word_similarity_threshold", str(WORD_SIMILARITY_THRESHOLD), True
+    )))
+    rows = (await db.execute(statement.order_by(score.desc()).limit(limit))).all()
+    return [{**row._mapping, "score": round(float(row.score), 3)} for row in rows]
+
+
+async def search_users(
+    db: AsyncSession,
+    query: str,
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """Best matching user profiles for `query` by name, mobile or email"""
+    condition, score = user_match(query)
+    statement = select(
+        UserProfile.id, UserProfile.name, UserProfile.mobile, UserProfile.email,
+        UserProfile.role, UserProfile.status, UserProfile.created_at, score.label("score")
+    ).where(condition)
+    if role:
+        statement = statement.where(UserProfile.role == role)
+    if status:
+        statement = statement.where(UserProfile.status == status)
+    return await _ranked(db, statement, score, limit)
+
+
+async def search_vendors(
+    db: AsyncSession,
+    query: str,
+    status: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """Best matching vendors for `query` by business name, contact person, mobile or email"""
+    condition, score = vendor_match(query)
+    statement = select(
+        Vendor.id, Vendor.business_name, Vendor.contact_person, Vendor.contact_mobile,
+        Vendor.contact_email, Vendor.status, Vendor.verification_status, score.label("score")
+    ).where(condition)
+    if status:
+        statement = statement.where(Vendor.status == status)
+    return await _ranked(db, statement, score, limit)
@@ -0,0 +1,234 @@
+import calendar
+import time
+from datetime import date, datetime, timedelta, time as clock_time
+from typing import Any, Dict, List, Optional
+from app.core.redis_client import redis_client
+
+SLOT_MINUTES = 15
+
+SLOTS_KEY = "slots:{}:{}"
+RESERVATION_KEY = "reservation:{}"
+
+HOLD_TTL = 600
+# Reservation records outlive the hold so late confirms can be told it expired
+RECORD_GRACE = 3600
+# Slot claims are kept until this long after the end of the booking day
+# (a UTC day; the grace covers any local offset)
+CLAIM_GRACE = 86400
+
+# Each slot field holds "<reservation_id>|<expires_ms>"; expires_ms 0 means confirmed.
+# KEYS: therapist-day slots hash, reservation record
+# ARGV: reservation_id, first slot, slot count, now_ms, expires_ms, record ttl,
+#       claim_until (unix seconds), therapist_id, vendor_id, date, customer_id
+HOLD_SCRIPT = """
+local id = ARGV[1]
+local first = tonumber(ARGV[2])
+local last = first + tonumber(ARGV[3]) - 1
+local now = tonumber(ARGV[4])
+for slot = first, last do
+    local value = redis.call('HGET', KEYS[1], slot)
+    if value then
+        local owner, expires = string.match(value, '^(.*)|(%d+)$')
+        expires = tonumber(expires)
+        if owner ~= id and (expires == 0 or expires > now) then
+            return {0, owner}
+        end
+    end
+end
+local entry = id .. '|' .. ARGV[5]
+for slot = first, last do
+    redis.call('HSET', KEYS[1], slot, entry)
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[7])
+redis.call('HSET', KEYS[2], 'status', 'held', 'therapist_id', ARGV[8], 'vendor_id', ARGV[9],
+    'date', ARGV[10], 'first', ARGV[2], 'count', ARGV[3], 'expires_ms', ARGV[5], 'customer_id', ARGV[11],
+    'claim_until', ARGV[7])
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return {1, id}
+"""
+
+# KEYS: therapist-day slots hash, reservation record; ARGV: reservation_id, now_ms
+CONFIRM_SCRIPT = """
+local record = redis.call('HMGET', KEYS[2], 'status', 'first', 'count', 'expires_ms', 'claim_until')
+if not record[1] then
+    return 'missing'
+end
+if record[1] == 'confirmed' then
+    return 'already_confirmed'
+end
+if tonumber(record[4]) <= tonumber(ARGV[2]) then
+    return 'expired'
+end
+local entry = ARGV[1] .. '|0'
+local first = tonumber(record[2])
+for slot = first, first + tonumber(record[3]) - 1 do
+    local value = redis.call('HGET', KEYS[1], slot)
+    if not value or string.match(value, '^(.*)|') ~= ARGV[1] then
+        return 'lost'
+    end
+    redis.call('HSET', KEYS[1], slot, entry)
+end
+redis.call('HSET', KEYS[2], 'status', 'confirmed', 'expires_ms', 0)
+redis.call('EXPIREAT', KEYS[2], record[5])
+redis.call('EXPIREAT', KEYS[1], record[5])
+return 'confirmed'
+"""
+
+# KEYS: therapist-day slots hash, reservation record; ARGV: reservation_id
+RELEASE_SCRIPT = """
+local record = redis.call('HMGET', KEYS[2], 'status', 'first', 'count')
+if not record[1] then
+    return 'missing'
+end
+local first = tonumber(record[2])
+for slot = first, first + tonumber(record[3]) - 1 do
+    local value = redis.call('HGET', KEYS[1], slot)
+    if value and string.match(value, '^(.*)|') == ARGV[1] then
+        redis.call('HDEL', KEYS[1], slot)
+    end
+end
+redis.call('DEL', KEYS[2])
+return record[1]
+"""
+
+
+class ReservationConflict(Exception):
+    pass
+
+
+def _span(start: clock_time, duration: int) -> tuple:
+    begin = start.hour * 60 + start.minute
+    first = begin // SLOT_MINUTES
+    last = -(-(begin + duration) // SLOT_MINUTES)
+    return first, last - first
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _claim_until(day: date) -> int:
+    return calendar.timegm((day + timedelta(days=1)).timetuple()) + CLAIM_GRACE
+
+
+class SlotReservations:
+    """
+    Double-booking guard for therapist time.
+
+    A hold claims every 15-minute slot a booking touches in one Lua call,
+    so two overlapping holds for the same therapist can never both
+    succeed regardless of how many requests race. Holds expire on their
+    own after HOLD_TTL (payment abandoned); confirming turns the hold
+    into a claim kept until the booking day is over, and releasing frees
+    only slots it still owns.
+    """
+
+    async def hold(
+        self,
+        reservation_id: str,
+        vendor_id: str,
+        therapist_id: str,
+        day: date,
+        start: clock_time,
+        duration: int,
+        ttl: int = HOLD_TTL,
+        customer_id: str = ""
+    ) -> Dict[str, Any]:
+        first, count = _span(start, duration)
+        expires_ms = _now_ms() + ttl * 1000
+        record_key = RESERVATION_KEY.format(reservation_id)
+        result = await redis_client.run_script(
+            HOLD_SCRIPT,
+            keys=[SLOTS_KEY.format(therapist_id, day.isoformat()), record_key],
+            args=[
+                reservation_id, first, count, _now_ms(), expires_ms, ttl + RECORD_GRACE,
+                _claim_until(day), therapist_id, vendor_id, day.isoformat(), customer_id
+            ]
+        )
+        won, owner = result or (0, None)
+        if not won:
+            raise ReservationConflict(f"Slot already held by {owner}" if owner else "Reservations unavailable")
+        return {
+            "reservation_id": reservation_id,
+            "therapist_id": therapist_id,
+            "status": "held",
+            "expires_at": datetime.utcfromtimestamp(expires_ms / 1000).isoformat()
+        }
+
+    async def hold_any(
+        self,
+        reservation_id: str,
+        vendor_id: str,
+        therapist_ids: List[str],
+        day: date,
+        start: clock_time,
+        duration: int,
+        ttl: int = HOLD_TTL,
+        customer_id: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """Hold the first candidate therapist that is still free"""
+        for therapist_id in therapist_ids:
+            try:
+                return await self.hold(
+                    reservation_id, vendor_id, therapist_id, day, start, duration, ttl, customer_id=customer_id
+                )
+            except ReservationConflict:
+                continue
+        return None
+
+    @staticmethod
+    def span_of(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Therapist time a reservation record covers, for availability updates"""
+        first = int(record["first"]) * SLOT_MINUTES
+        return {
+            "vendor_id": record["vendor_id"],
+            "day": date.fromisoformat(record["date"]),
+            "therapist_id": record["therapist_id"],
+            "start": clock_time(first // 60, first % 60),
+            "duration": int(record["count"]) * SLOT_MINUTES
+        }
+
+    async def get(self, reservation_id: str) -> Optional[Dict[str, Any]]:
+        record = await redis_client.get_hash(RESERVATION_KEY.format(reservation_id))
+        return record or None
+
+    async def claims(
+        self, therapist_ids: List[str], day: date, confirmed_only: bool = False
+    ) -> Dict[str, Dict[int, str]]:
+        """Live claims on each therapist's `day` as slot -> reservation_id, expired holds left out"""
+        hashes = await redis_client.get_hashes([SLOTS_KEY.format(t, day.isoformat()) for t in therapist_ids])
+        now = _now_ms()
+        claimed: Dict[str, Dict[int, str]] = {}
+        for therapist_id, slots in zip(therapist_ids, hashes):
+            live = {}
+            for slot, value in slots.items():
+                owner, _, expires = value.rpartition("|")
+                if expires == "0" or (not confirmed_only and int(expires) > now):
+                    live[int(slot)] = owner
+            claimed[therapist_id] = live
+        return claimed
+
+    async def _run(self, script: str, reservation_id: str, *args) -> tuple:
+        record = await self.get(reservation_id)
+        if not record:
+            return "missing", None
+        result = await redis_client.run_script(
+            script,
+            keys=[
+                SLOTS_KEY.format(record["therapist_id"], record["date"]),
+                RESERVATION_KEY.format(reservation_id)
+            ],
+            args=[reservation_id, *args]
+        )
+        return result, record
+
+    async def confirm(self, reservation_id: str) -> tuple:
+        """Returns (outcome, record); outcome is confirmed, already_confirmed, expired, lost or missing"""
+        return await self._run(CONFIRM_SCRIPT, reservation_id, _now_ms())
+
+    async def release(self, reservation_id: str) -> tuple:
+        """Returns (previous status, record); previous status is held, confirmed or missing"""
+        return await self._run(RELEASE_SCRIPT, reservation_id)
+
+
+reservations = SlotReservations()
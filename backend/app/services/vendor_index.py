@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.models import Service, Vendor
+
+logger = logging.getLogger(__name__)
+
+GEO_KEY = "geo:vendors"
+SERVICE_GEO_KEY = "geo:vendors:service:{}"
+CARDS_KEY = "vendors:cards"
+# held by the worker reindexing on startup, so a rolling deploy reindexes once
+REINDEX_LOCK_KEY = "vendors:index:reindex"
+REINDEX_LOCK_TTL = 300
+
+MAX_RESULTS = 100
+# Vendors written per round trip by `rebuild`
+REBUILD_BATCH = 500
+# Only vendors with this status are listed
+LISTED_STATUS = "active"
+
+
+def service_slug(name: str) -> str:
+    return "_".join(name.lower().replace("-", " ").split())
+
+
+async def load_cards(db: AsyncSession, vendor_ids: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Listing cards for listed vendors, all of them or those in `vendor_ids`.
+    Coordinates come from `business_address`; cards without them are
+    returned too and skipped by `rebuild`.
+    """
+    query = select(Vendor).where(Vendor.status == LISTED_STATUS)
+    if vendor_ids is not None:
+        query = query.where(Vendor.id.in_(list(vendor_ids)))
+    vendors = (await db.execute(query)).scalars().all()
+
+    offered = {service_id for vendor in vendors for service_id in vendor.services_offered or []}
+    names = {}
+    if offered:
+        names = dict((await db.execute(select(Service.id, Service.name).where(Service.id.in_(offered)))).all())
+
+    cards = []
+    for vendor in vendors:
+        address = vendor.business_address or {}
+        cards.append({
+            "id": str(vendor.id),
+            "name": vendor.business_name,
+            "business_type": vendor.business_type,
+            "rating": float(vendor.rating or 0),
+            "total_reviews": vendor.total_reviews or 0,
+            "address": ", ".join(str(address[part]) for part in ("line1", "line2", "city") if address.get(part)),
+            "services": [names[service_id] for service_id in vendor.services_offered or [] if service_id in names],
+            "latitude": address.get("latitude"),
+            "longitude": address.get("longitude")
+        })
+    return cards
+
+
+class VendorIndex:
+    """
+    Nearby-vendor index backed by Redis GEO sets.
+
+    Every listed vendor is a member of `geo:vendors` and of one
+    `geo:vendors:service:{slug}` set per service type it offers, so a
+    radius query with a service filter is a single GEOSEARCH that comes
+    back already sorted by distance. Listing cards live in one hash so
+    the page is fetched with a single HMGET.
+
+    The vendors table is the source of truth: `reindex` reloads it, once
+    per deploy from `start` and on demand from the admin API, and status
+    changes add or remove single vendors as they happen.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def _service_types(self, vendor: Dict[str, Any]) -> List[str]:
+        names = list(vendor.get("services", [])) + list(vendor.get("categories", []))
+        if vendor.get("business_type"):
+            names.append(vendor["business_type"])
+        return sorted({service_slug(name) for name in names if name})
+
+    def _write(self, pipe, vendor: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+        vendor_id = vendor["id"]
+        latitude = float(vendor["latitude"])
+        longitude = float(vendor["longitude"])
+        service_types = self._service_types(vendor)
+
+        if previous:
+            for slug in set(previous.get("service_types", [])) - set(service_types):
+                pipe.zrem(SERVICE_GEO_KEY.format(slug), vendor_id)
+
+        card = {**vendor, "latitude": latitude, "longitude": longitude, "service_types": service_types}
+        pipe.hset(CARDS_KEY, vendor_id, json.dumps(card))
+        pipe.geoadd(GEO_KEY, [longitude, latitude, vendor_id])
+        for slug in service_types:
+            pipe.geoadd(SERVICE_GEO_KEY.format(slug), [longitude, latitude, vendor_id])
+
+    async def upsert(self, vendor: Dict[str, Any]) -> bool:
+        """Add or move a vendor; `vendor` must carry id, latitude and longitude"""
+        return await self.upsert_many([vendor]) == 1
+
+    async def upsert_many(self, vendors: List[Dict[str, Any]]) -> int:
+        """
+        Add or move many vendors with one HMGET for their current cards and
+        one MULTI for all the writes; returns vendors written
+        """
+        if not vendors:
+            return 0
+        previous = await redis_client.get_hash_fields(CARDS_KEY, [vendor["id"] for vendor in vendors])
+        async with redis_client.pipeline() as pipe:
+            if pipe is None:
+                return 0
+            for vendor, card in zip(vendors, previous):
+                self._write(pipe, vendor, card)
+        return len(vendors)
+
+    async def remove(self, vendor_id: str) -> bool:
+        card = (await redis_client.get_hash_fields(CARDS_KEY, [vendor_id]))[0]
+        if not card:
+            return False
+        async with redis_client.pipeline() as pipe:
+            if pipe is None:
+                return False
+            for slug in card.get("service_types", []):
+                pipe.zrem(SERVICE_GEO_KEY.format(slug), vendor_id)
+            pipe.zrem(GEO_KEY, vendor_id)
+            pipe.hdel(CARDS_KEY, vendor_id)
+        return True
+
+    async def rebuild(self, vendors: List[Dict[str, Any]], batch_size: int = REBUILD_BATCH) -> int:
+        """Bulk load, e.g. from the vendors table on deploy; returns vendors indexed"""
+        located = [v for v in vendors if v.get("latitude") is not None and v.get("longitude") is not None]
+        indexed = 0
+        for i in range(0, len(located), batch_size):
+            indexed += await self.upsert_many(located[i:i + batch_size])
+        return indexed
+
+    async def reindex(self) -> int:
+        """Reload every listed vendor from the database and drop the ones no longer listed"""
+        async with AsyncSessionLocal() as db:
+            cards = await load_cards(db)
+        listed = {card["id"] for card in cards if card["latitude"] is not None and card["longitude"] is not None}
+        for vendor_id in set(await redis_client.get_hash(CARDS_KEY) or {}) - listed:
+            await self.remove(vendor_id)
+        indexed = await self.rebuild(cards)
+        logger.info("Vendor index rebuilt with %d vendors", indexed)
+        return indexed
+
+    async def refresh(self, db: AsyncSession, vendor_id: Any) -> bool:
+        """Re-read one vendor: (re)list it if it is active and located, unlist it otherwise"""
+        cards = await load_cards(db, [vendor_id])
+        if cards and cards[0]["latitude"] is not None and cards[0]["longitude"] is not None:
+            return await self.upsert(cards[0])
+        await self.remove(str(vendor_id))
+        return False
+
+    async def _reindex_once(self):
+        try:
+            if await redis_client.set_if_absent(REINDEX_LOCK_KEY, "1", expire=REINDEX_LOCK_TTL):
+                await self.reindex()
+        except Exception:
+            logger.exception("Vendor index rebuild failed, serving the existing index")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._reindex_once())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        service_type: Optional[str] = None,
+        limit: Optional[int] = MAX_RESULTS
+    ) -> List[Dict[str, Any]]:
+        """
+        Vendors within `radius` km, nearest first, with `distance` in km.
+        `limit=None` returns every vendor in range, for results that are
+        re-ranked from another point before being cut to a page.
+        """
+        key = SERVICE_GEO_KEY.format(service_slug(service_type)) if service_type else GEO_KEY
+        hits = await redis_client.geo_search(
+            key, longitude, latitude, radius, unit="km",
+            count=None if limit is None else min(limit, MAX_RESULTS)
+        )
+        if not hits:
+            return []
+
+        cards = await redis_client.get_hash_fields(CARDS_KEY, [vendor_id for vendor_id, _ in hits])
+        vendors = []
+        for (vendor_id, distance), card in zip(hits, cards):
+            if card is None:
+                continue
+            card.pop("service_types", None)
+            card["distance"] = round(distance, 2)
+            vendors.append(card)
+        return vendors
+
+
+vendor_index = VendorIndex()
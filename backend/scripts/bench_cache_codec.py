@@ -0,0 +1,154 @@
+"""
+Microbenchmark for the cache value codecs.
+
+Encodes and decodes payloads shaped like what we actually cache (geo
+cell vendor listings, vendor detail, the small all-vendors listing, an
+idempotency record) with every serializer and compressor combination,
+and reports stored size and per-call time next to the stdlib json the
+cache used before codecs:
+
+    cd backend
+    pip install orjson msgpack zstandard lz4
+    python -m scripts.bench_cache_codec
+    python -m scripts.bench_cache_codec --listing-size 100 --min-size 512
+
+Combinations whose library is not installed are skipped.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import string
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/ombaro_db")
+os.environ.setdefault("ASYNC_DATABASE_URL", "postgresql+asyncpg://localhost/ombaro_db")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.core.codec import Codec, CodecError, COMPRESS_MIN_BYTES, COMPRESSORS, SERIALIZERS  # noqa: E402
+
+AREAS = ["Koramangala", "Indiranagar", "HSR Layout", "Whitefield", "Jayanagar", "Malleshwaram", "BTM Layout"]
+SERVICES = [
+    "Swedish Massage", "Deep Tissue Massage", "Aromatherapy", "Thai Massage", "Hot Stone Therapy",
+    "Reflexology", "Balinese Massage", "Head Massage", "Body Scrub", "Facial", "Couples Massage"
+]
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _id() -> str:
+    return "".join(random.choices(string.hexdigits.lower(), k=32))
+
+
+def vendor_card(i: int) -> dict:
+    """An entry of vendor_index.nearby, as cached per geo cell"""
+    area = random.choice(AREAS)
+    services = random.sample(SERVICES, random.randint(2, 6))
+    low = random.choice([800, 1000, 1200, 1500])
+    return {
+        "id": _id(),
+        "name": f"{random.choice(['Serenity', 'Bliss', 'Lotus', 'Zen', 'Aura'])} Spa {i}",
+        "rating": round(random.uniform(3.5, 5.0), 1),
+        "total_reviews": random.randint(0, 900),
+        "address": f"{random.randint(1, 400)} {area} Main Rd, {area}, Bangalore",
+        "services": services,
+        "service_types": [s.lower().replace(" ", "-") for s in services],
+        "price_range": f"₹{low}-₹{low * 3}",
+        "images": [f"/media/vendors/{_id()}/{n}.jpg" for n in range(random.randint(1, 4))],
+        "latitude": round(12.9 + random.random() / 10, 6),
+        "longitude": round(77.55 + random.random() / 10, 6),
+        "distance": round(random.uniform(0.1, 10), 2),
+    }
+
+
+def vendor_detail() -> dict:
+    """The body cached for GET /customer/vendors/{id}"""
+    card = vendor_card(0)
+    return {
+        **card,
+        "phone": "+9198" + "".join(random.choices(string.digits, k=8)),
+        "description": " ".join(random.choices(SERVICES + AREAS, k=60)),
+        "services": [
+            {
+                "id": _id(),
+                "name": name,
+                "duration": random.choice([30, 45, 60, 90, 120]),
+                "price": random.choice([800, 1200, 1500, 2000, 2500, 3000]),
+                "description": f"{name} by certified therapists, oils included"
+            }
+            for name in random.sample(SERVICES, len(SERVICES))
+        ],
+        "therapists": [
+            {
+                "id": _id(),
+                "name": f"Therapist {n}",
+                "specialization": random.sample(SERVICES, 2),
+                "rating": round(random.uniform(4.0, 5.0), 1),
+                "experience_years": random.randint(1, 15)
+            }
+            for n in range(8)
+        ],
+        "working_hours": {day: "9:00 AM - 9:00 PM" for day in DAYS},
+    }
+
+
+def idempotency_record() -> dict:
+    return {
+        "state": "done",
+        "fingerprint": _id() * 2,
+        "status": 201,
+        "headers": [["content-type", "application/json"], ["content-length", "412"]],
+        "body": base64.b64encode(json.dumps(vendor_card(0)).encode()).decode()
+    }
+
+
+def payloads(listing_size: int) -> dict:
+    random.seed(7)
+    return {
+        f"geo cell ({listing_size} vendors)": [vendor_card(i) for i in range(listing_size)],
+        "vendor detail": vendor_detail(),
+        "vendors:all (2 vendors)": [vendor_card(i) for i in range(2)],
+        "idempotency record": idempotency_record(),
+    }
+
+
+def per_call(fn) -> float:
+    """Best of three runs, in microseconds per call"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listing-size", type=int, default=100)
+    parser.add_argument("--min-size", type=int, default=COMPRESS_MIN_BYTES, help="compression threshold in bytes")
+    args = parser.parse_args()
+
+    codecs = {}
+    for serializer in SERIALIZERS:
+        for compression in COMPRESSORS:
+            try:
+                codecs[f"{serializer}+{compression}"] = Codec(serializer, compression, args.min_size)
+            except CodecError as e:
+                print(f"skipping {serializer}+{compression}: {e}")
+
+    for name, value in payloads(args.listing_size).items():
+        legacy = json.dumps(value)
+        legacy_bytes = len(legacy.encode())
+        legacy_encode = per_call(lambda: json.dumps(value))
+        legacy_decode = per_call(lambda: json.loads(legacy))
+
+        print(f"\n{name}")
+        print(f"  {'codec':<16}{'bytes':>9}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+        print(f"  {'json (before)':<16}{legacy_bytes:>9}{1.0:>8.2f}{legacy_encode:>12.1f}{legacy_decode:>12.1f}")
+        for label, codec in codecs.items():
+            raw = codec.encode(value)
+            assert codec.decode(raw) == value, label
+            encode = per_call(lambda: codec.encode(value))
+            decode = per_call(lambda: codec.decode(raw))
+            print(f"  {label:<16}{len(raw):>9}{legacy_bytes / len(raw):>8.2f}{encode:>12.1f}{decode:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Concurrency stress test for slot reservations.
+
+Fires hundreds of simultaneous holds at the same therapist slot (and at
+overlapping spans of it) and checks that exactly one wins, that confirm
+and release behave, and that an expired hold frees the slot.
+
+Runs against an in-process Redis stand-in (fakeredis with Lua support)
+by default, or against a real server with --redis-url:
+
+    cd backend
+    pip install "fakeredis[lua]"
+    python -m scripts.stress_reservations
+    python -m scripts.stress_reservations --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date, time as clock_time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/ombaro_db")
+os.environ.setdefault("ASYNC_DATABASE_URL", "postgresql+asyncpg://localhost/ombaro_db")
+os.environ.setdefault("SECRET_KEY", "stress-test")
+
+from app.core.redis_client import redis_client  # noqa: E402
+from app.services.reservations import reservations, ReservationConflict  # noqa: E402
+
+DAY = date(2030, 1, 15)
+START = clock_time(14, 0)
+
+
+async def connect(redis_url: str):
+    if redis_url:
+        import redis.asyncio as redis
+        redis_client.redis = redis.from_url(redis_url, decode_responses=True)
+        await redis_client.redis.flushdb()
+    else:
+        import fakeredis
+        redis_client.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+async def attempt(reservation_id: str, therapist_id: str, start: clock_time, duration: int) -> bool:
+    await asyncio.sleep(random.random() / 1000)
+    try:
+        await reservations.hold(reservation_id, "vendor_1", therapist_id, DAY, start, duration)
+        return True
+    except ReservationConflict:
+        return False
+
+
+async def race_same_slot(concurrency: int):
+    results = await asyncio.gather(*[
+        attempt(f"booking_{i}", "therapist_same", START, 60) for i in range(concurrency)
+    ])
+    winners = sum(results)
+    assert winners == 1, f"same slot: {winners} winners"
+    print(f"same slot: {concurrency} concurrent holds, 1 winner")
+
+
+async def race_overlapping(concurrency: int):
+    starts = [clock_time(13, 0), clock_time(13, 30), clock_time(14, 0), clock_time(14, 45)]
+    results = await asyncio.gather(*[
+        attempt(f"overlap_{i}", "therapist_overlap", random.choice(starts), 60) for i in range(concurrency)
+    ])
+    held = [await reservations.get(f"overlap_{i}") for i, won in enumerate(results) if won]
+    spans = sorted((int(r["first"]), int(r["first"]) + int(r["count"])) for r in held)
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert end <= start, f"overlapping holds granted: {spans}"
+    print(f"overlapping spans: {concurrency} concurrent holds, {len(held)} disjoint winners {spans}")
+
+
+async def lifecycle():
+    await reservations.hold("life_1", "vendor_1", "therapist_life", DAY, START, 60)
+    outcome, _ = await reservations.confirm("life_1")
+    assert outcome == "confirmed", outcome
+    assert not await attempt("life_2", "therapist_life", START, 30)
+
+    previous, _ = await reservations.release("life_1")
+    assert previous == "confirmed", previous
+    assert await attempt("life_2", "therapist_life", START, 30)
+
+    await reservations.hold("short_1", "vendor_1", "therapist_ttl", DAY, START, 60, ttl=1)
+    assert not await attempt("short_2", "therapist_ttl", START, 60)
+    await asyncio.sleep(1.1)
+    assert await attempt("short_2", "therapist_ttl", START, 60)
+    outcome, _ = await reservations.confirm("short_1")
+    assert outcome in ("expired", "lost"), outcome
+    print("lifecycle: confirm, release and hold expiry behave")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redis-url", default="", help="real Redis to test against (database is flushed)")
+    parser.add_argument("--concurrency", type=int, default=500)
+    args = parser.parse_args()
+
+    await connect(args.redis_url)
+    started = time.perf_counter()
+    await race_same_slot(args.concurrency)
+    await race_overlapping(args.concurrency)
+    await lifecycle()
+    print(f"ok in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,18 @@
+/*
+  # Holidays
+
+  1. New Tables
+    - `holidays` - days no slots are offered
+
+  2. Security
+    - RLS enabled with no policies: the table is only read and written by the backend
+*/
+
+CREATE TABLE IF NOT EXISTS holidays (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  date date UNIQUE NOT NULL,
+  name text NOT NULL,
+  created_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE holidays ENABLE ROW LEVEL SECURITY;
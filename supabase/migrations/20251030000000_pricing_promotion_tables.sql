@@ -0,0 +1,76 @@
+/*
+  # Pricing, promotion and commission tables used by the pricing engine
+
+  1. New Tables
+    - `service_pricing_tiers` - unit price of a service from a minimum quantity upwards
+    - `promotions`, `promotion_rules` - automatic and coupon discounts with their conditions
+    - `coupons` - coupon codes of a promotion
+    - `commission_rules` - commission % per vendor, per service or both
+
+  2. Security
+    - RLS enabled with no policies: the tables are only read and written by the backend
+*/
+
+CREATE TABLE IF NOT EXISTS service_pricing_tiers (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  service_id uuid NOT NULL REFERENCES services(id) ON DELETE CASCADE,
+  min_quantity integer NOT NULL CHECK (min_quantity > 0),
+  price numeric(10,2) NOT NULL CHECK (price >= 0),
+  is_active boolean DEFAULT true,
+  created_at timestamptz DEFAULT now(),
+  UNIQUE(service_id, min_quantity)
+);
+
+CREATE TABLE IF NOT EXISTS promotions (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  name text NOT NULL,
+  description text,
+  type text NOT NULL CHECK (type IN ('percentage', 'fixed')),
+  discount_value numeric(10,2) NOT NULL CHECK (discount_value >= 0),
+  min_booking_amount numeric(10,2) DEFAULT 0,
+  max_discount_amount numeric(10,2),
+  applicable_services uuid[],
+  applicable_vendors uuid[],
+  valid_from timestamptz,
+  valid_to timestamptz,
+  total_usage_limit integer,
+  usage_limit_per_customer integer,
+  status text DEFAULT 'active' CHECK (status IN ('draft', 'active', 'paused', 'expired')),
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_promotions_active ON promotions(status, valid_to);
+
+CREATE TABLE IF NOT EXISTS promotion_rules (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  promotion_id uuid NOT NULL REFERENCES promotions(id) ON DELETE CASCADE,
+  rule_type text NOT NULL CHECK (rule_type IN ('day_of_week', 'time_range', 'min_quantity')),
+  rule_value jsonb NOT NULL,
+  created_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_promotion_rules_promotion ON promotion_rules(promotion_id);
+
+CREATE TABLE IF NOT EXISTS coupons (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  code text UNIQUE NOT NULL,
+  promotion_id uuid NOT NULL REFERENCES promotions(id) ON DELETE CASCADE,
+  is_active boolean DEFAULT true,
+  created_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS commission_rules (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  vendor_id uuid REFERENCES vendors(id) ON DELETE CASCADE,
+  service_id uuid REFERENCES services(id) ON DELETE CASCADE,
+  commission_rate numeric(5,2) NOT NULL CHECK (commission_rate BETWEEN 0 AND 100),
+  is_active boolean DEFAULT true,
+  created_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE service_pricing_tiers ENABLE ROW LEVEL SECURITY;
+ALTER TABLE promotions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE promotion_rules ENABLE ROW LEVEL SECURITY;
+ALTER TABLE coupons ENABLE ROW LEVEL SECURITY;
+ALTER TABLE commission_rules ENABLE ROW LEVEL SECURITY;
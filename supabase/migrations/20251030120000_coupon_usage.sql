@@ -0,0 +1,22 @@
+/*
+  # Coupon redemptions
+
+  1. New Tables
+    - `coupon_usage` - one row per booking a coupon was redeemed on
+
+  2. Security
+    - RLS enabled with no policies: the table is only read and written by the backend
+*/
+
+CREATE TABLE IF NOT EXISTS coupon_usage (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  coupon_id uuid NOT NULL REFERENCES coupons(id) ON DELETE CASCADE,
+  customer_id uuid NOT NULL,
+  booking_id uuid UNIQUE NOT NULL REFERENCES bookings(id) ON DELETE CASCADE,
+  discount_amount numeric(10,2) NOT NULL,
+  used_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_coupon_usage_coupon_customer ON coupon_usage(coupon_id, customer_id);
+
+ALTER TABLE coupon_usage ENABLE ROW LEVEL SECURITY;
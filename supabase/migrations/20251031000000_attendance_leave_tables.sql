@@ -0,0 +1,41 @@
+/*
+  # Employee attendance and leave
+
+  1. New Tables
+    - `attendance`, `leave_requests` - employee self-service records
+
+  2. Security
+    - RLS enabled with no policies: the tables are only read and written by the backend
+*/
+
+CREATE TABLE IF NOT EXISTS attendance (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  employee_id uuid NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+  date date NOT NULL,
+  check_in timestamptz,
+  check_out timestamptz,
+  status text DEFAULT 'present' CHECK (status IN ('present', 'absent', 'half_day', 'on_leave', 'holiday')),
+  working_hours numeric(5,2),
+  created_at timestamptz DEFAULT now(),
+  UNIQUE(employee_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS leave_requests (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  employee_id uuid NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+  leave_type text NOT NULL CHECK (leave_type IN ('sick', 'casual', 'earned', 'unpaid')),
+  start_date date NOT NULL,
+  end_date date NOT NULL,
+  total_days integer GENERATED ALWAYS AS (end_date - start_date + 1) STORED,
+  reason text NOT NULL,
+  status text DEFAULT 'pending' CHECK (status IN ('pending', 'approved', 'rejected', 'cancelled')),
+  approved_by uuid REFERENCES auth.users(id),
+  approved_at timestamptz,
+  created_at timestamptz DEFAULT now(),
+  CHECK (end_date >= start_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leave_requests_employee ON leave_requests(employee_id, created_at DESC);
+
+ALTER TABLE attendance ENABLE ROW LEVEL SECURITY;
+ALTER TABLE leave_requests ENABLE ROW LEVEL SECURITY;
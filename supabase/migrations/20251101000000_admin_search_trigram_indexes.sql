@@ -0,0 +1,23 @@
+/*
+  # Trigram indexes for admin user and vendor search
+
+  1. Extensions
+    - Enable `pg_trgm`
+
+  2. Indexes
+    - GIN trigram indexes on the user_profiles and vendors columns that
+      support staff search by (names, emails, mobile numbers)
+    - They serve fuzzy `<%` word-similarity matches as well as
+      `ILIKE '%...%'` substring matches
+*/
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_name_trgm ON user_profiles USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_email_trgm ON user_profiles USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_mobile_trgm ON user_profiles USING gin (mobile gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_vendors_business_name_trgm ON vendors USING gin (business_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_vendors_contact_person_trgm ON vendors USING gin (contact_person gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_vendors_contact_email_trgm ON vendors USING gin (contact_email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_vendors_contact_mobile_trgm ON vendors USING gin (contact_mobile gin_trgm_ops);
@@ -0,0 +1,31 @@
+/*
+  # Service tags and search log for customer autocomplete
+
+  1. New Tables
+    - `service_tags` - free-form tags matched by customer autocomplete
+    - `search_queries` - customer searches, for autocomplete popularity
+
+  2. Security
+    - RLS enabled with no policies: the tables are only read and written by the backend
+*/
+
+CREATE TABLE IF NOT EXISTS service_tags (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  service_id uuid NOT NULL REFERENCES services(id) ON DELETE CASCADE,
+  tag text NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  UNIQUE(service_id, tag)
+);
+
+CREATE TABLE IF NOT EXISTS search_queries (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  query text NOT NULL,
+  user_id uuid,
+  results_count integer,
+  created_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_queries_created ON search_queries(created_at);
+
+ALTER TABLE service_tags ENABLE ROW LEVEL SECURITY;
+ALTER TABLE search_queries ENABLE ROW LEVEL SECURITY;